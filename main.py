@@ -1,84 +1,2334 @@
 import json
+import keyword
+import itertools
+import re
 from typing import Tuple, List, Optional, Any, Union
 import sqlite3
 import os
+import threading
+import time
+import queue
+import asyncio
+from contextlib import contextmanager, asynccontextmanager
+from collections import OrderedDict, deque
+from functools import lru_cache
+import math
+import heapq
 import bcrypt
 from password_strength import PasswordPolicy
 from tabulate import tabulate
 from datetime import datetime
+try:
+    import numpy
+except ImportError:
+    # recommendations are scored in pure Python instead
+    numpy = None
 
 __DEBUG__ = 0
 menu_seperate = '\n' + '{:*^150}'.format(' InCollege ') + '\n'
 
+# Named sets of PRAGMAs applied to every connection when it is opened.
+#   durable:    rollback journal with a full fsync on every commit, nothing memory mapped
+#   balanced:   WAL so readers never wait on writers, fsync only at checkpoints
+#   throughput: WAL without fsync and large caches; an OS crash or power loss can corrupt the database file,
+#               not just lose the last commits, so use it only for data that can be rebuilt
+PERFORMANCE_PROFILES = {
+    "durable": {
+        "journal_mode": "DELETE", "synchronous": "FULL", "mmap_size": 0,
+        "cache_size": -2000, "temp_store": "DEFAULT", "busy_timeout": 5000,
+    },
+    "balanced": {
+        "journal_mode": "WAL", "synchronous": "NORMAL", "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -16000, "temp_store": "MEMORY", "busy_timeout": 5000,
+    },
+    "throughput": {
+        "journal_mode": "WAL", "synchronous": "OFF", "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000, "temp_store": "MEMORY", "busy_timeout": 10000,
+    },
+}
+
+# A job plus the searching user's state, as semi-joins so a job is listed once however many rows match
+JOB_LISTING_COLUMNS = """jobs.*,
+        EXISTS (SELECT 1 FROM job_applications WHERE applicant = :user_id AND job_id = jobs.job_id) AS applied,
+        EXISTS (SELECT 1 FROM job_save WHERE applicant = :user_id AND job_id = jobs.job_id) AS saved"""
+
+# BM25 rank of a full-text job match; title matches weigh most
+JOB_SEARCH_RANK = "bm25(jobs_fts, 10.0, 2.0, 4.0, 3.0, 3.0)"
+
+# Structured job filters, keyword -> condition. search_jobs() adds only the ones given, so each can use its index.
+JOB_FILTERS = {
+    "min_salary": "jobs.salary >= :min_salary",
+    "max_salary": "jobs.salary <= :max_salary",
+    "location": "jobs.location = :location",
+    "employer": "jobs.employer = :employer",
+}
+
+# width of the salary bands counted in the salary facet
+SALARY_BAND = 10000
+
+# Every parameterized statement the app runs, by name. DatabaseManager.fetch/fetchall/execute accept either
+# one of these names or raw SQL, so each statement can be tuned, indexed and measured in one place.
+QUERIES = {
+    # accounts
+    "account_by_id": "SELECT * FROM accounts WHERE user_id=?;",
+    "account_by_username": "SELECT * FROM accounts WHERE username=?;",
+    "account_by_name": "SELECT * FROM accounts WHERE first_name=? AND last_name=?;",
+    "account_count": "SELECT COUNT(*) FROM accounts;",
+    "account_directory_after": "SELECT user_id, username, first_name, last_name, university, major FROM accounts WHERE user_id > ? ORDER BY user_id LIMIT ?;",
+    "account_directory_before": "SELECT user_id, username, first_name, last_name, university, major FROM accounts WHERE user_id < ? ORDER BY user_id DESC LIMIT ?;",
+    "find_users_by_last_name": "SELECT username, first_name, last_name, university, major FROM accounts WHERE last_name=?;",
+    "find_users_by_university": "SELECT username, first_name, last_name, university, major FROM accounts WHERE university=?;",
+    "find_users_by_major": "SELECT username, first_name, last_name, university, major FROM accounts WHERE major=?;",
+    "find_other_users_by_last_name": "SELECT username, first_name, last_name, university, major FROM accounts WHERE last_name=? AND NOT username=?;",
+    "find_other_users_by_university": "SELECT username, first_name, last_name, university, major FROM accounts WHERE university=? AND NOT username=?;",
+    "find_other_users_by_major": "SELECT username, first_name, last_name, university, major FROM accounts WHERE major=? AND NOT username=?;",
+    "insert_account": "INSERT INTO accounts (username, password, first_name, last_name, university, major, plus, last_job_application_timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP);",
+    "delete_account": "DELETE FROM accounts WHERE user_id=?;",
+    "last_job_application": "SELECT last_job_application_timestamp FROM accounts WHERE user_id=?;",
+    "touch_last_job_application": "UPDATE accounts SET last_job_application_timestamp = CURRENT_TIMESTAMP WHERE user_id=?;",
+
+    # settings
+    "settings_by_username": "SELECT * FROM settings WHERE username=?;",
+    "language_by_username": "SELECT language FROM settings WHERE username=?;",
+    "insert_settings": "INSERT INTO settings (username, email_notifs, sms_notifs, target_ads, language) VALUES (?, ?, ?, ?, ?);",
+    "update_email_notifs": "UPDATE settings SET email_notifs=? WHERE username=?;",
+    "update_sms_notifs": "UPDATE settings SET sms_notifs=? WHERE username=?;",
+    "update_target_ads": "UPDATE settings SET target_ads=? WHERE username=?;",
+    "update_language": "UPDATE settings SET language=? WHERE username=?;",
+
+    # profiles
+    "profile_by_username": "SELECT first_name, last_name, title, major, university, about, pastJob1, pastJob2, pastJob3, education, posted FROM profiles WHERE username=?;",
+    "posted_profile_by_username": "SELECT * FROM profiles WHERE username=? AND posted=?;",
+    "profile_posted_status": "SELECT posted FROM profiles WHERE username=?;",
+    "insert_profile": "INSERT INTO profiles (username, first_name, last_name, title, major, university, about, pastJob1, pastJob2, pastJob3, education, posted) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+    "post_profile": "UPDATE profiles SET posted='yes' WHERE username=?;",
+    "update_profile": "UPDATE profiles SET about=?, title=?, major=?, university=?, pastJob1=?, pastJob2=?, pastJob3=?, education=? WHERE username=?;",
+    "update_profile_title": "UPDATE profiles SET title=? WHERE username=?;",
+    "update_profile_major": "UPDATE profiles SET major=? WHERE username=?;",
+    "update_profile_university": "UPDATE profiles SET university=? WHERE username=?;",
+    "update_profile_about": "UPDATE profiles SET about=? WHERE username=?;",
+    "update_profile_pastJob1": "UPDATE profiles SET pastJob1=? WHERE username=?;",
+    "update_profile_pastJob2": "UPDATE profiles SET pastJob2=? WHERE username=?;",
+    "update_profile_pastJob3": "UPDATE profiles SET pastJob3=? WHERE username=?;",
+    "update_profile_education": "UPDATE profiles SET education=? WHERE username=?;",
+
+    # skills
+    "all_skills": "SELECT * FROM skills;",
+    "skill_count": "SELECT COUNT(*) FROM skills;",
+    "insert_skill": "INSERT INTO skills (skill_name, long_description) VALUES (?, ?);",
+
+    # friend requests and friendships
+    "incoming_friend_requests": "SELECT sender, first_name, last_name, university, major FROM friend_requests INNER JOIN accounts ON sender = username WHERE receiver=?;",
+    "outgoing_friend_requests": "SELECT receiver, first_name, last_name, university, major FROM friend_requests INNER JOIN accounts ON receiver = username WHERE sender=?;",
+    "incoming_friend_request_count": "SELECT COUNT(*) FROM friend_requests WHERE receiver=?;",
+    "friend_request_count": "SELECT COUNT(*) FROM friend_requests WHERE (sender=? AND receiver=?);",
+    "insert_friend_request": "INSERT INTO friend_requests (sender, receiver) VALUES (?, ?);",
+    "delete_friend_request": "DELETE FROM friend_requests WHERE sender=? AND receiver=?;",
+    "friendship_count": "SELECT COUNT(*) FROM friendship WHERE (user_one=? AND user_two=?) OR (user_one=? AND user_two=?);",
+    "friendship_count_by_id": """SELECT COUNT(1) FROM friendship
+        WHERE (user_one = (SELECT username FROM accounts WHERE user_id = ?) AND user_two = (SELECT username FROM accounts WHERE user_id = ?))
+        OR (user_one = (SELECT username FROM accounts WHERE user_id = ?) AND user_two = (SELECT username FROM accounts WHERE user_id = ?));""",
+    "friends_as_user_one": """SELECT user_two AS username, first_name, last_name, university, major,
+        (SELECT posted FROM profiles WHERE profiles.username = user_two) AS posted
+        FROM friendship INNER JOIN accounts ON user_two = username WHERE user_one=?;""",
+    "friends_as_user_two": """SELECT user_one AS username, first_name, last_name, university, major,
+        (SELECT posted FROM profiles WHERE profiles.username = user_one) AS posted
+        FROM friendship INNER JOIN accounts ON user_one = username WHERE user_two=?;""",
+    "insert_friendship": "INSERT INTO friendship (user_one, user_two) VALUES (?, ?);",
+    "delete_friendship": "DELETE FROM friendship WHERE (user_one=? AND user_two=?);",
+
+    # jobs
+    "job_by_id": "SELECT * FROM jobs WHERE job_id=?;",
+    # job search: every job annotated with whether :user_id applied for / saved it, optionally only the ones
+    # whose applied state equals :applied, in one statement
+    "job_listings": f"""SELECT {JOB_LISTING_COLUMNS} FROM jobs
+        WHERE (:applied IS NULL OR applied = :applied) ORDER BY job_id;""",
+    "job_listings_by_title": f"""SELECT {JOB_LISTING_COLUMNS} FROM jobs
+        WHERE job_title LIKE :title AND (:applied IS NULL OR applied = :applied) ORDER BY job_id;""",
+    "job_listings_matching": f"""SELECT {JOB_LISTING_COLUMNS} FROM jobs_fts INNER JOIN jobs ON jobs.job_id = jobs_fts.rowid
+        WHERE jobs_fts MATCH :query AND (:applied IS NULL OR applied = :applied)
+        ORDER BY {JOB_SEARCH_RANK}, jobs.job_id;""",
+    "job_count": "SELECT COUNT(*) FROM jobs;",
+    # kept up to date by triggers on jobs, so reading the counts never touches jobs
+    "job_facet_counts": "SELECT facet, value, jobs FROM job_facets ORDER BY facet, jobs DESC, value;",
+    # keyset pages of job titles; job_id is AUTOINCREMENT, so it is also the order jobs were posted in
+    "job_titles_after": "SELECT job_title, job_id FROM jobs WHERE job_id > ? ORDER BY job_id LIMIT ?;",
+    "job_titles_before": "SELECT job_title, job_id FROM jobs WHERE job_id < ? ORDER BY job_id DESC LIMIT ?;",
+    "job_ids": "SELECT job_id FROM jobs;",
+    "jobs_posted_by": "SELECT * FROM jobs WHERE posted_by=? ORDER BY jobs.job_id LIMIT ? OFFSET ?;",
+    "job_posted_by": "SELECT * FROM jobs WHERE job_id=? AND posted_by=?;",
+    "insert_job": "INSERT INTO jobs (skill_name, long_description, job_title, job_description, employer, location, salary, posted_by, user_first_name, user_last_name) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+    "delete_job": "DELETE FROM jobs WHERE job_id=?;",
+    "job_by_long_description": "SELECT * FROM jobs WHERE long_description=?;",
+    # ids as a JSON array, so any number of jobs go in one statement
+    "delete_jobs": "DELETE FROM jobs WHERE job_id IN (SELECT value FROM json_each(?));",
+
+    # job applications and saved jobs
+    "application_count": "SELECT COUNT(*) FROM job_applications WHERE (applicant=? AND job_id=?);",
+    "application_count_by_applicant": "SELECT COUNT(*) FROM job_applications WHERE applicant=?;",
+    # one statement per listing; IN (...) lists a job once even if it was applied for or saved twice
+    "jobs_applied_by": "SELECT * FROM jobs WHERE job_id IN (SELECT job_id FROM job_applications WHERE applicant=?) ORDER BY jobs.job_id LIMIT ? OFFSET ?;",
+    "jobs_not_applied_by": "SELECT * FROM jobs WHERE NOT EXISTS (SELECT 1 FROM job_applications WHERE job_applications.job_id=jobs.job_id AND applicant=?) ORDER BY jobs.job_id LIMIT ? OFFSET ?;",
+    "jobs_not_applied_after": "SELECT * FROM jobs WHERE NOT EXISTS (SELECT 1 FROM job_applications WHERE job_applications.job_id=jobs.job_id AND applicant=?) AND job_id > ? ORDER BY job_id LIMIT ?;",
+    "jobs_not_applied_before": "SELECT * FROM jobs WHERE NOT EXISTS (SELECT 1 FROM job_applications WHERE job_applications.job_id=jobs.job_id AND applicant=?) AND job_id < ? ORDER BY job_id DESC LIMIT ?;",
+    "jobs_saved_by": "SELECT * FROM jobs WHERE job_id IN (SELECT job_id FROM job_save WHERE saved=1 AND applicant=?) ORDER BY jobs.job_id LIMIT ? OFFSET ?;",
+    "insert_application": "INSERT INTO job_applications (applicant, job_id, gr_date, s_date, quals) VALUES (?, ?, ?, ?, ?);",
+    "saved_job_count": "SELECT COUNT(*) FROM job_save WHERE (job_id=? AND applicant=?);",
+    "insert_saved_job": "INSERT INTO job_save (job_id, applicant, saved) VALUES (?, ?, True);",
+    "delete_saved_job": "DELETE FROM job_save WHERE (job_id=? AND applicant=?);",
+
+    # notifications
+    "notifications_for": "SELECT * FROM notifications WHERE user_id=?;",
+    "delete_notifications": "DELETE FROM notifications WHERE user_id=?;",
+    # new jobs are read from jobs past the account's last_seen_job_id watermark instead of being copied to every account
+    "new_jobs_for": "SELECT * FROM jobs WHERE job_id > (SELECT last_seen_job_id FROM accounts WHERE user_id=?) AND posted_by IS NOT ? ORDER BY job_id;",
+    "mark_jobs_seen": "UPDATE accounts SET last_seen_job_id=? WHERE user_id=? AND last_seen_job_id < ?;",
+    "deleted_job_notifs_for": "SELECT * FROM deleted_job_notifs WHERE applicantID=?;",
+    "delete_deleted_job_notifs": "DELETE FROM deleted_job_notifs WHERE applicantID=?;",
+
+    # set-based fan-out: one statement writes the notification for every recipient
+    "notify_other_accounts": "INSERT INTO notifications (user_id, notification) SELECT user_id, ? FROM accounts WHERE NOT user_id=?;",
+
+    # job recommendations; the batch loads read whole tables on purpose
+    "recommendation_profiles": """SELECT accounts.user_id, accounts.major, profiles.title, profiles.major AS profile_major
+        FROM accounts LEFT JOIN profiles ON profiles.username = accounts.username
+        WHERE :ids IS NULL OR accounts.user_id IN (SELECT value FROM json_each(:ids));""",
+    "recommendation_history": """SELECT applicant AS user_id, job_id, job_title, skill_name, 1 AS applied FROM job_applications JOIN jobs USING (job_id)
+        WHERE :ids IS NULL OR applicant IN (SELECT value FROM json_each(:ids))
+        UNION ALL SELECT applicant, job_id, job_title, skill_name, 0 FROM job_save JOIN jobs USING (job_id)
+        WHERE saved=1 AND (:ids IS NULL OR applicant IN (SELECT value FROM json_each(:ids)));""",
+    "recommendation_jobs": "SELECT job_id, job_title, job_description, skill_name, posted_by FROM jobs ORDER BY job_id;",
+    "recommendation_friend_applications": """WITH pairs(user_id, friend_id) AS (
+            SELECT one.user_id, two.user_id FROM friendship JOIN accounts one ON one.username = user_one JOIN accounts two ON two.username = user_two
+            UNION SELECT two.user_id, one.user_id FROM friendship JOIN accounts one ON one.username = user_one JOIN accounts two ON two.username = user_two)
+        SELECT pairs.user_id, job_id, COUNT(*) AS friends FROM pairs JOIN job_applications ON applicant = friend_id
+        WHERE :ids IS NULL OR pairs.user_id IN (SELECT value FROM json_each(:ids)) GROUP BY pairs.user_id, job_id;""",
+    "recommended_jobs": """SELECT jobs.*, job_recommendations.score FROM job_recommendations JOIN jobs ON jobs.job_id = job_recommendations.job_id
+        WHERE job_recommendations.user_id=? AND NOT EXISTS (SELECT 1 FROM job_applications WHERE job_applications.job_id=jobs.job_id AND applicant=job_recommendations.user_id)
+        ORDER BY job_recommendations.score DESC, jobs.job_id LIMIT ?;""",
+    # an account has a row once its list has been computed, even if the list is empty
+    # the accounts sharing a word with a new job: how many words they share, the length of the account's word list
+    # and the score of the account's (?+1)th best job, which a new job has to beat to enter the list
+    "recommendation_candidates": """SELECT recommendation_terms.user_id, COUNT(*) AS shared, recommendation_users.terms,
+            (SELECT score FROM job_recommendations WHERE job_recommendations.user_id = recommendation_terms.user_id
+             ORDER BY score DESC, job_id LIMIT 1 OFFSET ?) AS cutoff
+        FROM recommendation_terms JOIN recommendation_users USING (user_id)
+        WHERE term IN (SELECT value FROM json_each(?)) GROUP BY recommendation_terms.user_id;""",
+    "recommendation_users_of_jobs": "SELECT DISTINCT user_id FROM job_recommendations WHERE job_id IN (SELECT value FROM json_each(?));",
+    "insert_recommendation": "INSERT OR REPLACE INTO job_recommendations (user_id, job_id, score) VALUES (?, ?, ?);",
+    "insert_recommendation_user": "INSERT OR REPLACE INTO recommendation_users (user_id, terms) VALUES (?, ?);",
+    "insert_recommendation_term": "INSERT OR IGNORE INTO recommendation_terms (term, user_id) VALUES (?, ?);",
+    "clear_recommendations": "DELETE FROM job_recommendations WHERE :ids IS NULL OR user_id IN (SELECT value FROM json_each(:ids));",
+    "clear_recommendation_terms": "DELETE FROM recommendation_terms WHERE :ids IS NULL OR user_id IN (SELECT value FROM json_each(:ids));",
+    # keeps the best ? of one account's list
+    "trim_recommendations": """DELETE FROM job_recommendations WHERE user_id = ? AND job_id IN (
+        SELECT job_id FROM job_recommendations WHERE user_id = ? ORDER BY score DESC, job_id LIMIT -1 OFFSET ?);""",
+
+    # messages
+    "messages_for": "SELECT * FROM messages WHERE recipient=?;",
+    "message_count_for": "SELECT COUNT(*) FROM messages WHERE recipient=?;",
+    "insert_message": "INSERT INTO messages (recipient, message, sender) VALUES (?, ?, ?);",
+    "delete_message": "DELETE FROM messages WHERE sender=? AND message=? AND recipient=?;",
+}
+
+# Registered queries that are meant to read every row of a table (listings, counts and fan-out to all accounts).
+# check_query_plans() reports every other registered query whose plan scans a whole table.
+FULL_SCAN_QUERIES = {
+    "account_count", "all_skills", "skill_count",
+    "job_count", "job_ids", "job_listings", "job_listings_by_title",
+    "jobs_not_applied_by",
+    "notify_other_accounts", "recommendation_profiles", "recommendation_history", "recommendation_jobs",
+    "recommendation_friend_applications", "clear_recommendations", "clear_recommendation_terms", "job_facet_counts",
+}
+
+# Job reads DatabaseManager answers from its ResultCache, name -> tables whose writes invalidate them.
+# Searches narrowed by JOB_FILTERS are cached like the query they were built from.
+CACHED_QUERIES = {
+    "job_count": {"jobs"},
+    "job_by_id": {"jobs"},
+    "job_titles_after": {"jobs"},
+    "job_titles_before": {"jobs"},
+    "jobs_not_applied_after": {"jobs", "job_applications"},
+    "jobs_not_applied_before": {"jobs", "job_applications"},
+    "job_facet_counts": {"jobs"},
+    "job_listings": {"jobs", "job_applications", "job_save"},
+    "job_listings_by_title": {"jobs", "job_applications", "job_save"},
+    "job_listings_matching": {"jobs", "job_applications", "job_save"},
+}
+
+# Keyset paging of the job listings, listing -> (its sort terms, each term's value for the job :key). A page goes on
+# after (or before) the job :key by comparing sort keys, so every page costs the same however deep it is.
+JOB_LISTING_KEYS = {
+    "job_listings": (["jobs.job_id"], [":key"]),
+    "job_listings_by_title": (["jobs.job_id"], [":key"]),
+    "job_listings_matching": ([JOB_SEARCH_RANK, "jobs.job_id"],
+                              [f"(SELECT {JOB_SEARCH_RANK} FROM jobs_fts WHERE jobs_fts MATCH :query AND rowid = :key)", ":key"]),
+}
+
+# SQL built from a registered query (see DatabaseManager.job_listing_query) -> the query's name
+_derived_queries = {}
+
+# Writes that change more tables than the one they name: deleting jobs or accounts cascades.
+CASCADED_WRITES = {
+    ("delete", "jobs"): {"jobs", "job_applications", "job_save"},
+    ("delete", "accounts"): {"jobs", "job_applications", "job_save"},
+}
+
+# Secondary indexes managed by DatabaseManager.sync_indexes(), name -> (table, columns).
+# Every idx_ prefixed index in the database belongs to this set; ones removed from here are dropped.
+INDEXES = {
+    "idx_accounts_last_name": ("accounts", ("last_name", "first_name")),
+    "idx_accounts_university": ("accounts", ("university",)),
+    "idx_accounts_major": ("accounts", ("major",)),
+    "idx_notifications_user_id": ("notifications", ("user_id",)),
+    "idx_messages_recipient": ("messages", ("recipient",)),
+    "idx_messages_sender": ("messages", ("sender",)),
+    "idx_friend_requests_sender": ("friend_requests", ("sender", "receiver")),
+    "idx_friend_requests_receiver": ("friend_requests", ("receiver",)),
+    "idx_friendship_user_one": ("friendship", ("user_one", "user_two")),
+    "idx_friendship_user_two": ("friendship", ("user_two",)),
+    "idx_jobs_posted_by": ("jobs", ("posted_by",)),
+    "idx_jobs_salary": ("jobs", ("salary",)),
+    "idx_jobs_location_salary": ("jobs", ("location", "salary")),
+    "idx_jobs_employer_salary": ("jobs", ("employer", "salary")),
+    "idx_job_applications_applicant": ("job_applications", ("applicant", "job_id")),
+    "idx_job_applications_job_id": ("job_applications", ("job_id",)),
+    "idx_job_save_applicant": ("job_save", ("applicant", "job_id")),
+    "idx_job_save_job_id": ("job_save", ("job_id",)),
+    "idx_deleted_job_notifs_applicant": ("deleted_job_notifs", ("applicantID",)),
+    "idx_new_job_notifs_recipient": ("new_job_notifs", ("recipientID",)),
+    "idx_job_recommendations_job_id": ("job_recommendations", ("job_id",)),
+    "idx_recommendation_terms_user_id": ("recommendation_terms", ("user_id",)),
+}
+
+# External-content FTS5 index over the searchable job columns. The jobs table stays the only copy of the text;
+# the triggers keep the index in step with every insert, update and delete (including foreign key cascades).
+JOB_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE jobs_fts USING fts5(
+        job_title, job_description, skill_name, employer, location,
+        content='jobs', content_rowid='job_id'
+    );""",
+    """
+    CREATE TRIGGER jobs_fts_insert AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts (rowid, job_title, job_description, skill_name, employer, location)
+        VALUES (new.job_id, new.job_title, new.job_description, new.skill_name, new.employer, new.location);
+    END;""",
+    """
+    CREATE TRIGGER jobs_fts_delete AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts (jobs_fts, rowid, job_title, job_description, skill_name, employer, location)
+        VALUES ('delete', old.job_id, old.job_title, old.job_description, old.skill_name, old.employer, old.location);
+    END;""",
+    """
+    CREATE TRIGGER jobs_fts_update AFTER UPDATE ON jobs BEGIN
+        INSERT INTO jobs_fts (jobs_fts, rowid, job_title, job_description, skill_name, employer, location)
+        VALUES ('delete', old.job_id, old.job_title, old.job_description, old.skill_name, old.employer, old.location);
+        INSERT INTO jobs_fts (rowid, job_title, job_description, skill_name, employer, location)
+        VALUES (new.job_id, new.job_title, new.job_description, new.skill_name, new.employer, new.location);
+    END;""",
+    "INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild');",
+]
+
+def create_job_search_index(db):
+    """ Migration step for the full-text job index. SQLite builds without FTS5 skip it and keep searching with LIKE. """
+    try:
+        db.execute(JOB_SEARCH_INDEX[0])
+    except sqlite3.OperationalError:
+        return
+    for statement in JOB_SEARCH_INDEX[1:]:
+        db.execute(statement)
+
+# Tells everyone who applied for a job that it was deleted, as part of the DELETE itself, before the applications
+# cascade away. With shards every shard's job_applications_<n> gets a TEMP copy, since main can't see into them.
+DELETED_JOB_TRIGGER = """
+        CREATE {temp}TRIGGER IF NOT EXISTS {name} BEFORE DELETE ON {jobs} BEGIN
+            INSERT INTO deleted_job_notifs (applicantID, jobID, jobTitle)
+            SELECT applicant, OLD.job_id, OLD.job_title FROM {applications} WHERE job_id = OLD.job_id;
+        END;"""
+
+# Schema migrations, applied in order by DatabaseManager.migrate(). PRAGMA user_version records how many have been
+# applied, so an up to date database runs no DDL at startup. A step is either SQL or a function taking the DatabaseManager.
+# Append new migrations to the end; never change one that has already shipped.
+SCHEMA_MIGRATIONS = [
+    # 1: base schema
+    [
+        """
+        CREATE TABLE IF NOT EXISTS accounts (
+            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            university TEXT NOT NULL,
+            major TEXT NOT NULL,
+            plus BOOL NOT NULL,
+            last_job_application_timestamp TIMESTAMP NOT NULL
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS notifications (
+            user_id INTEGER NOT NULL,
+            notification TEXT NOT NULL
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            recipient INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            sender INTEGER NOT NULL,
+            FOREIGN KEY (recipient) REFERENCES accounts(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (sender) REFERENCES accounts(user_id) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            username TEXT PRIMARY KEY,
+            email_notifs BOOL NOT NULL,
+            sms_notifs BOOL NOT NULL,
+            target_ads BOOL NOT NULL,
+            language TEXT NOT NULL,
+            FOREIGN KEY (username) REFERENCES accounts(username) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS profiles (
+            username TEXT PRIMARY KEY,
+            first_name TEXT NOT NULL,
+            last_name TEXT NOT NULL,
+            title TEXT NOT NULL,
+            major TEXT NOT NULL,
+            university TEXT NOT NULL,
+            about TEXT NOT NULL,
+            pastJob1 TEXT NOT NULL,
+            pastJob2 TEXT NOT NULL,
+            pastJob3 TEXT NOT NULL,
+            education TEXT NOT NULL,
+            posted TEXT NOT NULL,
+            FOREIGN KEY (username) REFERENCES accounts(username) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS friend_requests (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT NOT NULL,
+            receiver TEXT NOT NULL,
+            FOREIGN KEY (sender) REFERENCES accounts(username) ON DELETE CASCADE,
+            FOREIGN KEY (receiver) REFERENCES accounts(username) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS friendship (
+            friendship_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_one TEXT NOT NULL,
+            user_two TEXT NOT NULL,
+            FOREIGN KEY (user_one) REFERENCES accounts(username) ON DELETE CASCADE,
+            FOREIGN KEY (user_two) REFERENCES accounts(username) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS skills (
+            skill_name TEXT PRIMARY KEY,
+            long_description TEXT UNIQUE NOT NULL
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            skill_name TEXT NOT NULL,
+            long_description TEXT UNIQUE NOT NULL,
+            job_title TEXT NOT NULL,
+            job_description TEXT NOT NULL,
+            employer TEXT NOT NULL,
+            location TEXT NOT NULL,
+            salary REAL NOT NULL,
+            posted_by INTEGER,
+            user_first_name TEXT NOT NULL,
+            user_last_name TEXT NOT NULL,
+            FOREIGN KEY (posted_by) REFERENCES accounts(user_id) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS job_applications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            applicant INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            gr_date TEXT NOT NULL,
+            s_date TEXT NOT NULL,
+            quals TEXT NOT NULL,
+            FOREIGN KEY (applicant) REFERENCES accounts(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS deleted_job_notifs (
+            applicantID INTEGER,
+            jobID INTEGER,
+            jobTitle TEXT NOT NULL,
+            FOREIGN KEY (applicantID) REFERENCES accounts(user_id) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS new_job_notifs (
+            notifID INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipientID INTEGER,
+            message TEXT NOT NULL,
+            FOREIGN KEY (recipientID) REFERENCES accounts(user_id) ON DELETE CASCADE
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS job_save (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            applicant INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            saved BOOL NOT NULL,
+            FOREIGN KEY (applicant) REFERENCES accounts(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
+        );""",
+    ],
+    # 2: managed secondary indexes
+    [
+        lambda db: db.sync_indexes(),
+    ],
+    # 3: full-text job search
+    [
+        lambda db: create_job_search_index(db),
+    ],
+    # 4: new job announcements are read from jobs past a per-account watermark instead of new_job_notifs rows.
+    # An account with announcements still pending resumes just before the oldest of those jobs, any other account
+    # has seen every job; new accounts start at the newest job.
+    [
+        "ALTER TABLE accounts ADD COLUMN last_seen_job_id INTEGER NOT NULL DEFAULT 0;",
+        """
+        UPDATE accounts SET last_seen_job_id = COALESCE(
+            (SELECT MIN(jobs.job_id) - 1 FROM new_job_notifs
+             JOIN jobs ON new_job_notifs.message = 'A new job "' || jobs.job_title || '" has been posted.'
+             WHERE new_job_notifs.recipientID = accounts.user_id),
+            (SELECT MAX(job_id) FROM jobs), 0);""",
+        "DELETE FROM new_job_notifs;",
+        """
+        CREATE TRIGGER IF NOT EXISTS accounts_start_at_newest_job AFTER INSERT ON accounts BEGIN
+            UPDATE accounts SET last_seen_job_id = (SELECT COALESCE(MAX(job_id), 0) FROM jobs) WHERE user_id = NEW.user_id;
+        END;""",
+    ],
+    # 5: deleted job notifications are written by a trigger on jobs
+    [
+        DELETED_JOB_TRIGGER.format(temp="", name="jobs_notify_applicants", jobs="jobs", applications="job_applications"),
+    ],
+    # 6: precomputed top-K job recommendations, maintained by JobRecommender
+    [
+        """
+        CREATE TABLE IF NOT EXISTS job_recommendations (
+            user_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            PRIMARY KEY (user_id, job_id),
+            FOREIGN KEY (user_id) REFERENCES accounts(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
+        ) WITHOUT ROWID;""",
+        lambda db: db.sync_indexes(),
+    ],
+    # 7: faceted job filters: indexes for the filters and per value job counts kept by triggers
+    [
+        lambda db: db.sync_indexes(),
+        """
+        CREATE TABLE IF NOT EXISTS job_facets (
+            facet TEXT NOT NULL,
+            value NOT NULL,
+            jobs INTEGER NOT NULL,
+            PRIMARY KEY (facet, value)
+        ) WITHOUT ROWID;""",
+        f"""
+        INSERT INTO job_facets (facet, value, jobs)
+            SELECT 'location', location, COUNT(*) FROM jobs GROUP BY location
+            UNION ALL SELECT 'employer', employer, COUNT(*) FROM jobs GROUP BY employer
+            UNION ALL SELECT 'salary', CAST(salary / {SALARY_BAND} AS INTEGER) * {SALARY_BAND}, COUNT(*) FROM jobs GROUP BY 2;""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS jobs_facets_insert AFTER INSERT ON jobs BEGIN
+            INSERT INTO job_facets (facet, value, jobs) VALUES
+                ('location', NEW.location, 1), ('employer', NEW.employer, 1),
+                ('salary', CAST(NEW.salary / {SALARY_BAND} AS INTEGER) * {SALARY_BAND}, 1)
+            ON CONFLICT (facet, value) DO UPDATE SET jobs = jobs + 1;
+        END;""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS jobs_facets_delete AFTER DELETE ON jobs BEGIN
+            UPDATE job_facets SET jobs = jobs - 1 WHERE (facet, value) IN (VALUES
+                ('location', OLD.location), ('employer', OLD.employer),
+                ('salary', CAST(OLD.salary / {SALARY_BAND} AS INTEGER) * {SALARY_BAND}));
+            DELETE FROM job_facets WHERE jobs <= 0;
+        END;""",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS jobs_facets_update AFTER UPDATE OF location, employer, salary ON jobs BEGIN
+            UPDATE job_facets SET jobs = jobs - 1 WHERE (facet, value) IN (VALUES
+                ('location', OLD.location), ('employer', OLD.employer),
+                ('salary', CAST(OLD.salary / {SALARY_BAND} AS INTEGER) * {SALARY_BAND}));
+            INSERT INTO job_facets (facet, value, jobs) VALUES
+                ('location', NEW.location, 1), ('employer', NEW.employer, 1),
+                ('salary', CAST(NEW.salary / {SALARY_BAND} AS INTEGER) * {SALARY_BAND}, 1)
+            ON CONFLICT (facet, value) DO UPDATE SET jobs = jobs + 1;
+            DELETE FROM job_facets WHERE jobs <= 0;
+        END;""",
+    ],
+    # 8: every account's recommendation words, indexed by word, so a new job is scored only against the accounts
+    # sharing a word with it. Lists computed before this step are computed again on their next read.
+    [
+        """
+        CREATE TABLE IF NOT EXISTS recommendation_users (
+            user_id INTEGER PRIMARY KEY,
+            terms INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES accounts(user_id) ON DELETE CASCADE
+        );""",
+        """
+        CREATE TABLE IF NOT EXISTS recommendation_terms (
+            term TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            PRIMARY KEY (term, user_id),
+            FOREIGN KEY (user_id) REFERENCES accounts(user_id) ON DELETE CASCADE
+        ) WITHOUT ROWID;""",
+        lambda db: db.sync_indexes(),
+    ],
+]
+
+class Record:
+    """
+        Base class of the rows DatabaseManager returns. Fields live in __slots__, so a record costs about as much
+        memory as a tuple and far less than a dict, and are read by name. A record still indexes, unpacks and
+        compares like the tuple sqlite3 would have returned, so code that only needs positions keeps working.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self._fields, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} records are read-only")
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return getattr(self, self._fields[index])
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
+
+def record_type(name, fields):
+    """ A Record subclass with the given field names. """
+    fields = tuple(fields)
+    return type(name, (Record,), {"__slots__": fields, "_fields": fields})
+
+# Records for whole-table rows. Queries returning any other set of columns get a Row type built for those columns.
+Account = record_type("Account", ("user_id", "username", "password", "first_name", "last_name", "university", "major",
+                                  "plus", "last_job_application_timestamp", "last_seen_job_id"))
+Settings = record_type("Settings", ("username", "email_notifs", "sms_notifs", "target_ads", "language"))
+Profile = record_type("Profile", ("username", "first_name", "last_name", "title", "major", "university", "about",
+                                  "pastJob1", "pastJob2", "pastJob3", "education", "posted"))
+Skill = record_type("Skill", ("skill_name", "long_description"))
+Job = record_type("Job", ("job_id", "skill_name", "long_description", "job_title", "job_description", "employer", "location",
+                          "salary", "posted_by", "user_first_name", "user_last_name"))
+JobApplication = record_type("JobApplication", ("id", "applicant", "job_id", "gr_date", "s_date", "quals"))
+SavedJob = record_type("SavedJob", ("id", "applicant", "job_id", "saved"))
+Notification = record_type("Notification", ("user_id", "notification"))
+Message = record_type("Message", ("recipient", "message", "sender"))
+DeletedJobNotification = record_type("DeletedJobNotification", ("applicantID", "jobID", "jobTitle"))
+NewJobNotification = record_type("NewJobNotification", ("notifID", "recipientID", "message"))
+# a job together with the searching user's state
+JobListing = record_type("JobListing", Job._fields + ("applied", "saved"))
+RecommendedJob = record_type("RecommendedJob", Job._fields + ("score",))
+
+_record_types = {cls._fields: cls for cls in (Account, Settings, Profile, Skill, Job, JobApplication, SavedJob,
+                                               Notification, Message, DeletedJobNotification, NewJobNotification, JobListing,
+                                               RecommendedJob)}
+
+def _record_class(description):
+    """ The Record class for a result's columns. Names that aren't identifiers, like COUNT(*), become column_<n>. """
+    fields = []
+    for i, column in enumerate(description):
+        name = column[0]
+        if not name.isidentifier() or keyword.iskeyword(name) or name.startswith("_") or name in fields:
+            name = f"column_{i}"
+        fields.append(name)
+    fields = tuple(fields)
+    cls = _record_types.get(fields)
+    if cls is None:
+        cls = _record_types.setdefault(fields, record_type("Row", fields))
+    return cls
+
+_record_classes = {}  # cursor.description -> Record class
+
+def record_factory(cursor, row):
+    """ sqlite3 row_factory returning Records. """
+    cls = _record_classes.get(cursor.description)
+    if cls is None:
+        cls = _record_classes.setdefault(cursor.description, _record_class(cursor.description))
+    return cls(*row)
+
+class StatementCache:
+    """
+        Hit/miss statistics for sqlite3's per-connection prepared statement cache.
+        sqlite3 keeps the last `size` compiled statements of each connection in LRU order keyed by SQL text, but
+        does not expose counters, so this mirrors that LRU on every connection to count hits and misses.
+    """
+    def __init__(self, size=128):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.by_query = {}  # query name (or SQL) -> [hits, misses]
+        self._lock = threading.Lock()
+
+    def record(self, conn, key, sql):
+        lru = conn.statement_lru
+        hit = sql in lru
+        if hit:
+            lru.move_to_end(sql)
+        else:
+            lru[sql] = None
+            if len(lru) > self.size:
+                lru.popitem(last=False)
+
+        with self._lock:
+            counts = self.by_query.setdefault(key, [0, 0])
+            if hit:
+                self.hits += 1
+                counts[0] += 1
+            else:
+                self.misses += 1
+                counts[1] += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": self.size, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "queries": {key: {"hits": h, "misses": m} for key, (h, m) in self.by_query.items()},
+            }
+
+class ResultCache:
+    """
+        In-process LRU cache of query results, bounded to `size` entries that each live at most `ttl` seconds.
+        Every entry is tagged with the tables it was read from, and invalidate(tables) drops just those entries.
+        Each table also counts its invalidations, so a result read while one of its tables was being written is
+        not stored: put() takes the version() of the tags from before the read.
+    """
+    def __init__(self, size=256, ttl=30.0):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()   # key -> (value, tags, expiry time)
+        self._generations = {}          # table -> times invalidated
+        self._cleared = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ (True, value) for a live entry, otherwise (False, None). """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def version(self, tags):
+        with self._lock:
+            return self._version(tags)
+
+    def _version(self, tags):
+        # the counters only grow, so an unchanged sum means no table in tags was invalidated
+        return self._cleared + sum(self._generations.get(table, 0) for table in tags)
+
+    def put(self, key, value, tags, version=None):
+        """ Stores value unless version is given and one of tags was invalidated since it was taken. """
+        with self._lock:
+            if version is not None and version != self._version(tags):
+                return
+            self._entries[key] = (value, frozenset(tags), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables):
+        """ Drops every entry read from any of tables. """
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, (_, tags, _) in self._entries.items() if tags & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._cleared += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": self.size, "ttl": self.ttl, "entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0, "evictions": self.evictions, "invalidations": self.invalidations,
+            }
+
+class QueryStats:
+    """
+        Optional instrumentation for DatabaseManager. Records call counts, rows and a latency histogram for every
+        statement (keyed by its registered name, or by its whitespace-normalized SQL) and keeps a log of slow
+        statements together with their EXPLAIN QUERY PLAN.
+    """
+    # upper bounds of the latency histogram buckets, in milliseconds
+    BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float('inf'))
+
+    def __init__(self, slow_query_ms=100.0, slow_query_log=None, keep_slow=100):
+        self.slow_query_ms = slow_query_ms
+        self.slow_query_log = slow_query_log  # file slow statements are appended to, if any
+        self.slow_queries = deque(maxlen=keep_slow)
+        self.statements = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(sql):
+        return ' '.join(sql.split())
+
+    def record(self, key, elapsed_ms, rows):
+        bucket = next(i for i, bound in enumerate(self.BUCKETS_MS) if elapsed_ms <= bound)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = {"calls": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                "histogram": [0] * len(self.BUCKETS_MS)}
+            stats["calls"] += 1
+            stats["rows"] += rows
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["histogram"][bucket] += 1
+
+    def log_slow(self, key, sql, params, elapsed_ms, plan):
+        entry = {"query": key, "sql": self.normalize(sql), "params": params, "ms": elapsed_ms, "plan": plan,
+                 "at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        with self._lock:
+            self.slow_queries.append(entry)
+            if self.slow_query_log:
+                with open(self.slow_query_log, 'a') as f:
+                    f.write(f"[{entry['at']}] {elapsed_ms:.2f} ms  {key}\n  {entry['sql']}\n  params: {params!r}\n")
+                    for step in plan:
+                        f.write(f"  plan: {step}\n")
+
+    def percentile(self, key, fraction):
+        """ Upper bound of the histogram bucket holding the given fraction of calls, in milliseconds. """
+        stats = self.statements[key]
+        needed = fraction * stats["calls"]
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS, stats["histogram"]):
+            seen += count
+            if seen >= needed:
+                return min(bound, stats["max_ms"])
+        return stats["max_ms"]
+
+    def report(self):
+        """ Summary table of every recorded statement, most expensive in total first. """
+        with self._lock:
+            keys = sorted(self.statements, key=lambda key: self.statements[key]["total_ms"], reverse=True)
+            rows = []
+            for key in keys:
+                stats = self.statements[key]
+                label = key if len(key) <= 60 else key[:57] + "..."
+                rows.append([label, stats["calls"], stats["rows"], f"{stats['total_ms']:.2f}",
+                             f"{stats['total_ms'] / stats['calls']:.3f}", f"{self.percentile(key, 0.95):.3f}", f"{stats['max_ms']:.3f}"])
+        head = ["Statement", "Calls", "Rows", "Total ms", "Avg ms", "p95 ms", "Max ms"]
+        return tabulate(rows, headers=head, tablefmt="grid")
+
+class CachedConnection(sqlite3.Connection):
+    """
+        sqlite3 connection carrying the mirror of its statement cache used by StatementCache, the last
+        PRAGMA data_version it saw, which tells DatabaseManager when other connections have committed, with the
+        number of the manager's own commits at that time, the tables written by its open transaction (None standing
+        for every table), and whether the views of a sharded database are installed on it.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_lru = OrderedDict()
+        self.data_version = None
+        self.own_commits = 0
+        self.written = set()
+        self.shards_installed = False
+
+# User-owned tables that DatabaseManager(shards=N) spreads over N attached database files, table -> SQL giving the
+# user_id that owns a row ({row} is NEW or OLD). All of one user's rows live in shard user_id % N.
+SHARDED_TABLES = {
+    "messages": "{row}.recipient",
+    "notifications": "{row}.user_id",
+    "job_applications": "{row}.applicant",
+    "job_save": "{row}.applicant",
+    "settings": "(SELECT user_id FROM accounts WHERE username = {row}.username)",
+    "profiles": "(SELECT user_id FROM accounts WHERE username = {row}.username)",
+}
+
+# The column naming a sharded row's owner, which DatabaseManager reads from a write's parameters to send the write
+# straight to the owner's shard. A username is resolved to its user_id through accounts.
+SHARD_KEYS = {
+    "messages": "recipient",
+    "notifications": "user_id",
+    "job_applications": "applicant",
+    "job_save": "applicant",
+    "settings": "username",
+    "profiles": "username",
+}
+
+# SQLite attaches at most 10 databases to a connection
+MAX_SHARDS = 10
+
+SQLITE_LOCKED = 6
+
+def is_table_lock(error):
+    """ True for SQLITE_LOCKED, the conflict a shared-cache connection reports when another one holds a table lock. """
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is None:
+        return "table is locked" in str(error) or "schema is locked" in str(error)
+    return code & 0xff == SQLITE_LOCKED
+
+class StorageBackend:
+    """
+        Where a DatabaseManager's data lives. A backend opens the connections the pools hand out and says whether
+        separate read-only connections can be used with it.
+    """
+    supports_readers = False
+    # True when connections lock tables instead of the file, so SQLite reports a conflict at once rather than waiting busy_timeout
+    table_locks = False
+
+    def connect(self, cached_statements=128):
+        raise NotImplementedError
+
+    def connect_reader(self, cached_statements=128):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.location!r})"
+
+class FileBackend(StorageBackend):
+    """ An SQLite database file on disk. """
+    supports_readers = True
+
+    def __init__(self, path):
+        self.location = path
+
+    def connect(self, cached_statements=128):
+        return sqlite3.connect(self.location, check_same_thread=False, factory=CachedConnection, cached_statements=cached_statements)
+
+    def connect_reader(self, cached_statements=128):
+        return sqlite3.connect(f"file:{os.path.abspath(self.location)}?mode=ro", uri=True, check_same_thread=False,
+                               isolation_level=None, factory=CachedConnection, cached_statements=cached_statements)
+
+    def shard_location(self, shard, readonly=False):
+        """ The file holding shard number `shard`, next to the main file: users.db -> users.shard0.db. """
+        root, ext = os.path.splitext(os.path.abspath(self.location))
+        path = f"{root}.shard{shard}{ext or '.db'}"
+        return f"file:{path}?mode=ro" if readonly else path
+
+class MemoryBackend(StorageBackend):
+    """
+        A shared-cache in-memory database. Every connection opened by the backend sees the same data, which lives
+        until the backend is closed. Nothing is written to disk.
+    """
+    table_locks = True
+    _names = itertools.count(1)
+
+    def __init__(self, name=None):
+        self.name = name or f"incollege-{os.getpid()}-{next(self._names)}"
+        self.location = self.name
+        # the database only exists while a connection to it is open; this one keeps it alive between checkouts
+        self._anchor = self.connect()
+
+    def connect(self, cached_statements=128):
+        return sqlite3.connect(f"file:{self.name}?mode=memory&cache=shared", uri=True, check_same_thread=False,
+                               factory=CachedConnection, cached_statements=cached_statements)
+
+    def close(self):
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+
+class SnapshotBackend(MemoryBackend):
+    """
+        An in-memory database that is loaded from `path` when opened and copied back to it every `interval` seconds
+        and on close. Commits made since the last snapshot are lost if the process dies.
+    """
+    def __init__(self, path, interval=30.0):
+        super().__init__()
+        self.location = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if os.path.exists(path):
+            disk = sqlite3.connect(path)
+            try:
+                disk.backup(self._anchor)
+            finally:
+                disk.close()
+        self._thread = threading.Thread(target=self._run, name="db-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.snapshot()
+
+    def snapshot(self):
+        """ Copies the in-memory database to the snapshot file, replacing the previous snapshot atomically. """
+        with self._lock:
+            if self._anchor is None:
+                return
+            temp = self.location + ".tmp"
+            disk = sqlite3.connect(temp)
+            try:
+                self._anchor.backup(disk)
+            finally:
+                disk.close()
+            os.replace(temp, self.location)
+
+    def close(self):
+        self._stop.set()
+        self.snapshot()
+        with self._lock:
+            super().close()
+
+def open_backend(data_file):
+    """
+        Picks the storage engine for a data_file: ":memory:" or "memory:<name>" for a shared in-memory database,
+        "snapshot:<path>" for an in-memory database snapshotted to path, anything else is a database file.
+    """
+    if isinstance(data_file, StorageBackend):
+        return data_file
+    if data_file == ":memory:":
+        return MemoryBackend()
+    if data_file.startswith("memory:"):
+        return MemoryBackend(data_file[len("memory:"):] or None)
+    if data_file.startswith("snapshot:"):
+        return SnapshotBackend(data_file[len("snapshot:"):])
+    return FileBackend(data_file)
+
+class ConnectionPool:
+    """
+        Hands every thread its own sqlite3 connection, opening at most `size` connections at once.
+        Connections released by a thread are kept idle for reuse until `idle_timeout` seconds pass,
+        and are health checked before being handed to another thread.
+    """
+    def __init__(self, connect, size=5, idle_timeout=300.0, on_connect=None, acquire_timeout=30.0):
+        assert size > 0, "Pool size must be positive"
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self._connect = connect
+        self._on_connect = on_connect
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []     # [(connection, time it was released)]
+        self._owners = {}   # thread -> connection it currently holds
+
+    def acquire(self):
+        """ Returns the calling thread's connection, checking one out of the pool if it has none. """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+
+        if not self._slots.acquire(blocking=False):
+            self._reclaim_dead_threads()
+            if not self._slots.acquire(timeout=self.acquire_timeout):
+                raise sqlite3.OperationalError(f"Connection pool exhausted ({self.size} connections in use)")
+
+        try:
+            conn = self._take_idle() or self._open()
+        except Exception:
+            self._slots.release()
+            raise
+
+        self._local.conn = conn
+        with self._lock:
+            self._owners[threading.current_thread()] = conn
+        return conn
+
+    def current(self):
+        """ The calling thread's connection if it holds one, without checking one out. """
+        return getattr(self._local, 'conn', None)
+
+    def release(self):
+        """ Returns the calling thread's connection to the pool so another thread can reuse it. """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._owners.pop(threading.current_thread(), None)
+        self._put_idle(conn)
+        self._slots.release()
+
+    def close(self):
+        """ Closes every connection the pool knows about, idle or in use. """
+        with self._lock:
+            connections = [conn for conn, _ in self._idle] + list(self._owners.values())
+            self._idle = []
+            self._owners = {}
+        self._local = threading.local()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def stats(self):
+        with self._lock:
+            return {"size": self.size, "in_use": len(self._owners), "idle": len(self._idle)}
+
+    def _open(self):
+        conn = self._connect()
+        if self._on_connect:
+            try:
+                self._on_connect(conn)
+            except Exception:
+                conn.close()
+                raise
+        return conn
+
+    def _put_idle(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            return
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    def _take_idle(self):
+        """ Pops the most recently released healthy connection, closing expired or broken ones on the way. """
+        now = time.monotonic()
+        with self._lock:
+            expired = [conn for conn, released in self._idle if now - released > self.idle_timeout]
+            self._idle = [(conn, released) for conn, released in self._idle if now - released <= self.idle_timeout]
+        for conn in expired:
+            conn.close()
+
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, _ = self._idle.pop()
+            if self._healthy(conn):
+                return conn
+            conn.close()
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.execute("SELECT 1;").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _reclaim_dead_threads(self):
+        """ Puts connections held by threads that exited without releasing them back in the pool. """
+        with self._lock:
+            dead = [thread for thread in self._owners if not thread.is_alive()]
+            connections = [self._owners.pop(thread) for thread in dead]
+        for conn in connections:
+            self._put_idle(conn)
+            self._slots.release()
+
+class WriteBehindQueue:
+    """
+        Bounded queue for writes nobody has to wait for. A background worker applies them in order, in batched
+        transactions of up to `batch_size` writes. put() only blocks while the queue is full. A write may also be a
+        function, called with its params; it is never flushed for a statement, since it writes no table by name.
+    """
+    # the table a write statement changes
+    WRITE_TARGET = re.compile(r"^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+(\w+)", re.IGNORECASE)
+
+    def __init__(self, db, max_size=1000, batch_size=100):
+        self.db = db
+        self.batch_size = batch_size
+        self._queue = queue.Queue(max_size)
+        self._lock = threading.Lock()
+        self._tables = {}   # table -> writes to it not yet applied
+        self._thread = None
+
+    @property
+    def depth(self):
+        """ Writes queued or being applied. """
+        with self._lock:
+            return sum(self._tables.values())
+
+    def put(self, query, sql, params):
+        if callable(query):
+            table = None
+        else:
+            table = self.WRITE_TARGET.match(sql)
+            table = table.group(1).lower() if table else ""
+        with self._lock:
+            self._tables[table] = self._tables.get(table, 0) + 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="db-write-behind", daemon=True)
+                self._thread.start()
+        self._queue.put((query, params, table))
+
+    def touches(self, sql):
+        """ True if a pending write changes a table the statement mentions, so it has to be flushed first. """
+        with self._lock:
+            tables = [table for table, count in self._tables.items() if count and table is not None]
+        if not tables or threading.current_thread() is self._thread:
+            return False
+        return any(not table or re.search(rf"\b{table}\b", sql, re.IGNORECASE) for table in tables)
+
+    def flush(self):
+        """ Waits until every write queued so far has been applied. """
+        if self._thread is not None and threading.current_thread() is not self._thread:
+            self._queue.join()
+
+    def close(self):
+        """ Applies everything still queued and stops the worker. """
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            writes = [write for write in batch if write is not None]
+            try:
+                with self.db.transaction():
+                    for query, params, _ in writes:
+                        if callable(query):
+                            query(*params)
+                        else:
+                            self.db._run(query, params)
+            except sqlite3.Error:
+                # one bad write must not take the rest of the batch with it; apply them one by one instead
+                for query, params, _ in writes:
+                    if not callable(query):
+                        self.db.execute(query, params)
+                        continue
+                    try:
+                        query(*params)
+                    except sqlite3.Error as e:
+                        print(f"Database error: {e}")
+            with self._lock:
+                for _, _, table in writes:
+                    self._tables[table] -= 1
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                self.db.pool.release()
+                return
+
+# Writes that change the words an account's jobs are scored by, query -> (index of the parameter naming the account,
+# the column it is: user_id or username). After each one the account's recommendations are refreshed in the background.
+RECOMMENDATION_INPUTS = {
+    "insert_account": (0, "username"),
+    "insert_profile": (0, "username"),
+    "update_profile": (8, "username"),
+    "update_profile_title": (1, "username"),
+    "update_profile_major": (1, "username"),
+    "insert_application": (0, "user_id"),
+    "insert_saved_job": (1, "user_id"),
+    "delete_saved_job": (1, "user_id"),
+}
+
+# words too common in job and profile text to say anything about a match
+STOP_WORDS = {"and", "the", "for", "with", "you", "our", "are", "will", "from", "this", "that", "job"}
+
+def text_terms(*texts):
+    """ The set of distinct lower case words of at least three characters in texts, without STOP_WORDS. """
+    return {word for text in texts if text for word in re.findall(r"[a-z0-9]+", str(text).lower())
+            if len(word) > 2 and word not in STOP_WORDS}
+
+# users x jobs scores held in memory at once while scoring; users are scored in chunks that fit
+SCORE_CHUNK_CELLS = 1 << 20
+
+def score_jobs(users, jobs, friends=None, excluded=(), top_k=10, friend_weight=0.5):
+    """
+        Scores every (user, job) pair and keeps each user's top_k. users and jobs are lists of (id, set of terms).
+        A score is the cosine similarity of the two term sets plus friend_weight * n / (n + 1) for n friends who
+        applied, where friends maps (user_id, job_id) to n. Pairs in excluded and pairs scoring 0 are skipped.
+        Returns {user_id: [(score, job_id), ...]} best first. Vectorized with NumPy when it is installed, a chunk of
+        users at a time, so memory grows with the number of jobs but not with users x jobs.
+    """
+    friends = friends or {}
+    excluded = set(excluded)
+    if not users or not jobs:
+        return {user_id: [] for user_id, _ in users}
+    if numpy is None:
+        top = {}
+        for user_id, user_terms in users:
+            def scored():
+                for job_id, job_terms in jobs:
+                    if (user_id, job_id) in excluded:
+                        continue
+                    score = len(user_terms & job_terms) / math.sqrt(len(user_terms) * len(job_terms)) if user_terms and job_terms else 0.0
+                    applied = friends.get((user_id, job_id), 0)
+                    score += friend_weight * applied / (applied + 1)
+                    if score > 0:
+                        yield score, job_id
+            top[user_id] = heapq.nsmallest(top_k, scored(), key=lambda pair: (-pair[0], pair[1]))
+        return top
+
+    # the columns of the jobs containing each term, so a user's shared word counts are a sum over their own terms
+    postings = {}
+    for column, (_, terms) in enumerate(jobs):
+        for term in terms:
+            postings.setdefault(term, []).append(column)
+    postings = {term: numpy.array(columns) for term, columns in postings.items()}
+    job_sizes = numpy.array([len(terms) for _, terms in jobs], dtype=float)
+    job_columns = {job_id: column for column, (job_id, _) in enumerate(jobs)}
+    adjust = {}     # user_id -> [(column, friends who applied or None for excluded)]
+    for (user_id, job_id), applied in friends.items():
+        if job_id in job_columns:
+            adjust.setdefault(user_id, []).append((job_columns[job_id], applied))
+    for user_id, job_id in excluded:
+        if job_id in job_columns:
+            adjust.setdefault(user_id, []).append((job_columns[job_id], None))
+
+    top = {}
+    chunk = max(1, SCORE_CHUNK_CELLS // len(jobs))
+    for start in range(0, len(users), chunk):
+        rows = users[start:start + chunk]
+        shared = numpy.zeros((len(rows), len(jobs)))
+        for row, (_, terms) in enumerate(rows):
+            for term in terms:
+                if term in postings:
+                    shared[row, postings[term]] += 1.0
+        norms = numpy.sqrt(numpy.outer([float(len(terms)) for _, terms in rows], job_sizes))
+        scores = numpy.divide(shared, norms, out=numpy.zeros(norms.shape), where=norms > 0)
+        for row, (user_id, _) in enumerate(rows):
+            # exclusions last, so an excluded pair stays out whatever its friends did
+            for column, applied in sorted(adjust.get(user_id, ()), key=lambda pair: pair[1] is None):
+                if applied is None:
+                    scores[row, column] = 0.0
+                else:
+                    scores[row, column] += friend_weight * applied / (applied + 1)
+        # stable, so equal scores keep job order
+        best = numpy.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+        for row, (user_id, _) in enumerate(rows):
+            top[user_id] = [(float(scores[row, column]), jobs[column][0]) for column in best[row] if scores[row, column] > 0]
+    return top
+
+class JobRecommender:
+    """
+        Keeps the top_k best jobs of every account in job_recommendations, so showing recommendations is a single
+        indexed read. A user is described by the words of their major and profile title and the titles and skills of
+        jobs they applied for or saved; jobs the user's friends applied for score higher. refresh() scores users
+        against every job in one batch and stores each user's words in recommendation_terms. A posted job is scored
+        only against the users sharing a word with it, and a deleted job only refreshes the users who had it in their list.
+        A write in RECOMMENDATION_INPUTS refreshes its account through the write-behind queue.
+    """
+    def __init__(self, db, top_k=10):
+        self.db = db
+        self.top_k = top_k
+
+    def _users(self, ids):
+        """ [(user_id, terms)] and the (user_id, job_id) pairs that can't be recommended: applied for or posted. """
+        terms = {row.user_id: text_terms(row.major, row.title, row.profile_major)
+                 for row in self.db.fetchall("recommendation_profiles", {"ids": ids})}
+        excluded = set()
+        for row in self.db.fetchall("recommendation_history", {"ids": ids}):
+            if row.user_id in terms:
+                terms[row.user_id] |= text_terms(row.job_title, row.skill_name)
+                if row.applied:
+                    excluded.add((row.user_id, row.job_id))
+        return list(terms.items()), excluded
+
+    def _friends(self, ids):
+        return {(row.user_id, row.job_id): row.friends for row in self.db.fetchall("recommendation_friend_applications", {"ids": ids})}
+
+    def _store(self, top):
+        self.db._run("insert_recommendation", [(user_id, job_id, score) for user_id, scored in top.items() for score, job_id in scored], many=True)
+
+    def refresh(self, user_ids=None):
+        """
+            Recomputes the recommendations and words of user_ids, or of every account, in one transaction. Only the
+            history and friends of user_ids are read.
+        """
+        ids = None if user_ids is None else json.dumps(list(user_ids))
+        users, excluded = self._users(ids)
+        jobs = self.db.fetchall("recommendation_jobs")
+        posted = {}
+        for job in jobs:
+            posted.setdefault(job.posted_by, []).append(job.job_id)
+        excluded |= {(user_id, job_id) for user_id, _ in users for job_id in posted.get(user_id, ())}
+        top = score_jobs(users, [(job.job_id, text_terms(job.job_title, job.job_description, job.skill_name)) for job in jobs],
+                         self._friends(ids), excluded, self.top_k)
+        with self.db.transaction():
+            self.db._run("clear_recommendations", {"ids": ids})
+            self.db._run("clear_recommendation_terms", {"ids": ids})
+            self._store(top)
+            self.db._run("insert_recommendation_user", [(user_id, len(terms)) for user_id, terms in users], many=True)
+            self.db._run("insert_recommendation_term", [(term, user_id) for user_id, terms in users for term in terms], many=True)
+
+    def job_posted(self, job_id):
+        """
+            Offers a new job to the accounts it ranks among the top_k for, scored like score_jobs() (no friend has
+            applied for a new job yet). Only the accounts sharing a word with the job are read, through the word index,
+            and only the lists it enters change. Runs in the caller's transaction.
+        """
+        job = self.db.fetch("job_by_id", (job_id,))
+        terms = text_terms(job.job_title, job.job_description, job.skill_name) if job else set()
+        if not terms:
+            return
+        offered = []
+        for row in self.db.fetchall("recommendation_candidates", (self.top_k - 1, json.dumps(sorted(terms)))):
+            score = row.shared / math.sqrt(row.terms * len(terms))
+            # a tie goes to the older job, as in score_jobs()
+            if row.user_id != job.posted_by and (row.cutoff is None or score > row.cutoff):
+                offered.append((row.user_id, job.job_id, score))
+        if offered:
+            self.db._run("insert_recommendation", offered, many=True)
+            self.db._run("trim_recommendations", [(user_id, user_id, self.top_k) for user_id, _, _ in offered], many=True)
+
+    def changed(self, query, params):
+        """ Queues a refresh of the account a write in RECOMMENDATION_INPUTS was about. """
+        position, column = RECOMMENDATION_INPUTS[query]
+        user_id = params[position]
+        if column == "username":
+            account = self.db.fetch("account_by_username", (user_id,))
+            if account is None:
+                return
+            user_id = account.user_id
+        self.db.defer(self.refresh, ((user_id,),))
+
+    def affected_by(self, job_ids):
+        """ The accounts that currently have any of job_ids among their recommendations. """
+        return [row.user_id for row in self.db.fetchall("recommendation_users_of_jobs", (json.dumps(list(job_ids)),))]
+
 class DatabaseManager:
-    def __init__(self, data_file):
-        self.conn = sqlite3.connect(data_file)
-        self.cursor = self.conn.cursor()
+    # profile pragmas that only matter to (and can only be set by) a connection that writes
+    WRITER_PRAGMAS = ("journal_mode", "synchronous")
+
+    def __init__(self, data_file, pool_size=5, idle_timeout=300.0, autocommit=True, profile="balanced", statement_cache_size=128,
+                 instrument=False, slow_query_ms=100.0, slow_query_log=None, read_only_readers=True, shards=0,
+                 write_behind_size=1000, recommendations=10, result_cache_size=256, result_cache_ttl=30.0):
+        assert profile in PERFORMANCE_PROFILES, f"Unknown performance profile '{profile}'"
+        assert 0 <= shards <= MAX_SHARDS, f"At most {MAX_SHARDS} shards are supported"
+        self.data_file = data_file
+        # a backend passed in is shared with its owner; one opened here is closed with this manager
+        self._owns_backend = not isinstance(data_file, StorageBackend)
+        self.backend = open_backend(data_file)
+        assert not shards or isinstance(self.backend, FileBackend), "Sharding needs a file backend"
+        self.shards = shards
+        self.profile = profile
+        # under WAL a transaction spanning several attached files is atomic per file only; a rollback journal gives
+        # SQLite's atomic multi-file commit, so sharded databases use one whatever the profile says
+        self.pragmas = dict(PERFORMANCE_PROFILES[profile], journal_mode="DELETE") if shards else PERFORMANCE_PROFILES[profile]
+        self.statement_cache = StatementCache(statement_cache_size)
+        self.query_stats = QueryStats(slow_query_ms, slow_query_log) if instrument else None
+        # with autocommit off, writes are only made durable by an explicit commit()
+        self.autocommit = autocommit
+        self._txn = threading.local()
+        self.write_behind = WriteBehindQueue(self, write_behind_size)
+        self.recommender = JobRecommender(self, recommendations)
+        # hot job reads are answered from memory; a size of 0 turns the cache off
+        self.result_cache = ResultCache(result_cache_size, result_cache_ttl) if result_cache_size else None
+        # commits of writes made through this manager, whose cached results were already dropped table by table
+        self._own_commits = 0
+        self._own_commits_lock = threading.Lock()
+        self._job_search_index = False
+        # set once the sharded tables' views exist on some connection, and so can be installed on all of them
+        self._shards_ready = False
+        self.pool = ConnectionPool(
+            lambda: self.backend.connect(statement_cache_size),
+            size=pool_size, idle_timeout=idle_timeout, on_connect=self._configure_connection)
+        # pure reads go to read-only connections, which run alongside the writer under WAL
+        self.readers = None
+        if read_only_readers and self.backend.supports_readers:
+            self.readers = ConnectionPool(
+                lambda: self.backend.connect_reader(statement_cache_size),
+                size=pool_size, idle_timeout=idle_timeout, on_connect=self._configure_reader)
+
+    @property
+    def conn(self):
+        """ The calling thread's connection from the pool. """
+        conn = self.pool.acquire()
+        if self._shards_ready and not conn.shards_installed:
+            self._install_shards(conn)
+        return conn
+
+    def _configure_connection(self, conn):
+        """ Per-connection settings, applied to every connection the pool opens. """
+        conn.row_factory = record_factory
+        conn.execute("PRAGMA foreign_keys=ON;")
+        for pragma, value in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {pragma}={value};")
+            except sqlite3.OperationalError:
+                # the journal mode can't change while another connection has the file open; keep the current one
+                pass
+        if self.shards:
+            conn.create_function("shard_of", 1, lambda user_id: (user_id or 0) % self.shards, deterministic=True)
+            self._attach_shards(conn)
+            for schema in ["main"] + [f"shard_{shard}" for shard in range(self.shards)]:
+                self._require_rollback_journal(conn, schema)
+            self._install_shards(conn)
+
+    def _configure_reader(self, conn):
+        conn.row_factory = record_factory
+        for pragma, value in self.pragmas.items():
+            if pragma not in self.WRITER_PRAGMAS:
+                conn.execute(f"PRAGMA {pragma}={value};")
+        if self.shards:
+            self._attach_shards(conn, readonly=True)
+            self._install_shards(conn, writer=False)
+        conn.execute("PRAGMA query_only=ON;")
+
+    @staticmethod
+    def _require_rollback_journal(conn, schema):
+        """ A sharded commit is only atomic across files under a rollback journal, so a file left in WAL is an error. """
+        mode = conn.execute(f"PRAGMA {schema}.journal_mode;").fetchone()[0]
+        if mode.lower() == "wal":
+            raise sqlite3.OperationalError(f"Sharding needs a rollback journal, but {schema} is in WAL mode and another "
+                                           "connection to it is open; close it and reopen the database")
+
+    def _attach_shards(self, conn, readonly=False):
+        for shard in range(self.shards):
+            conn.execute(f"ATTACH DATABASE ? AS shard_{shard};", (self.backend.shard_location(shard, readonly),))
+            if readonly:
+                continue
+            for pragma in ("journal_mode", "synchronous", "cache_size", "mmap_size"):
+                try:
+                    conn.execute(f"PRAGMA shard_{shard}.{pragma}={self.pragmas[pragma]};")
+                except sqlite3.OperationalError:
+                    pass
+
+    def _install_shards(self, conn, writer=True):
+        """
+            Makes the sharded tables transparent on one connection. Each shard file holds its own copy of every table
+            in SHARDED_TABLES, named <table>_<shard>. TEMP views named after the tables shadow the (empty) main ones and
+            gather all shards, so reads need no changes. Writes with a known owner are sent to the owner's shard table
+            by _run. For the rest, INSTEAD OF triggers on the writers route inserts to the owner's shard and apply
+            updates and deletes to the matching rows; a statement run through them locks every shard. AFTER DELETE
+            triggers replace the foreign key cascades that can't reach other files. Does nothing until the base schema
+            exists; once one connection has installed the views, every other one, even one opened before, installs
+            them when it is next handed out.
+        """
+        tables = {row.name: row.sql for row in conn.execute("SELECT name, sql FROM main.sqlite_master WHERE type='table';")}
+        if not all(table in tables for table in SHARDED_TABLES):
+            return
+        in_transaction = conn.in_transaction
+
+        for table, owner in SHARDED_TABLES.items():
+            columns = [row.name for row in conn.execute(f"PRAGMA main.table_info({table});")]
+            shard_tables = [f"shard_{shard}.{table}_{shard}" for shard in range(self.shards)]
+            if writer:
+                for shard, shard_table in enumerate(shard_tables):
+                    conn.execute(self._shard_ddl(tables[table], shard_table))
+                    for name, (indexed, indexed_columns) in INDEXES.items():
+                        if indexed == table:
+                            conn.execute(f"CREATE INDEX IF NOT EXISTS shard_{shard}.{name} ON {table}_{shard} ({', '.join(indexed_columns)});")
+            conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS {table} AS " +
+                         " UNION ALL ".join(f"SELECT * FROM {shard_table}" for shard_table in shard_tables) + ";")
+            if not writer:
+                continue
+
+            # trigger bodies can't name a schema, which is why every shard table has its own name
+            matches_old = " AND ".join(f"{column} IS OLD.{column}" for column in columns)
+            conn.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS {table}_insert INSTEAD OF INSERT ON {table} BEGIN " + "".join(
+                f"INSERT INTO {table}_{shard} ({', '.join(columns)}) SELECT {', '.join('NEW.' + column for column in columns)} "
+                f"WHERE shard_of({owner.format(row='NEW')}) = {shard}; " for shard in range(self.shards)) + "END;")
+            conn.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS {table}_update INSTEAD OF UPDATE ON {table} BEGIN " + "".join(
+                f"UPDATE {table}_{shard} SET {', '.join(f'{column} = NEW.{column}' for column in columns)} WHERE {matches_old}; "
+                for shard in range(self.shards)) + "END;")
+            conn.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS {table}_delete INSTEAD OF DELETE ON {table} BEGIN " + "".join(
+                f"DELETE FROM {table}_{shard} WHERE {matches_old}; " for shard in range(self.shards)) + "END;")
+
+            for fk in conn.execute(f"PRAGMA main.foreign_key_list({table});").fetchall():
+                parent, column, parent_column, on_delete = fk[2], fk[3], fk[4], fk[6]
+                if on_delete == "CASCADE":
+                    conn.execute(f"CREATE TEMP TRIGGER IF NOT EXISTS {table}_{column}_cascade AFTER DELETE ON main.{parent} BEGIN " + "".join(
+                        f"DELETE FROM {table}_{shard} WHERE {column} = OLD.{parent_column}; " for shard in range(self.shards)) + "END;")
+
+            # rows written before sharding was turned on move to their shards
+            if conn.execute(f"SELECT EXISTS (SELECT 1 FROM main.{table});").fetchone()[0]:
+                conn.execute(f"INSERT INTO temp.{table} SELECT * FROM main.{table};")
+                conn.execute(f"DELETE FROM main.{table};")
+        if writer:
+            for shard in range(self.shards):
+                conn.execute(DELETED_JOB_TRIGGER.format(temp="TEMP ", name=f"jobs_notify_applicants_{shard}", jobs="main.jobs",
+                                                        applications=f"job_applications_{shard}"))
+            # a connection catching up inside its transaction commits with it
+            if not in_transaction:
+                conn.commit()
+        conn.shards_installed = True
+        self._shards_ready = True
+
+    @staticmethod
+    def _shard_ddl(sql, shard_table):
+        """ A main table's CREATE TABLE statement rewritten for a shard: foreign keys can't point into another file. """
+        sql = re.sub(r"^\s*CREATE TABLE\s+(IF NOT EXISTS\s+)?\w+", f"CREATE TABLE IF NOT EXISTS {shard_table}", sql)
+        return re.sub(r",\s*FOREIGN KEY\s*\([^)]*\)\s*REFERENCES\s+\w+\s*\([^)]*\)(\s+ON DELETE \w+)?", "", sql)
+
+    _SHARD_KEY_INSERT = re.compile(r"^\s*INSERT\s+INTO\s+\w+\s*\(([^)]*)\)\s*VALUES\s*\(([^)]*)\)\s*;?\s*$", re.IGNORECASE)
+    _SHARD_KEY_WHERE = re.compile(r"\bWHERE\b(.*)$", re.IGNORECASE | re.DOTALL)
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _shard_key_position(sql):
+        """
+            (table, owner column, index of the owner's parameter) for a write to one sharded table whose owner is a
+            plain parameter: an INSERT ... VALUES, or an UPDATE or DELETE with an `owner = ?` condition that every
+            matched row must meet. None for anything else.
+        """
+        target = WriteBehindQueue.WRITE_TARGET.match(sql)
+        if target is None or target.group(1) not in SHARD_KEYS or re.search(r"\?\d|[:@$]\w", sql):
+            return None
+        table = target.group(1)
+        column = SHARD_KEYS[table]
+        insert = DatabaseManager._SHARD_KEY_INSERT.match(sql)
+        if insert:
+            columns = [name.strip() for name in insert.group(1).split(",")]
+            values = [value.strip() for value in insert.group(2).split(",")]
+            if column not in columns or len(columns) != len(values) or values[columns.index(column)] != "?":
+                return None
+            position = columns.index(column)
+            return table, column, sql[:insert.start(2)].count("?") + values[:position].count("?")
+        where = DatabaseManager._SHARD_KEY_WHERE.search(sql)
+        if sql.lstrip()[:6].upper() == "INSERT" or where is None or re.search(r"\b(OR|NOT)\b", where.group(1), re.IGNORECASE):
+            return None
+        condition = re.search(rf"(?<![\w.]){column}\s*=\s*\?", where.group(1))
+        if condition is None:
+            return None
+        return table, column, sql[:where.start(1) + condition.start()].count("?")
+
+    def _shard_statement(self, conn, sql, params, many):
+        """
+            A write to a sharded table rewritten to name the owner's shard table, e.g. INSERT INTO shard_1.messages_1,
+            so it locks that shard's file only. A batch is rewritten when all its rows belong to one shard
+            (execute_many groups them). Writes whose owner isn't a plain parameter, like INSERT ... SELECT, are
+            returned unchanged: they go through the view triggers, which write, and lock, every shard.
+        """
+        key = self._shard_key_position(sql)
+        if key is None:
+            return sql
+        table, column, position = key
+        shards = {self._shard_of(conn, column, row[position]) for row in (params if many else [params])}
+        if len(shards) != 1:
+            return sql
+        shard = shards.pop()
+        target = WriteBehindQueue.WRITE_TARGET.match(sql)
+        return f"{sql[:target.start(1)]}shard_{shard}.{table}_{shard}{sql[target.end(1):]}"
+
+    def _shard_of(self, conn, column, owner):
+        """ The shard holding the rows of owner, a user_id or, for a username column, a username. """
+        if column == "username":
+            account = conn.execute("SELECT user_id FROM main.accounts WHERE username = ?;", (owner,)).fetchone()
+            owner = account.user_id if account else None
+        return (owner or 0) % self.shards
+
+    def _shard_batches(self, sql, seq_of_params):
+        """ seq_of_params split into one batch per shard, so each batch of a sharded write goes to a single shard. """
+        key = self.shards and self._shard_key_position(sql)
+        if not key:
+            return [seq_of_params]
+        batches = {}
+        for params in seq_of_params:
+            batches.setdefault(self._shard_of(self.conn, key[1], params[key[2]]), []).append(params)
+        return list(batches.values())
+
+    def _reader_for(self, sql):
+        """
+            A read-only connection for a pure read, or None when it has to run on the writer: inside a transaction,
+            with autocommit off, or while the writer has uncommitted work the read must see.
+        """
+        if self.readers is None or self.in_transaction or not self.autocommit:
+            return None
+        if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            return None
+        writer = self.pool.current()
+        if writer is not None and writer.in_transaction:
+            return None
+        try:
+            reader = self.readers.acquire()
+        except sqlite3.Error:
+            # e.g. the file does not exist yet; the writer can always answer
+            return None
+        if self._shards_ready and not reader.shards_installed:
+            reader.execute("PRAGMA query_only=OFF;")
+            try:
+                self._install_shards(reader, writer=False)
+            finally:
+                reader.execute("PRAGMA query_only=ON;")
+        return reader
+
+    def diagnostics(self):
+        """ The active performance profile and the PRAGMA values the calling thread's connection actually runs with. """
+        report = {"backend": repr(self.backend), "shards": self.shards, "profile": self.profile}
+        for pragma in self.pragmas:
+            report[pragma] = self.conn.execute(f"PRAGMA {pragma};").fetchone()[0]
+        report["pool"] = self.pool.stats()
+        report["readers"] = self.readers.stats() if self.readers else None
+        report["pending_writes"] = self.pending_writes
+        report["result_cache"] = self.cache_stats()
+        return report
+
+    @property
+    def in_transaction(self):
+        """ True while the calling thread is inside a transaction() block. """
+        return getattr(self._txn, 'depth', 0) > 0
+
+    def _holds_transaction(self):
+        """
+            True while the calling thread has a transaction open, in a transaction() block or uncommitted with autocommit
+            off. It may hold the write lock, so it must not wait for the write-behind worker, which needs that lock; what
+            it reads is decided by its transaction's isolation anyway.
+        """
+        writer = self.pool.current()
+        return self.in_transaction or (writer is not None and writer.in_transaction)
+
+    @contextmanager
+    def transaction(self, immediate=False):
+        """
+            Groups every statement in the block into one atomic unit with a single commit when the block exits.
+            If the block raises, everything it wrote is rolled back. Nested blocks become savepoints.
+            An immediate transaction takes the write lock up front instead of at its first write.
+        """
+        conn = self.conn
+        depth = getattr(self._txn, 'depth', 0)
+        savepoint = f"txn_{depth}"
+        outermost = depth == 0 and not conn.in_transaction
+        if outermost:
+            # writes deferred before the block must land first; waiting for them while holding the write lock would deadlock
+            self.write_behind.flush()
+            conn.execute("BEGIN IMMEDIATE;" if immediate else "BEGIN;")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint};")
+        self._txn.depth = depth + 1
+        try:
+            yield self
+        except BaseException:
+            self._txn.depth = depth
+            if outermost:
+                conn.rollback()
+                self._invalidate_written(conn)
+                self._txn.deferred = []
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint};")
+                conn.execute(f"RELEASE {savepoint};")
+            raise
+        self._txn.depth = depth
+        if outermost:
+            conn.commit()
+            self._invalidate_written(conn, committed=True)
+            self._queue_deferred()
+        else:
+            conn.execute(f"RELEASE {savepoint};")
+
+    def _run(self, query, params, fetch=None, many=False):
+        """
+            Runs a registered query name or raw SQL on the calling thread's connection. Returns fetch(cursor) if a
+            fetch function is given, otherwise the cursor. Fetches of pure reads run on a read-only connection.
+            With instrumentation on, the call is timed and recorded.
+        """
+        sql = statement = QUERIES.get(query, query)
+        # reads and writes see every deferred write to the tables they use
+        if self.write_behind.touches(sql) and not self._holds_transaction():
+            self.write_behind.flush()
+        conn = (fetch and self._reader_for(sql)) or self.conn
+        if self.shards and not fetch:
+            statement = self._shard_statement(conn, sql, params, many)
+        self.statement_cache.record(conn, query, statement)
+        run = conn.executemany if many else conn.execute
+        if self.backend.table_locks:
+            run = self._waiting_for_table_locks(conn, run, many)
+        if self.query_stats is None:
+            cursor = run(statement, params)
+            if not fetch:
+                self._invalidate_results(sql, conn)
+            return fetch(cursor) if fetch else cursor
+
+        start = time.perf_counter()
+        cursor = run(statement, params)
+        if not fetch:
+            self._invalidate_results(sql, conn)
+        result = fetch(cursor) if fetch else cursor
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if result is cursor:
+            # a streamed query is recorded by iterate() once its rows have been read
+            return result
+        if isinstance(result, list):
+            rows = len(result)
+        elif fetch:
+            rows = int(result is not None)
+        else:
+            rows = max(cursor.rowcount, 0)
+        self._record_stats(query, sql, None if many else params, elapsed_ms, rows)
+        return result
+
+    def _record_stats(self, query, sql, params, elapsed_ms, rows):
+        key = query if query in QUERIES else QueryStats.normalize(sql)
+        self.query_stats.record(key, elapsed_ms, rows)
+        if elapsed_ms >= self.query_stats.slow_query_ms:
+            self.query_stats.log_slow(key, sql, params, elapsed_ms, self._explain(sql, params))
+
+    def _waiting_for_table_locks(self, conn, run, many):
+        """
+            Wraps a statement runner for a backend with table locks so it waits for a locked table the way a file
+            database waits for its lock: the statement is retried until the profile's busy_timeout runs out.
+            A batch runs under a savepoint, so the rows it wrote before hitting the lock are undone before the retry.
+        """
+        timeout = self.pragmas["busy_timeout"] / 1000
+
+        def attempt(sql, params):
+            if not many:
+                return run(sql, params)
+            conn.execute("SAVEPOINT table_lock_retry;")
+            try:
+                cursor = run(sql, params)
+            except sqlite3.Error:
+                conn.execute("ROLLBACK TO table_lock_retry;")
+                conn.execute("RELEASE table_lock_retry;")
+                raise
+            conn.execute("RELEASE table_lock_retry;")
+            return cursor
+
+        def run_waiting(sql, params):
+            if many:
+                params = list(params)
+            deadline, delay = time.monotonic() + timeout, 0.001
+            while True:
+                try:
+                    return attempt(sql, params)
+                except sqlite3.OperationalError as e:
+                    if not is_table_lock(e) or time.monotonic() >= deadline:
+                        raise
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        return run_waiting
+
+    def _explain(self, sql, params):
+        """ EXPLAIN QUERY PLAN steps for a statement, or an empty list for statements that have no plan. """
+        if params is None or sql.lstrip().upper().startswith(("PRAGMA", "EXPLAIN", "BEGIN", "COMMIT", "CREATE", "DROP")):
+            return []
+        try:
+            return [row.detail for row in self.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+        except sqlite3.Error:
+            return []
+
+    def statement_cache_stats(self):
+        return self.statement_cache.stats()
+
+    def query_report(self):
+        """ Summary of the instrumented statements, or None when instrumentation is off. """
+        return self.query_stats.report() if self.query_stats else None
 
     def execute(self, query, params=()):
         try:
-            self.cursor.execute(query, params)
-            self.commit()
+            self._run(query, params)
+            if query in RECOMMENDATION_INPUTS:
+                self.recommender.changed(query, params)
+            if self.autocommit:
+                self.commit()
         except sqlite3.Error as e:
+            # inside a transaction the error has to reach transaction() so the whole unit is rolled back
+            if self.in_transaction:
+                raise
+            # a failed statement must not leave its implicit transaction (and any lock it took) open
+            if self.autocommit:
+                self.conn.rollback()
+                self._invalidate_written(self.conn)
+                self._txn.deferred = []
             print(f"Database error: {e}")
             
     def commit(self):
-        self.conn.commit()
+        # a transaction() block commits once when it exits
+        if not self.in_transaction:
+            self.conn.commit()
+            self._invalidate_written(self.conn, committed=True)
+            self._queue_deferred()
         
+    def execute_many(self, query, seq_of_params):
+        """
+            Runs one statement once for every parameter tuple in seq_of_params, all in a single transaction.
+            Returns the number of rows written.
+        """
+        try:
+            with self.transaction():
+                batches = self._shard_batches(QUERIES.get(query, query), seq_of_params)
+                return sum(self._run(query, batch, many=True).rowcount for batch in batches)
+        except sqlite3.Error as e:
+            if self.in_transaction:
+                raise
+            print(f"Database error: {e}")
+            return 0
+
+    @staticmethod
+    def _fetch_one(cursor):
+        # closing the cursor finishes the statement, so a read-only connection doesn't keep its old snapshot open
+        row = cursor.fetchone()
+        cursor.close()
+        return row
+
+    def defer(self, query, params=()):
+        """
+            Queues a write for the write-behind worker instead of waiting for it. Inside a transaction the write runs
+            immediately, so it stays part of that transaction. query may also be a function, called as query(*params)
+            in the worker's transaction; one deferred inside a transaction is queued once the transaction commits, so
+            it sees what the transaction wrote, and dropped if it rolls back.
+        """
+        if callable(query):
+            if self._holds_transaction():
+                deferred = self._txn.__dict__.setdefault("deferred", [])
+                if (query, params) not in deferred:
+                    deferred.append((query, params))
+            else:
+                self.write_behind.put(query, None, params)
+        elif self.in_transaction:
+            self.execute(query, params)
+        else:
+            self.write_behind.put(query, QUERIES.get(query, query), params)
+
+    def _queue_deferred(self):
+        """ Hands the functions deferred during the calling thread's transaction, which just committed, to the worker. """
+        deferred, self._txn.deferred = getattr(self._txn, "deferred", []), []
+        for query, params in deferred:
+            self.write_behind.put(query, None, params)
+
+    def flush(self):
+        """ Waits until every deferred write has been applied. Not inside a transaction, whose lock the worker may need. """
+        assert not self._holds_transaction(), "flush() would wait for the write lock this thread's transaction holds"
+        self.write_behind.flush()
+
+    @property
+    def pending_writes(self):
+        """ Deferred writes not applied yet. """
+        return self.write_behind.depth
+
+    def iterate(self, query, params=(), batch_size=100):
+        """
+            Yields the rows of a query, reading them from the database batch_size at a time instead of loading the
+            whole result. The rows come from their own cursor, which is closed once the generator is exhausted or closed.
+        """
+        start = time.perf_counter()
+        cursor = self._run(query, params, lambda cursor: cursor)
+        # with instrumentation on, the statement is recorded with every row read and the time spent reading them
+        elapsed, count = time.perf_counter() - start, 0
+        try:
+            while True:
+                start = time.perf_counter()
+                rows = cursor.fetchmany(batch_size)
+                elapsed += time.perf_counter() - start
+                if not rows:
+                    return
+                count += len(rows)
+                yield from rows
+        finally:
+            cursor.close()
+            if self.query_stats is not None:
+                self._record_stats(query, QUERIES.get(query, query), params, elapsed * 1000, count)
+
     def fetch(self, query, params=()):
-        self.cursor.execute(query, params)
-        return self.cursor.fetchone()
+        return self._cached(query, params, self._fetch_one)
 
     def fetchall(self, query, params=()):
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall() 
+        rows = self._cached(query, params, lambda cursor: cursor.fetchall())
+        # a cached list is shared, so every caller gets its own copy
+        return list(rows) if rows is not None else rows
+
+    def _cached(self, query, params, fetch):
+        """
+            Runs a read through the result cache when it is one of CACHED_QUERIES. Inside a transaction the cache is
+            bypassed, since the block may read its own uncommitted writes. When another connection has committed
+            since the calling thread last looked (PRAGMA data_version moved) and none of this manager's connections
+            has, the commit came from outside and nothing cached can be trusted. Commits made here have already
+            dropped what they wrote table by table; were one to coincide with an outside commit, the entries still
+            expire after the cache's ttl.
+        """
+        tags = CACHED_QUERIES.get(_derived_queries.get(query, query))
+        if self.result_cache is None or tags is None or self.in_transaction:
+            return self._run(query, params, fetch)
+        # the check runs where the read would: a thread that only reads never checks out a writer connection
+        conn = self._reader_for(QUERIES.get(query, query)) or self.conn
+        if conn.in_transaction:
+            return self._run(query, params, fetch)
+        version = conn.execute("PRAGMA data_version;").fetchone()[0]
+        # counted after the version is read, so a commit racing the check is never taken for one this version includes
+        with self._own_commits_lock:
+            own_commits = self._own_commits
+        if conn.data_version not in (None, version) and conn.own_commits == own_commits:
+            self.result_cache.clear()
+        conn.data_version, conn.own_commits = version, own_commits
+
+        key = (query, fetch is self._fetch_one, tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params))
+        hit, result = self.result_cache.get(key)
+        if not hit:
+            version = self.result_cache.version(tags)
+            result = self._run(query, params, fetch)
+            self.result_cache.put(key, result, tags, version)
+        return result
+
+    def _invalidate_results(self, sql, conn):
+        """
+            Drops the cached results a write statement on conn may have changed. Until the write commits other
+            connections still read the old rows and may cache them again, so the tables are remembered on conn and
+            dropped once more by _invalidate_written when its transaction ends.
+        """
+        if self.result_cache is None:
+            return
+        target = WriteBehindQueue.WRITE_TARGET.match(sql)
+        if target is None:
+            # DDL and anything else that isn't a plain write
+            if not sql.lstrip().upper().startswith(("SELECT", "WITH", "PRAGMA", "EXPLAIN", "BEGIN", "COMMIT", "SAVEPOINT", "RELEASE", "ROLLBACK")):
+                self.result_cache.clear()
+                if conn.in_transaction:
+                    conn.written.add(None)
+            return
+        table = target.group(1).lower()
+        kind = sql.lstrip()[:6].lower()
+        tables = CASCADED_WRITES.get((kind, table), {table})
+        self.result_cache.invalidate(tables)
+        if conn.in_transaction:
+            conn.written.update(tables)
+
+    def _invalidate_written(self, conn, committed=False):
+        """
+            Drops the cached results of the tables conn's transaction wrote, now that it has committed or rolled back.
+            A commit is counted in _own_commits, which tells _cached the data_version change it causes is accounted for.
+        """
+        if self.result_cache is None or not conn.written:
+            return
+        if None in conn.written:
+            self.result_cache.clear()
+        else:
+            self.result_cache.invalidate(conn.written)
+        conn.written = set()
+        if committed:
+            with self._own_commits_lock:
+                self._own_commits += 1
+
+    def cache_stats(self):
+        """ Hit rate and size of the result cache, or None when it is off. """
+        return self.result_cache.stats() if self.result_cache else None
+
+    def has_job_search_index(self):
+        """ True once the full-text job index exists (it doesn't on SQLite builds without FTS5). """
+        if not self._job_search_index:
+            self._job_search_index = self.fetch("SELECT 1 FROM sqlite_master WHERE type='table' AND name='jobs_fts';") is not None
+        return self._job_search_index
+
+    @staticmethod
+    def job_search_query(text):
+        """
+            Turns what a user typed into an FTS5 query: "quoted words" must appear as a phrase, every other word
+            matches as a prefix, and all of them have to match. Returns None if there is nothing to search for.
+        """
+        terms = []
+        for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+            tokens = re.findall(r"\w+", phrase or word)
+            if not tokens:
+                continue
+            if phrase:
+                terms.append('"' + " ".join(tokens) + '"')
+            else:
+                terms.extend(f'"{token}"*' for token in tokens)
+        return " ".join(terms) or None
+
+    @staticmethod
+    def job_listing_query(query, filters, page=None):
+        """
+            The SQL of a job_listings query narrowed by the JOB_FILTERS whose value in filters isn't None. With page
+            set to "first" it returns the first :limit jobs; "after" and "before" return up to :limit jobs past the
+            job :key in that direction, in the listing's order ("before" returns them in reverse).
+        """
+        conditions = [JOB_FILTERS[name] for name, value in filters.items() if value is not None]
+        if not conditions and page is None:
+            return query
+        sql = QUERIES[query]
+        if conditions:
+            sql = sql.replace("ORDER BY", f"AND {' AND '.join(conditions)} ORDER BY", 1)
+        if page is not None:
+            terms, key = JOB_LISTING_KEYS[query]
+            op, direction = ("<", " DESC") if page == "before" else (">", "")
+            condition = f"AND ({', '.join(terms)}) {op} ({', '.join(key)}) " if page != "first" else ""
+            sql = sql[:sql.rindex("ORDER BY")] + f"{condition}ORDER BY {', '.join(term + direction for term in terms)} LIMIT :limit;"
+        _derived_queries[sql] = query
+        return sql
+
+    def _job_search(self, user_id, text, applied, filters):
+        """ The job_listings query answering a search and its parameters, or None when text has nothing to search for. """
+        params = dict(filters, user_id=user_id, applied=applied)
+        if not text.strip():
+            return "job_listings", params
+        if not self.has_job_search_index():
+            return "job_listings_by_title", dict(params, title="%"+text+"%")
+        query = self.job_search_query(text)
+        return ("job_listings_matching", dict(params, query=query)) if query else None
+
+    def search_jobs(self, user_id, text="", applied=None, min_salary=None, max_salary=None, location=None, employer=None):
+        """
+            Full-text job search over title, description, skill, employer and location, best BM25 match first
+            (title matches weigh most); an empty search lists every job. Each JobListing says whether user_id has
+            applied for and saved the job. applied=True or False keeps only the jobs in that state. A salary range,
+            location and employer narrow the search further. One query.
+        """
+        filters = {"min_salary": min_salary, "max_salary": max_salary, "location": location, "employer": employer}
+        search = self._job_search(user_id, text, applied, filters)
+        if search is None:
+            return []
+        query, params = search
+        return self.fetchall(self.job_listing_query(query, filters), params)
+
+    def search_jobs_page(self, user_id, text="", applied=None, after=None, before=None, limit=10, **filters):
+        """
+            A page of up to limit search_jobs() results, found by keyset like job_titles_page(): the jobs after job_id
+            `after` in the search's order (the first page by default) or, going back, the ones before job_id `before`.
+            Returns the page and whether there are more jobs beyond it in that direction.
+        """
+        filters = {name: filters.get(name) for name in JOB_FILTERS}
+        search = self._job_search(user_id, text, applied, filters)
+        if search is None:
+            return [], False
+        query, params = search
+        page = "before" if before is not None else "first" if after is None else "after"
+        rows = self.fetchall(self.job_listing_query(query, filters, page),
+                             dict(params, key=before if before is not None else after, limit=limit + 1))
+        return (rows[:limit][::-1] if before is not None else rows[:limit]), len(rows) > limit
+
+    def job_facets(self):
+        """
+            Job counts per location, employer and salary band (the band's lower bound), most jobs first, as
+            {facet: {value: jobs}}. Triggers keep the counts current, so this never reads the jobs table.
+        """
+        facets = {"location": {}, "employer": {}, "salary": {}}
+        for row in self.fetchall("job_facet_counts"):
+            facets[row.facet][row.value] = row.jobs
+        return facets
+
+    def job_titles_page(self, after=None, before=None, limit=10):
+        """
+            A page of up to limit job titles in posting order, found by keyset rather than OFFSET so every page
+            costs the same: the jobs after job_id `after` (the first page by default) or, going back, the ones before
+            job_id `before`. Returns the page and whether there are more jobs beyond it in that direction.
+        """
+        return self._keyset_page("job_titles", (), after, before, limit)
+
+    def account_directory_page(self, after=None, before=None, limit=10):
+        """
+            A page of up to limit accounts in creation order: the ones after user_id `after` (the first page by
+            default) or before user_id `before`, and whether there are more in that direction, as job_titles_page.
+        """
+        return self._keyset_page("account_directory", (), after, before, limit)
+
+    def _keyset_page(self, query, params, after, before, limit):
+        """ A page of the registered <query>_after / <query>_before pair, which take params, a key (an id) and a limit. """
+        if before is not None:
+            rows = self.fetchall(f"{query}_before", (*params, before, limit + 1))
+            return rows[:limit][::-1], len(rows) > limit
+        rows = self.fetchall(f"{query}_after", (*params, 0 if after is None else after, limit + 1))
+        return rows[:limit], len(rows) > limit
+
+    def recommend_jobs(self, user_id, limit=None):
+        """
+            user_id's best recommended jobs from the precomputed list, best first, leaving out ones applied for since.
+            Nothing is scored here: the list is refreshed in the background after the account's profile, applications
+            or saved jobs change, so it can trail them by the write-behind queue.
+        """
+        return self.fetchall("recommended_jobs", (user_id, self.recommender.top_k if limit is None else limit))
 
     def find_jobs_by_title(self, job_title):
-        return self.fetchall("SELECT * FROM jobs where job_title LIKE ?;", ("%"+job_title+"%",))
+        return self.search_jobs(None, job_title)
     
+    def _job_listing(self, query, user_id, order_by, descending, limit, offset):
+        assert order_by in Job._fields, f"Cannot order jobs by '{order_by}'"
+        if order_by != "job_id" or descending:
+            query = QUERIES[query].replace("ORDER BY jobs.job_id", f"ORDER BY jobs.{order_by}{' DESC' if descending else ''}, jobs.job_id")
+        return self.fetchall(query, (user_id, -1 if limit is None else limit, offset))
+
+    def jobs_applied_by(self, user_id, order_by="job_id", descending=False, limit=None, offset=0):
+        """ The jobs user_id applied for, ordered by any Job field, in one statement. """
+        return self._job_listing("jobs_applied_by", user_id, order_by, descending, limit, offset)
+
+    def jobs_not_applied_by(self, user_id, order_by="job_id", descending=False, limit=None, offset=0):
+        """ The jobs user_id has not applied for, as a NOT EXISTS anti-join, a page at a time. """
+        return self._job_listing("jobs_not_applied_by", user_id, order_by, descending, limit, offset)
+
+    def jobs_not_applied_page(self, user_id, after=None, before=None, limit=10):
+        """ A page of the jobs user_id has not applied for, found by keyset like job_titles_page(). """
+        return self._keyset_page("jobs_not_applied", (user_id,), after, before, limit)
+
+    def jobs_saved_by(self, user_id, order_by="job_id", descending=False, limit=None, offset=0):
+        """ The jobs user_id saved, ordered by any Job field, in one statement. """
+        return self._job_listing("jobs_saved_by", user_id, order_by, descending, limit, offset)
+
+    def jobs_posted_by(self, user_id, order_by="job_id", descending=False, limit=None, offset=0):
+        """ The jobs user_id posted, ordered by any Job field, in one statement. """
+        return self._job_listing("jobs_posted_by", user_id, order_by, descending, limit, offset)
+
     def find_jobs_by_id(self, job_id):
-        return self.fetchall("SELECT * FROM jobs where job_id=?;", (job_id,))
+        return self.fetchall("job_by_id", (job_id,))
     
     def close(self):
-        self.conn.close()
+        self.write_behind.close()
+        if self.readers:
+            self.readers.close()
+        self.pool.close()
+        if self._owns_backend:
+            self.backend.close()
     
     def post_job(self, skill_name, long_description, job_title, job_description, employer, location, salary, user_id):
-        user = self.fetch('SELECT * FROM accounts WHERE user_id=?;', (user_id,))
+        user = self.fetch("account_by_id", (user_id,))
         assert user is not None, "Could not find user"
 
-        self.execute('''
-            INSERT INTO jobs (skill_name, long_description, job_title, job_description, employer, location, salary, posted_by, user_first_name, user_last_name)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);''',
-            (skill_name, long_description, job_title, job_description, employer, location, salary, user[0], user[3], user[4]))
+        # the job and its place in the recommendation lists are written together
+        try:
+            with self.transaction():
+                job_id = self._run("insert_job",
+                    (skill_name, long_description, job_title, job_description, employer, location, salary, user.user_id, user.first_name, user.last_name)).lastrowid
+                self.recommender.job_posted(job_id)
+        except sqlite3.Error as e:
+            if self.in_transaction:
+                raise
+            print(f"Database error: {e}")
+            return False
         return True
     
     def user_apply_job(self, user_id, job_id, gr_date, s_date, quals):
-        user = self.fetch('SELECT * FROM accounts WHERE user_id=?;', (user_id,))
+        user = self.fetch("account_by_id", (user_id,))
         assert user is not None, "Could not find user"
-        job = self.fetch('SELECT * FROM jobs WHERE job_id=?;', (job_id,))
+        job = self.fetch("job_by_id", (job_id,))
         assert job is not None, "Could not find job"
 
-        self.execute('''
-            INSERT INTO job_applications (applicant, job_id, gr_date, s_date, quals)
-            VALUES (?, ?, ?, ?, ?);
-            ''',
+        self.execute("insert_application",
             (user_id, job_id, gr_date, s_date, quals))
         return True
     
+    def schema_version(self):
+        return self.fetch("PRAGMA user_version;")[0]
+
+    def migrate(self, migrations=SCHEMA_MIGRATIONS):
+        """
+            Applies every migration newer than the database's schema version, each in its own transaction together with
+            the version bump. Returns the versions applied; an up to date database only costs one PRAGMA read.
+        """
+        applied = []
+        for version, steps in enumerate(migrations, start=1):
+            if version <= self.schema_version():
+                continue
+            with self.transaction(immediate=True):
+                # another process may have applied it while this one waited for the write lock
+                if version <= self.schema_version():
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(self)
+                    else:
+                        self.execute(step)
+                self.execute(f"PRAGMA user_version={version};")
+            applied.append(version)
+        if applied and self.shards:
+            self._install_shards(self.conn)
+        return applied
+
+    def sync_indexes(self):
+        """
+            Brings the managed indexes in line with INDEXES: creates missing ones, rebuilds ones whose columns
+            changed and drops idx_ prefixed indexes that are no longer listed. Indexes of tables that don't exist yet
+            are left to the migration that creates the table.
+        """
+        existing = {row.name for row in self.fetchall("SELECT name FROM sqlite_master WHERE type='index' AND name LIKE 'idx\\_%' ESCAPE '\\';")}
+        tables = {row.name for row in self.fetchall("SELECT name FROM main.sqlite_master WHERE type='table';")}
+        with self.transaction():
+            for name in existing:
+                columns = tuple(row.name for row in self.fetchall(f"PRAGMA index_info({name});"))
+                if name not in INDEXES or INDEXES[name][1] != columns:
+                    self.execute(f"DROP INDEX {name};")
+                    existing = existing - {name}
+            for name, (table, columns) in INDEXES.items():
+                if name not in existing and table in tables:
+                    self.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)});")
+
+    def check_query_plans(self):
+        """
+            Runs EXPLAIN QUERY PLAN on every registered query and returns {name: [plan steps]} for each one that
+            scans a whole table without being listed in FULL_SCAN_QUERIES. An empty result means every query is indexed.
+        """
+        offenders = {}
+        # with shards, scanning a sharded table's view only walks rows its shards already found by index
+        views = {f"SCAN {table}" for table in SHARDED_TABLES} if self.shards else set()
+        for name, sql in QUERIES.items():
+            if name in FULL_SCAN_QUERIES or (name == "job_listings_matching" and not self.has_job_search_index()):
+                continue
+            params = {param: None for param in re.findall(r":(\w+)", sql)} or (None,) * sql.count('?')
+            plan = self.fetchall(f"EXPLAIN QUERY PLAN {sql}", params)
+            scans = [row.detail for row in plan
+                     if row.detail.startswith("SCAN ") and row.detail != "SCAN CONSTANT ROW" and row.detail not in views
+                     and "VIRTUAL TABLE INDEX" not in row.detail]
+            if scans:
+                offenders[name] = scans
+        return offenders
+
+    def notify_other_users(self, user_id, notification):
+        """ Leaves a one time notification for every account except user_id. The write is deferred. """
+        self.defer("notify_other_accounts", (notification, user_id))
+
+    def new_jobs_for(self, user_id):
+        """
+            The jobs posted by others since user_id last looked, oldest first, and moves the account's watermark past
+            them. Posting a job writes nothing per account; the cost is one range read of jobs when the user checks.
+            Only a check that found jobs writes, and only forward: two sessions of one account both reading the same
+            jobs leave the watermark at the newest of them.
+        """
+        jobs = self.fetchall("new_jobs_for", (user_id, user_id))
+        if jobs:
+            self.execute("mark_jobs_seen", (jobs[-1].job_id, user_id, jobs[-1].job_id))
+        return jobs
+
+    def delete_jobs(self, job_ids):
+        """
+            Deletes every job in job_ids with one statement. Applications and saves cascade, and a trigger tells each
+            applicant their job was deleted. Returns the number of jobs deleted.
+        """
+        job_ids = list(job_ids)
+        try:
+            with self.transaction():
+                affected = self.recommender.affected_by(job_ids)
+                deleted = self._run("delete_jobs", (json.dumps(job_ids),)).rowcount
+                # the deleted jobs' places in those users' lists go to the next best jobs
+                if affected:
+                    self.recommender.refresh(affected)
+                return deleted
+        except sqlite3.Error as e:
+            if self.in_transaction:
+                raise
+            print(f"Database error: {e}")
+            return 0
+
     def user_is_applicant(self, user_id, job_id):
-        return self.fetchall("SELECT COUNT(*) FROM   job_applications WHERE (applicant=? AND job_id=?)",(user_id, job_id))[0][0] > 0
+        return self.fetch("application_count", (user_id, job_id))[0] > 0
     
     def check_friendship_status(self, user1_id, user2_id):
-                query = """
-                SELECT COUNT(1) FROM friendship 
-                WHERE (user_one = (SELECT username FROM accounts WHERE user_id = ?) 
-                AND user_two = (SELECT username FROM accounts WHERE user_id = ?)) 
-                OR (user_one = (SELECT username FROM accounts WHERE user_id = ?) 
-                AND user_two = (SELECT username FROM accounts WHERE user_id = ?))
-                """
                 try:
                     # Execute the SQL query
-                    result = self.fetch(query, (user1_id, user2_id, user2_id, user1_id))
+                    result = self.fetch("friendship_count_by_id", (user1_id, user2_id, user2_id, user1_id))
                     # Check if the friendship exists
                     return result[0] > 0  # True if count is more than 0, otherwise False
                 except Exception as e:
@@ -86,9 +2336,112 @@ class DatabaseManager:
                     print(f"An error occurred: {e}")
                     return False
 
+class AsyncDatabaseManager:
+    """
+        asyncio sibling of DatabaseManager. Every call is queued to one dedicated I/O thread that owns a DatabaseManager,
+        so an event loop never blocks on SQLite. Queries take the same registered names or SQL and behave exactly like
+        their DatabaseManager counterparts.
+    """
+    def __init__(self, data_file, **options):
+        self._db = DatabaseManager(data_file, **options)
+        self._queue = queue.Queue()
+        self._lock = asyncio.Lock()
+        self._txn_owner = None
+        self._thread = threading.Thread(target=self._worker, name="db-io", daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            fn, args, future, loop = item
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                loop.call_soon_threadsafe(self._resolve, future, None, e)
+            else:
+                loop.call_soon_threadsafe(self._resolve, future, result, None)
+        self._db.close()
+
+    @staticmethod
+    def _resolve(future, result, error):
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def _submit(self, fn, *args):
+        """ Runs fn(*args) on the I/O thread and waits for its result. """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((fn, args, future, loop))
+        return await future
+
+    async def _call(self, fn, *args):
+        # statements from the task that owns the open transaction run inside it; everyone else waits for it to finish
+        if self._txn_owner is not None and self._txn_owner is asyncio.current_task():
+            return await self._submit(fn, *args)
+        async with self._lock:
+            return await self._submit(fn, *args)
+
+    async def fetch(self, query, params=()):
+        return await self._call(self._db.fetch, query, params)
+
+    async def fetchall(self, query, params=()):
+        return await self._call(self._db.fetchall, query, params)
+
+    async def execute(self, query, params=()):
+        return await self._call(self._db.execute, query, params)
+
+    async def execute_many(self, query, seq_of_params):
+        return await self._call(self._db.execute_many, query, list(seq_of_params))
+
+    async def call(self, method, *args):
+        """ Runs any other DatabaseManager method, e.g. await db.call("post_job", ...), on the I/O thread. """
+        return await self._call(getattr(self._db, method), *args)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """
+            Same semantics as DatabaseManager.transaction(). Other tasks' statements wait until the block exits,
+            so statements inside it must be awaited from the task that opened it.
+        """
+        if self._txn_owner is not None and self._txn_owner is asyncio.current_task():
+            async with self._transaction_block():
+                yield self
+            return
+
+        async with self._lock:
+            self._txn_owner = asyncio.current_task()
+            try:
+                async with self._transaction_block():
+                    yield self
+            finally:
+                self._txn_owner = None
+
+    @asynccontextmanager
+    async def _transaction_block(self):
+        block = self._db.transaction()
+        await self._submit(block.__enter__)
+        try:
+            yield
+        except BaseException as e:
+            await self._submit(block.__exit__, type(e), e, e.__traceback__)
+            raise
+        await self._submit(block.__exit__, None, None, None)
+
+    async def close(self):
+        """ Stops the I/O thread once every queued call has run, then closes its connections. """
+        self._queue.put(None)
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join)
+
 class InCollegeAppManager:
-    def __init__(self, data_file="users.db", DEBUG=False):
-        self.db_manager = DatabaseManager(data_file)
+    def __init__(self, data_file="users.db", DEBUG=False, profile="balanced", instrument=False, shards=0, page_size=10):
+        self.db_manager = DatabaseManager(data_file, profile=profile, instrument=instrument, shards=shards)
+        self.page_size = page_size
         self.setup_database()
         self._PasswordPolicy = PasswordPolicy.from_names(
             length=8, uppercase=1, numbers=1, special=1,
@@ -160,170 +2513,39 @@ class InCollegeAppManager:
         self.db_manager.commit()
         
     def setup_database(self):
-        self.db_manager.execute("PRAGMA foreign_keys=ON;")
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS accounts (
-            user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            university TEXT NOT NULL,
-            major TEXT NOT NULL,
-            plus BOOL NOT NULL,
-            last_job_application_timestamp TIMESTAMP NOT NULL
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS notifications (
-            user_id INTEGER NOT NULL,
-            notification TEXT NOT NULL
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS messages (
-            recipient INTEGER NOT NULL,
-            message TEXT NOT NULL,
-            sender INTEGER NOT NULL,
-            FOREIGN KEY (recipient) REFERENCES accounts(user_id) ON DELETE CASCADE,
-            FOREIGN KEY (sender) REFERENCES accounts(user_id) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS settings (
-            username TEXT PRIMARY KEY,
-            email_notifs BOOL NOT NULL,
-            sms_notifs BOOL NOT NULL,
-            target_ads BOOL NOT NULL,
-            language TEXT NOT NULL,
-            FOREIGN KEY (username) REFERENCES accounts(username) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS profiles (
-            username TEXT PRIMARY KEY,
-            first_name TEXT NOT NULL,
-            last_name TEXT NOT NULL,
-            title TEXT NOT NULL,
-            major TEXT NOT NULL,
-            university TEXT NOT NULL,
-            about TEXT NOT NULL,
-            pastJob1 TEXT NOT NULL,
-            pastJob2 TEXT NOT NULL,
-            pastJob3 TEXT NOT NULL,
-            education TEXT NOT NULL,
-            posted TEXT NOT NULL,
-            FOREIGN KEY (username) REFERENCES accounts(username) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS friend_requests (
-            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sender TEXT NOT NULL,
-            receiver TEXT NOT NULL,
-            FOREIGN KEY (sender) REFERENCES accounts(username) ON DELETE CASCADE,
-            FOREIGN KEY (receiver) REFERENCES accounts(username) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS friendship (
-            friendship_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_one TEXT NOT NULL,
-            user_two TEXT NOT NULL,
-            FOREIGN KEY (user_one) REFERENCES accounts(username) ON DELETE CASCADE,
-            FOREIGN KEY (user_two) REFERENCES accounts(username) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS skills (
-            skill_name TEXT PRIMARY KEY,
-            long_description TEXT UNIQUE NOT NULL
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
-            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            skill_name TEXT NOT NULL,
-            long_description TEXT UNIQUE NOT NULL,
-            job_title TEXT NOT NULL,
-            job_description TEXT NOT NULL,
-            employer TEXT NOT NULL,
-            location TEXT NOT NULL,
-            salary REAL NOT NULL,
-            posted_by INTEGER,
-            user_first_name TEXT NOT NULL,
-            user_last_name TEXT NOT NULL,
-            FOREIGN KEY (posted_by) REFERENCES accounts(user_id) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS job_applications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            applicant INTEGER NOT NULL,
-            job_id INTEGER NOT NULL,
-            gr_date TEXT NOT NULL,
-            s_date TEXT NOT NULL,
-            quals TEXT NOT NULL,
-            FOREIGN KEY (applicant) REFERENCES accounts(user_id) ON DELETE CASCADE,
-            FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS deleted_job_notifs (
-            applicantID INTEGER,
-            jobID INTEGER,
-            jobTitle TEXT NOT NULL,
-            FOREIGN KEY (applicantID) REFERENCES accounts(user_id) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS new_job_notifs (
-            notifID INTEGER PRIMARY KEY AUTOINCREMENT,
-            recipientID INTEGER,
-            message TEXT NOT NULL,
-            FOREIGN KEY (recipientID) REFERENCES accounts(user_id) ON DELETE CASCADE
-        )
-        ''')
-
-        self.db_manager.execute('''
-        CREATE TABLE IF NOT EXISTS job_save (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            applicant INTEGER NOT NULL,
-            job_id INTEGER NOT NULL,
-            saved BOOL NOT NULL,
-            FOREIGN KEY (applicant) REFERENCES accounts(user_id) ON DELETE CASCADE,
-            FOREIGN KEY (job_id) REFERENCES jobs(job_id) ON DELETE CASCADE
-        );
-        ''')
-
-        self.db_manager.commit()
-
-        if self.db_manager.fetch("SELECT COUNT(*) FROM skills")[0] == 0:
+        # populate the skills table the first time the schema is created
+        if self.db_manager.migrate() and self.db_manager.fetch("skill_count")[0] == 0:
             self.populate_skills_from_file()
 
     def populate_skills_from_file(self, skills_file='data/example_skills.txt'):
         try:
+            skills = []
             with open(os.path.join(os.getcwd(), skills_file), 'r') as f:
                 for line in f:
                     skill_name, long_description = line.strip().split('$$$')
-                    self.db_manager.execute("INSERT INTO skills (skill_name, long_description) VALUES (?, ?)", (skill_name, long_description))
+                    skills.append((skill_name, long_description))
+            self.db_manager.execute_many("insert_skill", skills)
         except Exception as e:
             print('Error while parsing skills file. Did you configure the file properly?')
             print(e)
 
+    @staticmethod
+    def _print_table(rows, headers, batch_size=100):
+        """
+            Prints an iterable of rows as numbered grid tables of up to batch_size rows, consuming it as it goes,
+            so a streamed result of any length is rendered in constant memory. Returns how many rows were printed.
+        """
+        rows = iter(rows)
+        printed = 0
+        for batch in iter(lambda: list(itertools.islice(rows, batch_size)), []):
+            print(tabulate(batch, headers=headers, tablefmt="grid", showindex=range(printed + 1, printed + len(batch) + 1)), "\n")
+            printed += len(batch)
+        return printed
+
     def _Terminate(self):
+        # close() applies every deferred write before the connections go away
+        if self.db_manager.query_stats:
+            print(self.db_manager.query_report())
         self.db_manager.close()
         print('Goodbye!')
         exit(0)
@@ -339,39 +2561,38 @@ class InCollegeAppManager:
         if not valid_password(password):
             raise Exception("Invalid password. Please ensure it meets the requirements.")
 
-        if self.db_manager.fetch('SELECT COUNT(*) FROM accounts;')[0] >= 10:
+        if self.db_manager.fetch("account_count")[0] >= 10:
             raise Exception("All permitted accounts have been created. Please come back later.")
 
-        if self.db_manager.fetch('SELECT * FROM accounts WHERE username=?;', (username,)):
+        if self.db_manager.fetch("account_by_username", (username,)):
             raise Exception("Username already exists. Please choose another one.")
 
         hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
         
-        self.db_manager.execute(
-            'INSERT INTO accounts (username, password, first_name, last_name, university, major, plus, last_job_application_timestamp) VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP);',
-            (username, hashed_password, first_name, last_name, university, major, plus))
+        # the account, its settings and its profile are created together or not at all
+        with self.db_manager.transaction():
+            self.db_manager.execute("insert_account",
+                (username, hashed_password, first_name, last_name, university, major, plus))
 
-        self.db_manager.execute(
-            'INSERT INTO settings (username, email_notifs, sms_notifs, target_ads, language) VALUES (?, ?, ?, ?, ?);',
-            (username, 1, 1, 1, "English"))
+            self.db_manager.execute("insert_settings",
+                (username, 1, 1, 1, "English"))
 
-        self.db_manager.execute('INSERT INTO profiles (username, first_name, last_name, title, major, university, about, pastJob1,\
-                                pastJob2, pastJob3, education, posted) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);',
-                                (username, first_name, last_name, "n/a", major, university, "n/a", "n/a", "n/a", "n/a", "n/a", "no"))
+            self.db_manager.execute("insert_profile",
+                                    (username, first_name, last_name, "n/a", major, university, "n/a", "n/a", "n/a", "n/a", "n/a", "no"))
 
         # Returns the account from Database
         return self.__login(username=username, password=password)
 
     def __login(self, username: str, password: str):
-        user = self.db_manager.fetch('SELECT * FROM accounts WHERE username=?;',    (username,))
+        user = self.db_manager.fetch("account_by_username", (username,))
         if user:
-            hashed_password = user[2].encode('utf-8')  # Encode back to bytes
+            hashed_password = user.password.encode('utf-8')  # Encode back to bytes
             if bcrypt.checkpw(password.encode('utf-8'), hashed_password):
                 return user
         return None
 
     def _is_person_in_database(self, first_name, last_name):
-        user = self.db_manager.fetch("SELECT * FROM accounts WHERE first_name=? AND last_name =?;", (first_name, last_name))
+        user = self.db_manager.fetch("account_by_name", (first_name, last_name))
         return bool(user)
 
     def Run(self): # Can only Serve One Client at a time :(
@@ -445,10 +2666,10 @@ class InCollegeAppManager:
                 print("Guest Controls\n-------------------------------")
                 cur = 0
                 if self._current_user != None:
-                    cur = self.db_manager.fetchall("SELECT * FROM settings WHERE username=?", (self._current_user[1], ))
-                print(f"{'InCollege Email Notifications:':>31s} {'Off' if cur and cur[0][1] == 0 else 'On'}")
-                print(f"{'InCollege SMS Notifications:':>31s} {'Off' if cur and cur[0][2] == 0 else 'On'}")
-                print(f"{'InCollege Targeted Advertising:':>31s} {'Off' if cur and cur[0][3] == 0 else 'On'}")
+                    cur = self.db_manager.fetchall("settings_by_username", (self._current_user.username, ))
+                print(f"{'InCollege Email Notifications:':>31s} {'Off' if cur and cur[0].email_notifs == 0 else 'On'}")
+                print(f"{'InCollege SMS Notifications:':>31s} {'Off' if cur and cur[0].sms_notifs == 0 else 'On'}")
+                print(f"{'InCollege Targeted Advertising:':>31s} {'Off' if cur and cur[0].target_ads == 0 else 'On'}")
                 if self._current_user == None:
                     print("\nNot signed in - cannot alter settings")
                     break
@@ -459,16 +2680,16 @@ class InCollegeAppManager:
                         option = input("Select which you would like to change: ")
 
                         if option == "1":
-                            bool = 1 if cur[0][1] == 0 else 0
-                            self.db_manager.execute("UPDATE settings SET email_notifs=? WHERE username=?", (bool, self._current_user[1]))
+                            bool = 1 if cur[0].email_notifs == 0 else 0
+                            self.db_manager.execute("update_email_notifs", (bool, self._current_user.username))
                             print("Email notifications successfully turned", "on." if bool else "off.")
                         elif option == "2":
-                            bool = 1 if cur[0][2] == 0 else 0
-                            self.db_manager.execute("UPDATE settings SET sms_notifs=? WHERE username=?", (bool, self._current_user[1]))
+                            bool = 1 if cur[0].sms_notifs == 0 else 0
+                            self.db_manager.execute("update_sms_notifs", (bool, self._current_user.username))
                             print("SMS notifications successfully turned", "on." if bool else "off.")
                         elif option == "3":
-                            bool = 1 if cur[0][3] == 0 else 0
-                            self.db_manager.execute("UPDATE settings SET target_ads=? WHERE username=?", (bool, self._current_user[1]))
+                            bool = 1 if cur[0].target_ads == 0 else 0
+                            self.db_manager.execute("update_target_ads", (bool, self._current_user.username))
                             print("Targeted Advertising successfully turned", "on." if bool else "off.")
                         elif option != "q":
                             print("Invalid choice. Please try again.")
@@ -502,8 +2723,8 @@ class InCollegeAppManager:
                     print("English\n\nNot signed in - cannot alter language settings")
                     break
                 else:
-                    cur = self.db_manager.fetchall("SELECT language FROM settings WHERE username=?", (self._current_user[1], ))
-                    print(cur[0][0])
+                    cur = self.db_manager.fetchall("language_by_username", (self._current_user.username, ))
+                    print(cur[0].language)
                     changeLanguage = input("Would you like to change languages? (y/n) ")
                     if changeLanguage != "y":
                         break
@@ -512,7 +2733,7 @@ class InCollegeAppManager:
                         choice = input("Select a language option: ")
                         if choice == "1" or choice == "2":
                             language = "Spanish" if choice == "2" else "English"
-                            self.db_manager.execute("UPDATE settings SET language=? WHERE username=?", (language, self._current_user[1]))
+                            self.db_manager.execute("update_language", (language, self._current_user.username))
                             print(f"Language successfully switched to {language}.")
                         elif choice != "q":
                             print("Invalid choice. Please try again.")
@@ -564,10 +2785,8 @@ class InCollegeAppManager:
                 print(menu_seperate) #menu
                 print("Learn A Skill\n-------------------------------")
                 # Fetch all records from the 'skills' table
-                self.db_manager.execute("SELECT * FROM skills")
-                for i, row in enumerate(self.db_manager.fetchall("SELECT * FROM skills")):
-                    skill_name, long_description = row[0], row[1]
-                    print(f"\nSkill {i+1}: {skill_name}, Description: {long_description}")
+                for i, skill in enumerate(self.db_manager.fetchall("all_skills")):
+                    print(f"\nSkill {i+1}: {skill.skill_name}, Description: {skill.long_description}")
                 print('\nq: Quit')
                 if input("\nPlease Select a Skill: ").lower() != 'q': print("\nUnder Construction")
 
@@ -579,7 +2798,7 @@ class InCollegeAppManager:
                     print()
 
                     if choice == "1":
-                        incoming_requests = self.db_manager.fetchall("SELECT sender, first_name, last_name, university, major FROM friend_requests INNER JOIN accounts ON sender = username WHERE receiver=?", (self._current_user[1], ))
+                        incoming_requests = self.db_manager.fetchall("incoming_friend_requests", (self._current_user.username, ))
                         if not incoming_requests:
                             print('You have no new friend requests.')
                             continue
@@ -587,15 +2806,11 @@ class InCollegeAppManager:
                         print(menu_seperate)
                         print("Incoming Friend Requests\n-------------------------------")
 
-                        for i in range(len(incoming_requests)):
-                            incoming_requests[i] = list(incoming_requests[i])
-                            incoming_requests[i].insert(0, i+1)
-
                         print(f"You have {len(incoming_requests)} new friend requests!")
 
                         print("\nFriend Requests:")
                         head = ["Request Num", "Username", "First Name", "Last Name", "University", "Major"]
-                        print(tabulate(incoming_requests, headers=head, tablefmt="grid"))
+                        print(tabulate(incoming_requests, headers=head, tablefmt="grid", showindex=range(1, len(incoming_requests) + 1)))
 
                         manageRequest = input("\nWould you like to manage your requests? (y/n) ")
 
@@ -610,21 +2825,21 @@ class InCollegeAppManager:
                             continue
 
                         if 0 <= requestNum < len(incoming_requests):
-                            print(f"\nFriend Request from {incoming_requests[requestNum][1]}:")
+                            print(f"\nFriend Request from {incoming_requests[requestNum].sender}:")
                             print("1. Accept\n2. Reject\nq. Quit")
                             response = input("\nSelect a response: ")
 
                             if response == "1":
-                                add_friend(self._current_user[1], incoming_requests[requestNum][1])
+                                add_friend(self._current_user.username, incoming_requests[requestNum].sender)
                             elif response == "2":
-                                self.db_manager.execute("DELETE FROM friend_requests WHERE sender=? AND receiver=?", (incoming_requests[requestNum][1], self._current_user[1]))
+                                self.db_manager.execute("delete_friend_request", (incoming_requests[requestNum].sender, self._current_user.username))
                                 print("\nFriend request successfully denied.\nThe sender will not be notified you denied their request.")
                             elif response != "q":
                                 print("Invalid choice. Please try again.")
                         else:
                             print("Request number did not match. Please try again.")
                     elif choice == "2":
-                        pending_requests = self.db_manager.fetchall("SELECT receiver, first_name, last_name, university, major FROM friend_requests INNER JOIN accounts ON receiver = username WHERE sender=?", (self._current_user[1], ))
+                        pending_requests = self.db_manager.fetchall("outgoing_friend_requests", (self._current_user.username, ))
                         if not pending_requests:
                             print('You have no new outgoingfriend requests.')
                             continue
@@ -655,20 +2870,15 @@ class InCollegeAppManager:
                     else:
                         print(f"Searching by {search_by[choice]}.")
                         search_for = input(f"Enter the user you wish to find's {search_by[choice]}: ")
-                        users_matching = self.db_manager.fetchall(f"SELECT username, first_name, last_name, university, major FROM accounts \
-                                                                  WHERE {search_by[choice].replace(' ', '_')}=? AND NOT username=?", (search_for, self._current_user[1]))
+                        users_matching = self.db_manager.fetchall(f"find_other_users_by_{search_by[choice].replace(' ', '_')}", (search_for, self._current_user.username))
                                                 
                         if len(users_matching) == 0:
                             print(f'\nNo users found with {search_by[choice]} equal to "{search_for}".')
                             continue
                         
-                        for i in range(len(users_matching)):
-                            users_matching[i] = list(users_matching[i])
-                            users_matching[i].insert(0, i+1)
-
                         print(f'\nUsers found with {search_by[choice]} equal to "{search_for}":')
                         head = ["User Num", "Username", "First Name", "Last Name", "University", "Major"]
-                        print(tabulate(users_matching, headers=head, tablefmt="grid"))
+                        print(tabulate(users_matching, headers=head, tablefmt="grid", showindex=range(1, len(users_matching) + 1)))
 
                         sendRequest = input("\nWould you like to send one of these users a friend request? (y/n) ")
                         if sendRequest == "y":
@@ -677,7 +2887,7 @@ class InCollegeAppManager:
                                 found = False
                                 receiverNumber = int(receiverNumber) - 1
                                 if 0 <= receiverNumber < len(users_matching):
-                                    send_friend_request(self._current_user[1], users_matching[receiverNumber][1])
+                                    send_friend_request(self._current_user.username, users_matching[receiverNumber].username)
                                     found = True
 
                                 if not found:
@@ -687,14 +2897,11 @@ class InCollegeAppManager:
 
             # function that sends a friend request to the "receiver" user from the "sender" user
             def send_friend_request(sender, receiver):
-                request_exists = (self.db_manager.fetchall("SELECT COUNT(*) FROM friend_requests WHERE (sender=? AND receiver=?)",
-                                        (sender, receiver)))[0][0]
+                request_exists = self.db_manager.fetch("friend_request_count", (sender, receiver))[0]
                 
-                pending_request = (self.db_manager.fetchall("SELECT COUNT(*) FROM friend_requests WHERE (sender=? AND receiver=?)",
-                                        (receiver, sender)))[0][0]
+                pending_request = self.db_manager.fetch("friend_request_count", (receiver, sender))[0]
                 
-                already_friends = (self.db_manager.fetchall("SELECT COUNT(*) FROM friendship WHERE (user_one=? AND user_two=?) OR (user_one=? AND user_two=?)",
-                                        (sender, receiver, receiver, sender)))[0][0]
+                already_friends = self.db_manager.fetch("friendship_count", (sender, receiver, receiver, sender))[0]
 
                 if request_exists:
                     print(f"\nYou have already sent user {receiver} a friend request.\nYou will be notified when they accept your request.")
@@ -706,7 +2913,7 @@ class InCollegeAppManager:
                 elif already_friends:
                     print(f"\nYou are already friends with {receiver}.")
                 else:
-                    self.db_manager.execute("INSERT INTO friend_requests(sender, receiver) VALUES (?, ?)", (sender, receiver))
+                    self.db_manager.execute("insert_friend_request", (sender, receiver))
                     print(f"\nFriend request sent to {receiver} successfully!")
             
             # function to add a friendship between the usernames passed as arguments so long as one does not already exist
@@ -718,48 +2925,36 @@ class InCollegeAppManager:
                 if friendB in friendsOfA and friendA in friendsOfB:
                     print(f"You are already friends with {friendB}\n")
                 else:
-                    self.db_manager.execute("INSERT INTO friendship(user_one, user_two) VALUES (?, ?)", (friendA, friendB))
-                    self.db_manager.execute("DELETE FROM friend_requests WHERE sender=? AND receiver=?", (friendA, friendB))
-                    self.db_manager.execute("DELETE FROM friend_requests WHERE sender=? AND receiver=?", (friendB, friendA))
+                    with self.db_manager.transaction():
+                        self.db_manager.execute("insert_friendship", (friendA, friendB))
+                        self.db_manager.execute("delete_friend_request", (friendA, friendB))
+                        self.db_manager.execute("delete_friend_request", (friendB, friendA))
                     print(f"You have successfully added {friendB} to your network!")
 
             # function to remove a friendship if it exists between current user and passed argument username
             def remove_friend(friend_to_remove):
-                current_user_name = self._current_user[1]
-                self.db_manager.execute("DELETE FROM friendship WHERE (user_one=? AND user_two=?)", (current_user_name, friend_to_remove))
-                self.db_manager.execute("DELETE FROM friendship WHERE (user_one=? AND user_two=?)", (friend_to_remove, current_user_name))
+                current_user_name = self._current_user.username
+                with self.db_manager.transaction():
+                    self.db_manager.execute("delete_friendship", (current_user_name, friend_to_remove))
+                    self.db_manager.execute("delete_friendship", (friend_to_remove, current_user_name))
                 print(f"\nYou have removed {friend_to_remove} from your network.")
 
             # function to create and return a list that holds all of the friends of the passed username
             def create_friends_list(current_user_name):
-                friends_list = []
-                friendships_with_user1 = self.db_manager.fetchall("SELECT user_two, first_name, last_name, university, major \
-                        FROM friendship INNER JOIN accounts ON user_two = username WHERE (user_one=?)", (current_user_name, ))
-                friendships_with_user2 = self.db_manager.fetchall("SELECT user_one, first_name, last_name, university, major \
-                        FROM friendship INNER JOIN accounts ON user_one = username WHERE (user_two=?)", (current_user_name, ))
-
-                friends_list = friendships_with_user1 + friendships_with_user2
-
-                # inserts number to front of the list
-                for i in range(len(friends_list)):
-                    friends_list[i] = list(friends_list[i])
-                    friends_list[i].insert(0, i+1)
-                    profile_status = self.db_manager.fetch('SELECT posted FROM profiles WHERE (username=?)', (friends_list[i][1],))
-                    if profile_status and profile_status[0] == "yes":
-                        friends_list[i].append("View Profile")
-                    else:
-                        friends_list[i].append("No Profile Posted")
+                friendships_with_user1 = self.db_manager.fetchall("friends_as_user_one", (current_user_name, ))
+                friendships_with_user2 = self.db_manager.fetchall("friends_as_user_two", (current_user_name, ))
 
-                return friends_list
+                return friendships_with_user1 + friendships_with_user2
 
             def print_friends():
-                friends = create_friends_list(self._current_user[1])
+                friends = create_friends_list(self._current_user.username)
 
                 if friends:
                     print("\nFriends List")
                     print("-------------------------------")
                     head = ["Friend Num", "Username", "First Name", "Last Name", "University", "Major", "Profile"]
-                    print(tabulate(friends, headers=head, tablefmt="grid"), "\n")
+                    rows = [(*friend[:5], "View Profile" if friend.posted == "yes" else "No Profile Posted") for friend in friends]
+                    print(tabulate(rows, headers=head, tablefmt="grid", showindex=range(1, len(friends) + 1)), "\n")
 
                 return friends
 
@@ -768,7 +2963,7 @@ class InCollegeAppManager:
                 while True:
                     print(menu_seperate)
                     print(self.menus["show_my_network"])
-                    user_messages = self.db_manager.fetchall("""SELECT COUNT(*) from messages WHERE recipient=?""", (self._current_user[0],))
+                    user_messages = self.db_manager.fetchall("message_count_for", (self._current_user.user_id,))
                     if user_messages and user_messages[0][0] > 0:
                         print("You have a message waiting for you in the Message Center.")
                     choice = input("Please select an option: ")
@@ -799,11 +2994,11 @@ class InCollegeAppManager:
                                 print("\nPlease enter the number associated with the friend in your network.\n")
                                 continue
 
-                            if (friends[friendNum][6] == "View Profile"):
+                            if (friends[friendNum].posted == "yes"):
                                 print("")
-                                printProfile(friends[friendNum][1])
+                                printProfile(friends[friendNum].username)
                             else:
-                                print(f"\n{friends[friendNum][1]} does not currently have a posted profile\n")
+                                print(f"\n{friends[friendNum].username} does not currently have a posted profile\n")
                         else:
                             print("Invalid choice. Returning to Show my network screen.")
 
@@ -831,10 +3026,10 @@ class InCollegeAppManager:
                             print("Please enter the number associated with the friend in your network.\n")
                             continue
                         
-                        print(f"You are about to remove {friends[numToDelete][1]} from your network.")
+                        print(f"You are about to remove {friends[numToDelete].username} from your network.")
                         user_confirm = input("Do you wish to proceed? (y/n) ")
                         if user_confirm == "y":
-                            remove_friend(friends[numToDelete][1])
+                            remove_friend(friends[numToDelete].username)
                         else:
                             print("Removal cancelled.")
                     elif choice == "3":
@@ -847,40 +3042,38 @@ class InCollegeAppManager:
             # function to print a user's profile 
             def printProfile(username):
                 print(menu_seperate)
-                profileContent = self.db_manager.fetch('SELECT first_name, last_name, title, major, university, about, pastJob1, pastJob2, \
-                                                       pastJob3, education, posted FROM profiles WHERE (username=?)', (username,))
-                if profileContent[10] != "yes":
+                profileContent = self.db_manager.fetch("profile_by_username", (username,))
+                if profileContent.posted != "yes":
                     return
                     # this profile is not posted
                 
                # print(menu_separate)
-                print(f"\n{profileContent[0]} {profileContent[1]}'s Profile")
+                print(f"\n{profileContent.first_name} {profileContent.last_name}'s Profile")
                 print("-------------------------------")
                 print(f"Username:\n----\n{username}\n")
-                print(f"Title:\n----\n{profileContent[2]}\n")
-                print(f"Major:\n----\n{profileContent[3]}\n")
-                print(f"University:\n----\n{profileContent[4]}\n")
-                print(f"About {profileContent[0]} {profileContent[1]}:\n----\n{profileContent[5]}\n")
+                print(f"Title:\n----\n{profileContent.title}\n")
+                print(f"Major:\n----\n{profileContent.major}\n")
+                print(f"University:\n----\n{profileContent.university}\n")
+                print(f"About {profileContent.first_name} {profileContent.last_name}:\n----\n{profileContent.about}\n")
 
-                if profileContent[6] != "n/a" and profileContent[6] != "\n":
-                    print(f"Job 1:\n----\n{profileContent[6]}\n")
+                if profileContent.pastJob1 != "n/a" and profileContent.pastJob1 != "\n":
+                    print(f"Job 1:\n----\n{profileContent.pastJob1}\n")
 
-                if profileContent[7] != "n/a" and profileContent[7] != "\n":
-                    print(f"Job 2:\n----\n{profileContent[7]}\n")
+                if profileContent.pastJob2 != "n/a" and profileContent.pastJob2 != "\n":
+                    print(f"Job 2:\n----\n{profileContent.pastJob2}\n")
                     
-                if profileContent[8] != "n/a" and profileContent[8] != "\n":
-                    print(f"Job 3:\n----\n{profileContent[8]}\n")
+                if profileContent.pastJob3 != "n/a" and profileContent.pastJob3 != "\n":
+                    print(f"Job 3:\n----\n{profileContent.pastJob3}\n")
 
-                print(f"Education:\n----\n{profileContent[9]}")
+                print(f"Education:\n----\n{profileContent.education}")
                                 
             # function to modify profile's options
             def myProfileOptions():
-                username = self._current_user[1]
-                profileContent = self.db_manager.fetch('SELECT first_name, last_name, title, major, university, about, pastJob1, pastJob2, \
-                                                            pastJob3, education, posted FROM profiles WHERE (username=?)', (username,))
+                username = self._current_user.username
+                profileContent = self.db_manager.fetch("profile_by_username", (username,))
                 # profile is not posted, so they have the option to create a profile and are asked if they want to post it there
-                if profileContent[10] != "yes":
-                    while True and profileContent[10] != "yes":
+                if profileContent.posted != "yes":
+                    while True and profileContent.posted != "yes":
                         print(menu_seperate)
                         print("My Profile Options\n-------------------------------")
                         print("1. Create a Profile\n2. Post my Profile\nq. Quit\n")
@@ -890,11 +3083,10 @@ class InCollegeAppManager:
                             break
                         elif userChoice == "1":
                             createProfile(self, username)
-                            profileContent = self.db_manager.fetch('SELECT first_name, last_name, title, major, university, about, pastJob1, pastJob2, \
-                                                                       pastJob3, education, posted FROM profiles WHERE (username=?)', (username,))
+                            profileContent = self.db_manager.fetch("profile_by_username", (username,))
 
                         elif userChoice == "2":
-                            self.db_manager.execute("UPDATE profiles SET posted='yes' WHERE username=?", (username,))
+                            self.db_manager.execute("post_profile", (username,))
                             print("Your profile has been posted!\n")
                             break
                         else:
@@ -902,7 +3094,7 @@ class InCollegeAppManager:
 
 
                 # profile is displayed, so they have the option to update it or view their profile
-                if profileContent[10] == "yes":
+                if profileContent.posted == "yes":
                     while True:
                         print(menu_seperate)
                         print("My Profile Options\n-------------------------------")
@@ -965,14 +3157,13 @@ class InCollegeAppManager:
                 education += f"Degree:\n{degree}\n"
                 education += f"Years Attended:\n{years_attended}\n"
             
-                self.db_manager.execute("UPDATE profiles SET about=?, title=?, major=?, university=?, pastJob1=?, pastJob2=?, pastJob3=?, education=? \
-                                        WHERE username=?", (about, title, major, university, past_jobs[0], past_jobs[1], past_jobs[2], education, username))
+                self.db_manager.execute("update_profile", (about, title, major, university, past_jobs[0], past_jobs[1], past_jobs[2], education, username))
                 print("Profile saved successfully!")
 
                 # Ask user if they want to post their profile
                 post_profile = input("Do you want to post your profile? (yes/no): ").lower()
                 if post_profile == "yes":
-                    self.db_manager.execute("UPDATE profiles SET posted='yes' WHERE username=?", (username,))
+                    self.db_manager.execute("post_profile", (username,))
                     print("Profile posted successfully!")
                 else:
                     print("Profile not posted.")
@@ -996,18 +3187,18 @@ class InCollegeAppManager:
                 if choice == "1":
                     new_title = input("Enter your new title: ")
                     new_title = new_title.title()
-                    self.db_manager.execute("UPDATE profiles SET title=? WHERE username=?", (new_title, username))
+                    self.db_manager.execute("update_profile_title", (new_title, username))
                 elif choice == "2":
                     new_major = input("Enter your new major: ")
                     new_major = new_major.title()
-                    self.db_manager.execute("UPDATE profiles SET major=? WHERE username=?", (new_major, username))
+                    self.db_manager.execute("update_profile_major", (new_major, username))
                 elif choice == "3":
                     new_university = input("Enter your new university name: ")
                     new_university = new_university.title()
-                    self.db_manager.execute("UPDATE profiles SET university=? WHERE username=?", (new_university, username))
+                    self.db_manager.execute("update_profile_university", (new_university, username))
                 elif choice == "4":
                     new_about = input("Enter your new About section: ")
-                    self.db_manager.execute("UPDATE profiles SET about=? WHERE username=?", (new_about, username))
+                    self.db_manager.execute("update_profile_about", (new_about, username))
                 elif choice == "5":
                     job_number = input("Enter the job number to update (1, 2, or 3): ")
                     column_name = f"pastJob{job_number}"
@@ -1027,7 +3218,7 @@ class InCollegeAppManager:
                     new_past_job += f"Date Ended:\n{date_ended}\n"
                     new_past_job += f"Location:\n{location}\n"
                     new_past_job += f"Job Description:\n{job_description}\n"
-                    self.db_manager.execute(f"UPDATE profiles SET {column_name}=? WHERE username=?", (new_past_job, username))
+                    self.db_manager.execute(f"update_profile_{column_name}", (new_past_job, username))
                 elif choice == "6":
                     new_education = ""
                     print("Enter New Education Information Below:")
@@ -1039,7 +3230,7 @@ class InCollegeAppManager:
                     new_education += f"School Name:\n{school_name}\n"
                     new_education += f"Degree:\n{degree}\n"
                     new_education += f"Years Attended:\n{years_attended}\n"
-                    self.db_manager.execute("UPDATE profiles SET education=? WHERE username=?", (new_education, username))
+                    self.db_manager.execute("update_profile_education", (new_education, username))
                 elif choice == "q":
                     print("Exiting profile update.")
                 else:
@@ -1055,7 +3246,7 @@ class InCollegeAppManager:
                     verify = input("Are you REALLY sure? (y/n) ")
                     if(verify == "y"):
                         print("\nWe are sorry to see you go!")
-                        self.db_manager.execute("DELETE FROM accounts WHERE user_id =?;",(self._current_user[0],))
+                        self.db_manager.execute("delete_account", (self._current_user.user_id,))
                         # print(self._current_user)
                         self.db_manager.commit()
                         return True
@@ -1064,11 +3255,39 @@ class InCollegeAppManager:
                 return False
 
             def jobs():
+                def browse(page, display, empty):
+                    """
+                        The job browser every listing of jobs goes through: prints page(after=None, before=None, limit)
+                        one page_size page at a time, and only asks where to go when the jobs span more than one page.
+                    """
+                    rows, has_next = page(limit=self.page_size)
+                    if not rows:
+                        print(empty)
+                        return
+                    has_prev = False
+                    while True:
+                        print("\n".join(display(row) for row in rows))
+                        if not (has_next or has_prev):
+                            return
+                        option = input(f"{'n. Next Page  ' if has_next else ''}{'p. Previous Page  ' if has_prev else ''}Enter. Continue: ").lower()
+                        if option == "n" and has_next:
+                            rows, has_next = page(after=rows[-1].job_id, limit=self.page_size)
+                            has_prev = True
+                        elif option == "p" and has_prev:
+                            rows, has_prev = page(before=rows[0].job_id, limit=self.page_size)
+                            has_next = True
+                        elif not option:
+                            return
+
+                def print_job_titles():
+                    print("Titles of Jobs Currently Posted\n-------------------------------")
+                    browse(self.db_manager.job_titles_page, lambda t: f"Title: {t.job_title} - ID: {t.job_id}", "No job titles found.")
+
                 def post_job():
                     """
                     Posts a job under the specified username
                     """
-                    if self.db_manager.fetch('SELECT COUNT(*) FROM jobs;')[0] >= 10:
+                    if self.db_manager.fetch("job_count")[0] >= 10:
                         print("All jobs have been created. Please come back later.")
                         return
                     try:
@@ -1095,15 +3314,9 @@ class InCollegeAppManager:
                         assert job_title and job_description and skill_name and long_description and employer and location and salary, "Error: Cannot leave field Blank."
 
                         # Insert job details into jobs table
-                        if not self.db_manager.post_job(skill_name, long_description, job_title, job_description, employer, location, salary, self._current_user[0]):
+                        if not self.db_manager.post_job(skill_name, long_description, job_title, job_description, employer, location, salary, self._current_user.user_id):
                             raise Exception("Could not create job.")
                         
-                        all_incollege_users = self.db_manager.fetchall("SELECT * FROM accounts WHERE NOT user_id=?", (self._current_user[0],))
-                        message = f'A new job "{job_title}" has been posted.'
-                        for user in all_incollege_users:
-                            cur_user_id = user[0]
-                            self.db_manager.execute("INSERT INTO new_job_notifs(recipientID, message) VALUES(?, ?)", (cur_user_id, message))
-                        
                         print('\nSuccessfully posted the job!')
 
                     except Exception as e:
@@ -1113,113 +3326,102 @@ class InCollegeAppManager:
                     print(menu_seperate)
                     print("Jobs you have posted\n-------------------------------")
                     try:
-                        user_id = self._current_user[0]
-                        jobs_from_user = self.db_manager.fetchall("SELECT * FROM jobs WHERE posted_by=?", (user_id,))
-                        if not jobs_from_user:
+                        user_id = self._current_user.user_id
+                        jobs = self.db_manager.jobs_posted_by(user_id)
+                        if not jobs:
                             print("You have no jobs posted.")
                             return
                         
-                        display_job = lambda x: f"Title: {x[3]}\nDescription: {x[4]}\nID: {x[0]}\n"
-                        jobs = [self.db_manager.find_jobs_by_id(job[0])[0] for job in jobs_from_user]
-                        print("\n".join([display_job(j) for j in jobs])) if jobs else print("Could not find any jobs.")
+                        display_job = lambda x: f"Title: {x.job_title}\nDescription: {x.job_description}\nID: {x.job_id}\n"
+                        print("\n".join([display_job(j) for j in jobs]))
 
                         print("Delete a job\n-------------------------------")
                         job_id = input("Enter the ID of the job you wish to delete (or enter q to cancel): ")
                         if job_id == "q":
                             return
                         job_id = int(job_id)
-                        job_details = self.db_manager.fetchall("SELECT * FROM jobs WHERE job_id=? AND posted_by=?", (job_id, user_id))
+                        job_details = self.db_manager.fetchall("job_posted_by", (job_id, user_id))
                         assert job_details, 'Job not found or you do not have permission to delete this job.'
-                        job_title = job_details[0][3]
 
-                        # add all users that have applied to this job to the deleted_job_notifs table
-                        applicantIDs = self.db_manager.fetchall("SELECT applicant FROM job_applications WHERE job_id=?", (job_id,))
-                        for i in applicantIDs:
-                            self.db_manager.execute("INSERT INTO deleted_job_notifs (applicantID, jobID, jobTitle) VALUES (?, ?, ?)", (i[0], job_id, job_title))
-
-                        # Delete the job from jobs table
-                        self.db_manager.execute("DELETE FROM jobs WHERE job_id=?", (job_id,))
+                        # applicants are notified by a trigger in the same statement
+                        self.db_manager.delete_jobs([job_id])
                         print(f"Job with ID {job_id} has been successfully deleted.\nAll applications to this job have also been deleted.")
 
                     except Exception as e:
                         print("Error: ", e)
 
+                def job_filters():
+                    """ Shows how many jobs each location, employer and salary band has, then asks for the filters (blank for any). """
+                    facets = self.db_manager.job_facets()
+                    print()
+                    for facet, title in (("location", "Locations"), ("employer", "Employers")):
+                        print(f"{title}: " + ", ".join(f"{value} ({jobs})" for value, jobs in facets[facet].items()))
+                    print("Salaries: " + ", ".join(f"{band}-{band + SALARY_BAND} ({jobs})" for band, jobs in sorted(facets["salary"].items())))
+                    filters = {}
+                    for name, prompt in (("min_salary", "Minimum salary"), ("max_salary", "Maximum salary")):
+                        value = input(f"{prompt} (blank for any): ").strip()
+                        try:
+                            filters[name] = float(value) if value else None
+                        except ValueError:
+                            print(f"Ignoring {prompt.lower()}, it must be a number.")
+                    for name in ("location", "employer"):
+                        filters[name] = input(f"{name.capitalize()} (blank for any): ").strip() or None
+                    return filters
+
                 def search_job():
                     print(menu_seperate)
-                    job_titles = self.db_manager.fetchall("SELECT job_title, job_id FROM jobs")
-                    print("Titles of Jobs Currently Posted\n-------------------------------")
-                    if job_titles:
-                        for job_title in job_titles:
-                            print(f"Title: {job_title[0]} - ID: {job_title[1]}")
-                    else:
-                        print("No job titles found.")
+                    print_job_titles()
                     
                     print("\nSearching for Jobs\n-------------------------------")
                     job = input("Enter a job title to search for: ")
-                    user_id = self._current_user[0]
-                    display_job = lambda x, y: f"Title: {x[3]}\nDescription: {x[4]}\nEmployer: {x[5]}\nSalary: {str(x[7])}\nPosted By: {x[9] + ' '  + x[10]}\nApplied For: {y}\nJob ID: {x[0]}\n"
-                    jobs = self.db_manager.find_jobs_by_title(job)
-                    
-                    def all():  
-                        print("\n".join([display_job(j, self.db_manager.user_is_applicant(user_id, j[0])) for j in jobs])) if jobs else print("Could not find any jobs by that name.")
-                    
-                    def applied_for():
-                        print("\n".join([display_job(j, True) for j in jobs if self.db_manager.user_is_applicant(user_id, j[0])])) if jobs else print("Could not find any jobs by that name.")
-                    
-                    def n_applied_for():
-                        print("\n".join([display_job(j, False) for j in jobs if not self.db_manager.user_is_applicant(user_id, j[0])])) if jobs else print("Could not find any jobs by that name.")
-                    
-                    queries = {'a': all, '1': applied_for, '2': n_applied_for}
+                    user_id = self._current_user.user_id
+                    display_job = lambda x: f"Title: {x.job_title}\nDescription: {x.job_description}\nEmployer: {x.employer}\nSalary: {str(x.salary)}\nPosted By: {x.user_first_name + ' '  + x.user_last_name}\nApplied For: {bool(x.applied)}\nJob ID: {x.job_id}\n"
+
+                    # a: all jobs, 1: only ones applied for, 2: only ones not applied for, f: all jobs matching filters
+                    queries = {'a': None, '1': True, '2': False}
                     print("\nEnter Job Query:")
-                    query = input('a. Search All Jobs\n1. Search Jobs You\'ve Applied For\n2. Search Jobs You Haven\'t Applied For\nq. Quit\nSelect an option: ')
+                    query = input('a. Search All Jobs\n1. Search Jobs You\'ve Applied For\n2. Search Jobs You Haven\'t Applied For\nf. Filter by Salary, Location or Employer\nq. Quit\nSelect an option: ')
                     if query == "q": 
                         return
+                    filters = job_filters() if query == "f" else {}
                     print("\nJobs Found\n-------------------------------")
-                    queries.get(query, all)()
+                    page = lambda **keys: self.db_manager.search_jobs_page(user_id, job, applied=queries.get(query), **filters, **keys)
+                    browse(page, display_job, "Could not find any jobs by that name.")
 
                 def print_jobs_applied_for():
                     print(menu_seperate)
                     print("Jobs You Have Applied For\n-------------------------------")
-                    applied_for_jobs = self.db_manager.fetchall("SELECT * from job_applications WHERE applicant=?", (self._current_user[0],))
-                    if applied_for_jobs:
-                        display_job = lambda x: f"Title: {x[3]}\nDescription: {x[4]}\nEmployer: {x[5]}\nSalary: {str(x[7])}\nPosted By: {x[9] + ' '  + x[10]}\nJob ID: {x[0]}\n"
-                        jobs = [self.db_manager.find_jobs_by_id(job[2])[0] for job in applied_for_jobs]
-                        print("\n".join([display_job(j) for j in jobs])) if jobs else print("Could not find any jobs by that name.")
+                    jobs = self.db_manager.jobs_applied_by(self._current_user.user_id)
+                    if jobs:
+                        display_job = lambda x: f"Title: {x.job_title}\nDescription: {x.job_description}\nEmployer: {x.employer}\nSalary: {str(x.salary)}\nPosted By: {x.user_first_name + ' '  + x.user_last_name}\nJob ID: {x.job_id}\n"
+                        print("\n".join([display_job(j) for j in jobs]))
                     else:
                         print("You have no currently active job applications.")
 
                 def print_jobs_not_applied_for():
                     print(menu_seperate)
                     print("Jobs You Have Not Applied For\n-------------------------------")
-                    applied_for_jobs = self.db_manager.fetchall("SELECT * from job_applications WHERE applicant=?", (self._current_user[0],))
-
-                    applied_job_ids = []
-                    for i in applied_for_jobs:
-                        applied_job_ids.append(i[2])
-
-                    not_applied_ids = []
-
-                    all_ids = self.db_manager.fetchall("SELECT job_id from jobs")
-
-                    for i in all_ids:
-                        if i[0] not in applied_job_ids:
-                            not_applied_ids.append(i[0])
-
-                    if not_applied_ids:
-                        display_job = lambda x: f"Title: {x[3]}\nDescription: {x[4]}\nEmployer: {x[5]}\nSalary: {str(x[7])}\nPosted By: {x[9] + ' '  + x[10]}\nJob ID: {x[0]}\n"
-                        jobs = [self.db_manager.find_jobs_by_id(job)[0] for job in not_applied_ids]
-                        print("\n".join([display_job(j) for j in jobs])) if jobs else print("Could not find any jobs by that name.")
-                    else:
-                        print("There are currently no jobs that you have not already applied to.")
+                    display_job = lambda x: f"Title: {x.job_title}\nDescription: {x.job_description}\nEmployer: {x.employer}\nSalary: {str(x.salary)}\nPosted By: {x.user_first_name + ' '  + x.user_last_name}\nJob ID: {x.job_id}\n"
+                    page = lambda **keys: self.db_manager.jobs_not_applied_page(self._current_user.user_id, **keys)
+                    browse(page, display_job, "There are currently no jobs that you have not already applied to.")
                 
+                def print_recommended_jobs():
+                    print(menu_seperate)
+                    print("Recommended Jobs\n-------------------------------")
+                    jobs = self.db_manager.recommend_jobs(self._current_user.user_id)
+                    if jobs:
+                        display_job = lambda x: f"Title: {x.job_title}\nDescription: {x.job_description}\nEmployer: {x.employer}\nSalary: {str(x.salary)}\nPosted By: {x.user_first_name + ' '  + x.user_last_name}\nJob ID: {x.job_id}\n"
+                        print("\n".join([display_job(j) for j in jobs]))
+                    else:
+                        print("There are no recommended jobs for you yet.")
+
                 def print_saved_jobs():
                     print(menu_seperate)
                     print("Jobs You Have Saved\n-------------------------------")
-                    saved_jobs = self.db_manager.fetchall("SELECT * from job_save WHERE (saved=1 AND applicant=?)", (self._current_user[0],))
-                    if saved_jobs:
-                        display_job = lambda x: f"Title: {x[3]}\nDescription: {x[4]}\nID: {x[0]}\n"
-                        jobs = [self.db_manager.find_jobs_by_id(job[2])[0] for job in saved_jobs]
-                        print("\n".join([display_job(j) for j in jobs])) if jobs else print("Could not find any jobs by that name.")
+                    jobs = self.db_manager.jobs_saved_by(self._current_user.user_id)
+                    if jobs:
+                        display_job = lambda x: f"Title: {x.job_title}\nDescription: {x.job_description}\nID: {x.job_id}\n"
+                        print("\n".join([display_job(j) for j in jobs]))
                         # Ask user if they want to unmark a job as saved
                         unsave_job = input("Do you wish to unsave a job? (y/n) ")
                         if unsave_job != "y":
@@ -1231,9 +3433,9 @@ class InCollegeAppManager:
                         
                         try:
                             job_id_to_unmark = int(job_id_to_unmark)
-                            job_exists = self.db_manager.fetchall("SELECT * FROM jobs WHERE job_id=?;", (job_id_to_unmark,))
+                            job_exists = self.db_manager.fetchall("job_by_id", (job_id_to_unmark,))
                             if job_exists:
-                                self.db_manager.execute("DELETE FROM job_save WHERE (job_id=? AND applicant=?)", (job_id_to_unmark, self._current_user[0]))
+                                self.db_manager.execute("delete_saved_job", (job_id_to_unmark, self._current_user.user_id))
                                 print(f"Job with ID {job_id_to_unmark} has been unmarked as saved.")
                             else:
                                 print(f"Job with ID {job_id_to_unmark} not found.")
@@ -1246,18 +3448,12 @@ class InCollegeAppManager:
                 
                 def apply_for_job():
                     print(menu_seperate)
-                    job_titles = self.db_manager.fetchall("SELECT job_title, job_id FROM jobs")
-                    print("Titles of Jobs Currently Posted\n-------------------------------")
-                    if job_titles:
-                        for job_title in job_titles:
-                            print(f"Title: {job_title[0]} - ID: {job_title[1]}")
-                    else:
-                        print("No job titles found.")
+                    print_job_titles()
                     print("\n")
                     print("Apply for a Job\n-------------------------------")
                     try:
                         correct_date = lambda x: len(x) == 3 and len(x[0]) == 2 and len(x[1]) == 2 and len(x[2]) == 4
-                        user = self._current_user[0]
+                        user = self._current_user.user_id
 
                         job = input("Enter the job ID (or enter 'q' to quit): ")
 
@@ -1266,19 +3462,18 @@ class InCollegeAppManager:
 
                         job = int(job)
 
-                        jobTest = self.db_manager.fetchall("SELECT * FROM jobs WHERE job_id=?;", (job,))
+                        jobTest = self.db_manager.fetchall("job_by_id", (job,))
 
-                        assert (self.db_manager.fetchall("SELECT * FROM jobs WHERE job_id=?;",  (job,))[0][0]), 'Job does not exist.'
+                        assert jobTest, 'Job does not exist.'
 
-                        currUserId = self._current_user[0]
+                        currUserId = self._current_user.user_id
 
                         # check if current user posted the job
                         if jobTest[0]:
-                            assert not (jobTest[0][8] == currUserId), "Cannot apply to your own posting."
+                            assert not (jobTest[0].posted_by == currUserId), "Cannot apply to your own posting."
 
                         #appl_exists
-                        assert not self.db_manager.fetchall("SELECT COUNT(*) FROM job_applications WHERE (applicant=? AND job_id=?)",
-                                                (user, job))[0][0], "Cannot apply more than once for a job."
+                        assert not self.db_manager.fetch("application_count", (user, job))[0], "Cannot apply more than once for a job."
                         gr_date = input("Please Enter your Graduation Date (dd/mm/yyyy): ")
                         assert gr_date and correct_date(gr_date.split('/')), 'Cannot enter empty or incorectly formatted date.'
                         w_date = input("Please Enter your Available Start Date (dd/mm/yyyy): ")
@@ -1286,9 +3481,9 @@ class InCollegeAppManager:
                         quals = input("Tell us about yourself and why you want the job: \n")
                         assert quals, 'Cannot Leave field Empty.'
                         self.db_manager.user_apply_job(user, job, gr_date, w_date, quals)
-                        
+
                         # update last job application timestamp value for user to keep track of last job application
-                        self.db_manager.execute("UPDATE accounts SET last_job_application_timestamp = CURRENT_TIMESTAMP WHERE user_id=?", (currUserId,))
+                        self.db_manager.defer("touch_last_job_application", (currUserId,))
                         
                         print("\nSuccessfully Applied for the job.")
                     except Exception as e:
@@ -1296,32 +3491,26 @@ class InCollegeAppManager:
 
                 def save_a_job():
                     print(menu_seperate)
-                    job_titles = self.db_manager.fetchall("SELECT job_title, job_id FROM jobs")
-                    print("Titles of Jobs Currently Posted\n-------------------------------")
-                    if job_titles:
-                        for job_title in job_titles:
-                            print(f"Title: {job_title[0]} - ID: {job_title[1]}")
-                    else:
-                        print("No job titles found.")
+                    print_job_titles()
                     print("\n")
                     print("Save A Job\n-------------------------------")
                     try:
-                        user_id = self._current_user[0]
+                        user_id = self._current_user.user_id
                         job_id = int(input("Enter the job ID: "))
-                        job_exists = self.db_manager.fetchall("SELECT * FROM jobs WHERE job_id=?;", (job_id,))
+                        job_exists = self.db_manager.fetchall("job_by_id", (job_id,))
                         assert job_exists, 'Job does not exist.'
 
                         job_details = job_exists[0]
 
                         # Check if the current user is trying to save their own job posting
-                        assert not (user_id == job_details[8]), "Cannot save your own posting."
+                        assert not (user_id == job_details.posted_by), "Cannot save your own posting."
 
                         # Check if the user has already saved this job
-                        saved_job_applied = self.db_manager.fetchall("SELECT COUNT(*) FROM job_applications WHERE (applicant=? AND job_id=? )", (user_id, job_id))[0][0]
-                        saved_job = self.db_manager.fetchall("SELECT COUNT(*) FROM job_save WHERE (job_id=? AND applicant=?)", (job_id, user_id))[0][0]
+                        saved_job_applied = self.db_manager.fetch("application_count", (user_id, job_id))[0]
+                        saved_job = self.db_manager.fetch("saved_job_count", (job_id, user_id))[0]
 
                         print("\nJob Details\n-------------------------------")
-                        print(f"Title: {job_details[3]}\nDescription: {job_details[4]}\nEmployer: {job_details[5]}\nSalary: {str(job_details[7])}\nPosted By: {job_details[9] + ' '  + job_details[10]}\nApplied For: {'True' if saved_job_applied else 'False'}\nJob ID: {job_details[0]}\n")
+                        print(f"Title: {job_details.job_title}\nDescription: {job_details.job_description}\nEmployer: {job_details.employer}\nSalary: {str(job_details.salary)}\nPosted By: {job_details.user_first_name + ' '  + job_details.user_last_name}\nApplied For: {'True' if saved_job_applied else 'False'}\nJob ID: {job_details.job_id}\n")
 
                         if saved_job_applied:
                             print("You have already applied to this job.")
@@ -1329,7 +3518,7 @@ class InCollegeAppManager:
                             print("You have already saved this job.")
                         else:
                             # Update the saved column to True in the jobs table
-                            self.db_manager.execute("INSERT INTO job_save (job_id, applicant, saved) VALUES (?, ?, True)", (job_id, user_id))
+                            self.db_manager.execute("insert_saved_job", (job_id, user_id))
                             self.db_manager.commit()
                             print("Job saved successfully!")
 
@@ -1337,28 +3526,25 @@ class InCollegeAppManager:
                         print("Error: ", e)
                 
                 def job_notifications():
-                    userID = self._current_user[0]
-                    num_jobs_applied_for = (self.db_manager.fetchall("SELECT COUNT(*) from job_applications WHERE applicant=?", (userID,)))[0][0]
+                    userID = self._current_user.user_id
+                    num_jobs_applied_for = self.db_manager.fetch("application_count_by_applicant", (userID,))[0]
     
                     print("Job Notifications:\n-------------------------------")
                     print(f"* You have currently applied for {num_jobs_applied_for} job{'s' if num_jobs_applied_for != 1 else ''}.")
 
                     # if there are any deleted_job_notif entries with this user's user_id, we will display the notifs and then remove the entries
-                    deleted_jobs = self.db_manager.fetchall("SELECT * FROM deleted_job_notifs WHERE applicantID=?", (userID,))
+                    deleted_jobs = self.db_manager.fetchall("deleted_job_notifs_for", (userID,))
                     if deleted_jobs:
                         for job in deleted_jobs:
-                            print(f'* The job "{job[2]}" that you applied for was deleted.')
-                        self.db_manager.execute("DELETE FROM deleted_job_notifs where applicantID=?", (userID,))
+                            print(f'* The job "{job.jobTitle}" that you applied for was deleted.')
+                        self.db_manager.execute("delete_deleted_job_notifs", (userID,))
 
-                    # if there are any new_job_notifs entries with this user's user_id, we will display the notifs and then remove the entries
-                    new_job_notifs = self.db_manager.fetchall("SELECT * FROM new_job_notifs WHERE recipientID=?", (userID,))
-                    if new_job_notifs:
-                        for notification in new_job_notifs:
-                            print(f'* {notification[2]}')
-                        self.db_manager.execute("DELETE FROM new_job_notifs where recipientID=?", (userID,))
+                    # jobs posted by others since the last visit
+                    for job in self.db_manager.new_jobs_for(userID):
+                        print(f'* A new job "{job.job_title}" has been posted.')
 
 
-                functions = {'1':search_job, '2':post_job, '3':apply_for_job, '4':print_jobs_applied_for, '5':save_a_job, '6':print_saved_jobs, '7': print_jobs_not_applied_for, '8': delete_job}
+                functions = {'1':search_job, '2':post_job, '3':apply_for_job, '4':print_jobs_applied_for, '5':save_a_job, '6':print_saved_jobs, '7': print_jobs_not_applied_for, '8': delete_job, '9': print_recommended_jobs}
                 while True:
                     print(menu_seperate)
                     job_notifications()
@@ -1391,17 +3577,16 @@ class InCollegeAppManager:
                                 found = False
                                 receiverNumber = int(receiverNumber) - 1
                                 if 0 <= receiverNumber < len(friend_list):
-                                    r_user = friend_list[receiverNumber][1]
-                                    sender = self._current_user[0]
-                                    recipient = self.db_manager.fetchall("SELECT * FROM accounts WHERE (username =?)", (r_user,))[0][0]
+                                    r_user = friend_list[receiverNumber].username
+                                    sender = self._current_user.user_id
+                                    recipient = self.db_manager.fetchall("account_by_username", (r_user,))[0].user_id
                                     assert recipient, "Error: User could not be found."
-                                    is_friend = self.db_manager.check_friendship_status(self._current_user[0], recipient)
+                                    is_friend = self.db_manager.check_friendship_status(self._current_user.user_id, recipient)
                                     # Assert user is friend or user is plus
-                                    assert self._current_user[7] or is_friend, "Error: You must be a plus user to send messages to users who you are not friends with."
+                                    assert self._current_user.plus or is_friend, "Error: You must be a plus user to send messages to users who you are not friends with."
                                     message = input("What message would you like to send?\nHit \"ENTER\" after you are done typing your message.\n")
 
-                                    self.db_manager.execute(
-                                        "INSERT INTO messages(recipient, message, sender) VALUES (?, ?, ?)",
+                                    self.db_manager.execute("insert_message",
                                         (recipient, message, sender))
                                     print(f"\nMessage sent to '{r_user}' successfully!")
 
@@ -1411,38 +3596,42 @@ class InCollegeAppManager:
                             except Exception as e:
                                 print("Error while sending a message:", e)
                         elif choice == '2':
-                            if self._current_user[7]:
+                            if self._current_user.plus:
                                 try:
-                                    users = self.db_manager.fetchall("SELECT username, first_name, last_name, university, major FROM accounts")
-                                    if not users:
+                                    if not self.db_manager.fetch("account_count")[0]:
                                         print("No users to send messages to.")
                                         break
                                     
-                                    for i in range(len(users)):
-                                        users[i] = list(users[i])
-                                        users[i].insert(0, i+1)
-
                                     print("\nAll Users List")
                                     print("-------------------------------")
                                     head = ["User Num", "Username", "First Name", "Last Name", "University", "Major"]
-                                    print(tabulate(users, headers=head, tablefmt="grid"), "\n")
-
-                                    id = input("Enter the User Num of the user to send a message to (or enter 'q' to quit): ").strip()
-                                    if id.lower() == "q": break
+                                    # one page of accounts at a time; a User Num is looked up in the page on screen
+                                    users, has_next = self.db_manager.account_directory_page(limit=self.page_size)
+                                    has_prev = False
+                                    while True:
+                                        self._print_table((user[1:] for user in users), head)
+                                        pages = f"{'n. Next Page  ' if has_next else ''}{'p. Previous Page  ' if has_prev else ''}"
+                                        id = input(f"{pages}Enter the User Num of the user to send a message to (or enter 'q' to quit): ").strip().lower()
+                                        if id == "n" and has_next:
+                                            users, has_next = self.db_manager.account_directory_page(after=users[-1].user_id, limit=self.page_size)
+                                            has_prev = True
+                                        elif id == "p" and has_prev:
+                                            users, has_prev = self.db_manager.account_directory_page(before=users[0].user_id, limit=self.page_size)
+                                            has_next = True
+                                        else:
+                                            break
+                                    if id == "q": break
                                     id = int(id) - 1
 
-                                    if 0 <= id < len(users):
-                                        r_user = users[id][1]
-                                        sender = self._current_user[0]
-                                        recipient = self.db_manager.fetchall("SELECT * FROM accounts WHERE (username =?)", (r_user,))[0]
-                                        assert recipient, "Error: User could not be found."
+                                    recipient = self.db_manager.fetch("account_by_id", (users[id].user_id,)) if 0 <= id < len(users) else None
+                                    if recipient:
+                                        sender = self._current_user.user_id
                                         message = input("What message would you like to send?\nHit \"ENTER\" after you are done typing your message.\n")
 
-                                        self.db_manager.execute(
-                                            "INSERT INTO messages(recipient, message, sender) VALUES (?, ?, ?)",
-                                            (recipient[0], message, sender))
+                                        self.db_manager.execute("insert_message",
+                                            (recipient.user_id, message, sender))
                                         
-                                        print(f"\nMessage sent to '{recipient[3]}' successfully!")
+                                        print(f"\nMessage sent to '{recipient.first_name}' successfully!")
                                     else:
                                         print("User not found, please try again.")
                                 except Exception as e:
@@ -1463,31 +3652,27 @@ class InCollegeAppManager:
                     print("\n- " + user)
                 
                 def delete_message(message_to_delete):
-                    recipient = message_to_delete[0]
-                    message = message_to_delete[1]
-                    sender = message_to_delete[2]
+                    recipient, message, sender = message_to_delete.recipient, message_to_delete.message, message_to_delete.sender
 
-                    self.db_manager.execute("DELETE FROM messages WHERE sender=? AND message=? AND recipient=?",((sender, message, recipient)))
+                    self.db_manager.execute("delete_message", (sender, message, recipient))
                     print('\nMessage successfully deleted!')
                     return 0
                 
                 def reply_message(message_to_reply):
-                    recipient = message_to_reply[0]
-                    message = message_to_reply[1]
-                    sender = message_to_reply[2]
+                    recipient, message, sender = message_to_reply.recipient, message_to_reply.message, message_to_reply.sender
 
-                    s_user = self.db_manager.fetchall("SELECT * FROM accounts WHERE (user_id =?)", (sender,))[0][1]
+                    s_user = self.db_manager.fetchall("account_by_id", (sender,))[0].username
 
                     reply = input("How would you like to reply to this message?\nHit \"ENTER\" after you are done typing your reply.\n")
 
-                    new_message = reply + "\n\n- " + self._current_user[1] + "\n-------------------\n" + message
+                    new_message = reply + "\n\n- " + self._current_user.username + "\n-------------------\n" + message
 
-                    self.db_manager.execute("INSERT INTO messages(recipient, message, sender) VALUES (?, ?, ?)",(sender, new_message, recipient))
+                    self.db_manager.execute("insert_message", (sender, new_message, recipient))
                     print(f"\nReply sent to '{s_user}' successfully!")
 
                 while True:
                     #print a preview of all messages to this user
-                    messages = self.db_manager.fetchall("SELECT * FROM messages WHERE (recipient =?)", (self._current_user[0],))
+                    messages = self.db_manager.fetchall("messages_for", (self._current_user.user_id,))
                     modified_messages = []
 
                     print(menu_seperate)
@@ -1495,13 +3680,13 @@ class InCollegeAppManager:
                     if not messages:
                         print("You have no new messages.\n")
                     else:
-                        for i in range(len(messages)):
-                            modified_string = messages[i][1] [:100] + '...' if len(messages[i][1]) > 100 else messages[i][1]
-                            username = self.db_manager.fetchall("SELECT * FROM accounts WHERE (user_id =?)", (messages[i][2],))[0][1]
-                            modified_messages.append([i+1, username, modified_string])
+                        for message in messages:
+                            modified_string = message.message[:100] + '...' if len(message.message) > 100 else message.message
+                            username = self.db_manager.fetchall("account_by_id", (message.sender,))[0].username
+                            modified_messages.append((username, modified_string))
 
                         head = ["message ID", "sender", "message"]
-                        print(tabulate(modified_messages, headers=head, tablefmt="grid"), "\n")
+                        print(tabulate(modified_messages, headers=head, tablefmt="grid", showindex=range(1, len(messages) + 1)), "\n")
 
 
                     #print the menu
@@ -1524,7 +3709,7 @@ class InCollegeAppManager:
                         choice = input("\nEnter the message ID of the message you would like to view in full: ")
                         try:
                             choice = int(choice)-1
-                            view_full_message(messages[choice][1],modified_messages[choice][1])
+                            view_full_message(messages[choice].message, modified_messages[choice][0])
                         except:
                             print("\nMessage not found. Please try again.")
                     #delete a message
@@ -1544,7 +3729,7 @@ class InCollegeAppManager:
 
             def apply_for_jobs_reminder():
                 current_utc_time = datetime.utcnow()
-                last_application_time = datetime.strptime((self.db_manager.fetchall("SELECT last_job_application_timestamp FROM accounts WHERE user_id=?", (self._current_user[0],)))[0][0], "%Y-%m-%d %H:%M:%S")
+                last_application_time = datetime.strptime(self.db_manager.fetch("last_job_application", (self._current_user.user_id,))[0], "%Y-%m-%d %H:%M:%S")
                 difference_in_seconds = abs(int((current_utc_time-last_application_time).total_seconds()))
                 difference_in_days = difference_in_seconds // (24 * 60 * 60)
                 if difference_in_days >= 7:
@@ -1558,30 +3743,30 @@ class InCollegeAppManager:
             while True:
                 print(menu_seperate) #menu
 
-                print(f"Welcome back to InCollege, {self._current_user[3]}!\n")
+                print(f"Welcome back to InCollege, {self._current_user.first_name}!\n")
                 if not reminderDisplayed:
                     apply_for_jobs_reminder()
                     reminderDisplayed = True
                 
-                numberOfRequests = (self.db_manager.fetchall("SELECT COUNT(*) FROM friend_requests WHERE receiver=?", (self._current_user[1], )))[0][0]
+                numberOfRequests = self.db_manager.fetch("incoming_friend_request_count", (self._current_user.username, ))[0]
                 if numberOfRequests:
                     print(f"You have [{numberOfRequests}] new friend request{'s' if numberOfRequests > 1 else ''}!\n")
                 
-                user_messages = self.db_manager.fetchall("SELECT COUNT(*) from messages WHERE recipient=?", (self._current_user[0],))
+                user_messages = self.db_manager.fetchall("message_count_for", (self._current_user.user_id,))
                 if user_messages and user_messages[0][0] > 0:
                     print("You have a message waiting for you in the message menu!\n")
 
                 # notify user of no profile
-                has_profile = self.db_manager.fetchall("SELECT * FROM profiles WHERE username =? AND posted =?", (self._current_user[1],'yes'))
+                has_profile = self.db_manager.fetchall("posted_profile_by_username", (self._current_user.username,'yes'))
                 if not has_profile:
                     print("Don't forget to create a profile!\n")
 
                 # notify user of one time notifications
-                notifications = self.db_manager.fetchall("SELECT * FROM notifications WHERE (user_id =?)",(self._current_user[0],))
+                notifications = self.db_manager.fetchall("notifications_for", (self._current_user.user_id,))
                 for notification in notifications:
-                    print(notification[1])
+                    print(notification.notification)
                 #remove one time notifications from table
-                self.db_manager.execute("DELETE FROM notifications WHERE (user_id =?)",(self._current_user[0],))
+                self.db_manager.defer("delete_notifications", (self._current_user.user_id,))
 
                 print(self.menus["signed_in"])
 
@@ -1634,20 +3819,15 @@ class InCollegeAppManager:
                 else:
                     print(f"Searching by {search_by[choice]}.")
                     search_for = input(f"Enter the user you wish to find's {search_by[choice]}: ")
-                    users_matching = self.db_manager.fetchall(f"SELECT username, first_name, last_name, university, major FROM accounts \
-                                                              WHERE {search_by[choice].replace(' ', '_')}=?", (search_for,))
+                    users_matching = self.db_manager.fetchall(f"find_users_by_{search_by[choice].replace(' ', '_')}", (search_for,))
 
                     if len(users_matching) == 0:
                         print(f'\nNo users found with {search_by[choice]} equal to "{search_for}".')
                         continue
 
-                    for i in range(len(users_matching)):
-                        users_matching[i] = list(users_matching[i])
-                        users_matching[i].insert(0, i + 1)
-
                     print(f'\nUsers found with {search_by[choice]} equal to "{search_for}":')
                     head = ["User Num", "Username", "First Name", "Last Name", "University", "Major"]
-                    print(tabulate(users_matching, headers=head, tablefmt="grid"))
+                    print(tabulate(users_matching, headers=head, tablefmt="grid", showindex=range(1, len(users_matching) + 1)))
 
          
         def _create_account_procedure():
@@ -1668,13 +3848,7 @@ class InCollegeAppManager:
                 if _acc is not None:
                     print('\nYou have successfully created an account!\nLog in to start using InCollege.')
                     #insert notifications of new account
-                    accounts = (self.db_manager.fetchall("SELECT * FROM accounts",))
-                    for user in accounts:
-                        if user[0] == _acc[0]:
-                            continue
-                        self.db_manager.execute(
-                            "INSERT INTO notifications (user_id, notification) VALUES (?, ?)",
-                            ((user[0]), f"New User! {_acc[3]} {_acc[4]} created an account!\n"))
+                    self.db_manager.notify_other_users(_acc.user_id, f"New User! {_acc.first_name} {_acc.last_name} created an account!\n")
 
                 else:
                     print('\nThere has been an unexpected error while creating your account.')
@@ -0,0 +1,932 @@
+# Sprint 9 Test Cases
+# These tests exercise the DatabaseManager directly instead of going through the menus
+
+import sqlite3
+import asyncio
+import threading
+import time
+import pytest
+import main
+import os
+
+DB_FILE = "test_db_layer.db"
+
+@pytest.fixture
+def db():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_FILE + suffix):
+            os.remove(DB_FILE + suffix)
+    app = main.InCollegeAppManager(DB_FILE)
+    yield app.db_manager
+    app.db_manager.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_FILE + suffix):
+            os.remove(DB_FILE + suffix)
+
+# each thread should be handed its own connection, and the same thread should always get the same one
+def test_pool_connection_per_thread(db):
+    main_conn = db.conn
+    assert db.conn is main_conn
+
+    other = []
+    def worker():
+        other.append(db.conn)
+        db.pool.release()
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+
+    assert other[0] is not main_conn
+    assert db.pool.stats()["idle"] == 1
+
+# a connection released by one thread is reused by the next, and foreign keys are on for every connection
+def test_pool_reuses_idle_connections(db):
+    seen = []
+    def worker():
+        seen.append(db.conn)
+        assert db.fetch("PRAGMA foreign_keys;")[0] == 1
+        db.pool.release()
+    for _ in range(2):
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+
+    assert seen[0] is seen[1]
+
+# broken and expired idle connections are never handed out again
+def test_pool_health_check_and_idle_timeout(db):
+    def checkout_and_release():
+        conn = db.conn
+        db.pool.release()
+        return conn
+
+    broken = checkout_and_release()
+    db.pool.release()  # release the main thread's connection too
+    broken.close()
+    assert checkout_and_release() is not broken
+
+    db.pool.idle_timeout = 0.01
+    stale = checkout_and_release()
+    time.sleep(0.05)
+    assert checkout_and_release() is not stale
+
+# once every connection is checked out, a thread that exited without releasing its connection frees its slot
+def test_pool_reclaims_connections_from_dead_threads():
+    pool = main.ConnectionPool(lambda: sqlite3.connect(":memory:", check_same_thread=False), size=1, acquire_timeout=0.1)
+    t = threading.Thread(target=pool.acquire)
+    t.start()
+    t.join()
+
+    assert pool.acquire() is not None
+    pool.close()
+
+# a transaction block commits once on exit, and rolls back everything it wrote if it raises
+def test_transaction_commit_and_rollback(db):
+    with db.transaction():
+        db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "first"))
+        db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "second"))
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 2
+
+    with pytest.raises(sqlite3.IntegrityError):
+        with db.transaction():
+            db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "third"))
+            db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, None))
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 2
+
+# a failed autocommit statement is rolled back instead of keeping the write lock on its connection
+def test_failed_statement_releases_lock(db):
+    db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, None))
+    assert not db.conn.in_transaction
+    other = sqlite3.connect(DB_FILE, timeout=0)
+    other.execute("BEGIN IMMEDIATE;")
+    other.rollback()
+    other.close()
+
+# a failing nested block only undoes its own writes
+def test_nested_transaction_savepoint(db):
+    with db.transaction():
+        db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "outer"))
+        try:
+            with db.transaction():
+                db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "inner"))
+                raise ValueError
+        except ValueError:
+            pass
+    assert db.fetchall("SELECT notification FROM notifications") == [("outer",)]
+
+# with autocommit off nothing is visible to other connections until commit() is called
+def test_autocommit_off(db):
+    manual = main.DatabaseManager(DB_FILE, autocommit=False)
+    manual.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "pending"))
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 0
+    manual.commit()
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 1
+    manual.close()
+
+# the balanced profile is the default, and the diagnostics report what the connection really runs with
+def test_performance_profiles(db):
+    report = db.diagnostics()
+    assert report["profile"] == "balanced"
+    assert report["journal_mode"] == "wal"
+    assert report["temp_store"] == 2
+
+    throughput = main.DatabaseManager(DB_FILE, profile="throughput")
+    report = throughput.diagnostics()
+    assert report["synchronous"] == 0
+    assert report["cache_size"] == main.PERFORMANCE_PROFILES["throughput"]["cache_size"]
+    throughput.close()
+
+    with pytest.raises(AssertionError):
+        main.DatabaseManager(DB_FILE, profile="fastest")
+
+# registered queries run by name, and repeated statements are counted as statement cache hits
+def test_query_registry_and_statement_cache(db):
+    assert db.fetch("account_count")[0] == 0
+    assert db.fetch("account_count")[0] == 0
+    assert db.fetchall("SELECT COUNT(*) FROM accounts;") == [(0,)]
+
+    stats = db.statement_cache_stats()
+    assert stats["queries"]["account_count"] == {"hits": 1, "misses": 1}
+    # the raw SQL is the same statement as account_count, so it is already prepared
+    assert stats["queries"]["SELECT COUNT(*) FROM accounts;"] == {"hits": 1, "misses": 0}
+
+# statements pushed out of the LRU have to be prepared again
+def test_statement_cache_eviction(db):
+    small = main.DatabaseManager(DB_FILE, statement_cache_size=1)
+    small.fetch("SELECT 1;")
+    small.fetch("SELECT 2;")
+    small.fetch("SELECT 1;")
+    assert small.statement_cache_stats()["misses"] == 3
+    small.close()
+
+# execute_many writes the whole batch in one transaction, or none of it
+def test_execute_many(db):
+    rows = [(i, f"notification {i}") for i in range(100)]
+    assert db.execute_many("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", rows) == 100
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 100
+
+    db.execute_many("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", [(1, "ok"), (1, None)])
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 100
+
+# the fan-out helpers reach every other account with a single statement
+def test_set_based_notifications(db):
+    db.execute_many("INSERT INTO accounts (username, password, first_name, last_name, university, major, plus, last_job_application_timestamp) \
+                    VALUES (?, 'pw', 'first', 'last', 'University', 'Major', 0, CURRENT_TIMESTAMP)", [("a",), ("b",), ("c",)])
+    db.notify_other_users(1, "hello")
+    assert [row[0] for row in db.fetchall("SELECT user_id FROM notifications ORDER BY user_id")] == [2, 3]
+
+
+# every registered query that is not meant to read a whole table has to be answered from an index
+def test_registered_queries_use_indexes(db):
+    assert db.check_query_plans() == {}
+
+# the managed index set is migrated: missing indexes come back and unlisted idx_ indexes are dropped
+def test_sync_indexes(db):
+    db.execute("DROP INDEX idx_messages_recipient;")
+    db.execute("CREATE INDEX idx_messages_message ON messages (message);")
+    assert "messages_for" in db.check_query_plans()
+
+    db.sync_indexes()
+    names = {row[0] for row in db.fetchall("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert "idx_messages_recipient" in names and "idx_messages_message" not in names
+    assert db.check_query_plans() == {}
+
+# a new database is migrated to the latest version once; after that startup runs no migrations
+def test_migrations_run_once(db):
+    assert db.schema_version() == len(main.SCHEMA_MIGRATIONS)
+    assert db.migrate() == []
+
+# an older database is upgraded one version at a time, each step together with its version bump
+def test_migrations_upgrade_step_by_step(db):
+    migrations = main.SCHEMA_MIGRATIONS + [
+        ["CREATE TABLE extra_one (id INTEGER);"],
+        ["CREATE TABLE extra_two (id INTEGER);", "INSERT INTO missing_table VALUES (1);"],
+    ]
+    current = db.schema_version()
+    with pytest.raises(sqlite3.OperationalError):
+        db.migrate(migrations)
+
+    # the failing step was rolled back as a whole, the one before it stays applied
+    assert db.schema_version() == current + 1
+    tables = {row[0] for row in db.fetchall("SELECT name FROM sqlite_master WHERE type='table'")}
+    assert "extra_one" in tables and "extra_two" not in tables
+
+# instrumentation records calls and rows per statement, and logs slow statements with their query plan
+def test_query_instrumentation(db, tmp_path):
+    log = tmp_path / "slow.log"
+    traced = main.DatabaseManager(DB_FILE, instrument=True, slow_query_ms=0, slow_query_log=str(log))
+    traced.fetchall("all_skills")
+    traced.fetchall("all_skills")
+    traced.fetch("SELECT   COUNT(*)\n FROM skills")
+
+    stats = traced.query_stats.statements
+    assert stats["all_skills"]["calls"] == 2
+    assert stats["all_skills"]["rows"] == 2 * db.fetch("skill_count")[0]
+    assert stats["SELECT COUNT(*) FROM skills"]["calls"] == 1
+
+    # a streamed query counts every row it yields
+    assert len(list(traced.iterate("all_skills", batch_size=2))) == db.fetch("skill_count")[0]
+    assert stats["all_skills"]["calls"] == 3
+    assert stats["all_skills"]["rows"] == 3 * db.fetch("skill_count")[0]
+
+    assert traced.query_stats.slow_queries[-1]["plan"]
+    assert "all_skills" in log.read_text()
+    assert "all_skills" in traced.query_report()
+    traced.close()
+
+    assert db.query_report() is None
+
+# the asyncio front end runs every statement on its I/O thread, and concurrent tasks wait for an open transaction
+def test_async_database_manager(db):
+    async def scenario():
+        adb = main.AsyncDatabaseManager(DB_FILE)
+        assert (await adb.fetch("account_count"))[0] == 0
+
+        async def insert(i):
+            await adb.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (i, f"n{i}"))
+        await asyncio.gather(*(insert(i) for i in range(20)))
+        assert (await adb.fetch("SELECT COUNT(*) FROM notifications"))[0] == 20
+
+        with pytest.raises(sqlite3.IntegrityError):
+            async with adb.transaction():
+                await adb.execute("DELETE FROM notifications")
+                reader = asyncio.ensure_future(adb.fetch("SELECT COUNT(*) FROM notifications"))
+                await adb.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, None))
+        # the other task's read only ran once the transaction had rolled back
+        assert (await reader)[0] == 20
+
+        async with adb.transaction():
+            await adb.execute_many("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", [(1, "a"), (2, "b")])
+        assert (await adb.fetch("SELECT COUNT(*) FROM notifications"))[0] == 22
+        await adb.close()
+
+    asyncio.run(scenario())
+
+# pure reads run on a read-only connection, except where they have to see the writer's uncommitted work
+def test_read_only_connections(db):
+    db.fetch("account_count")
+    reader = db.readers.current()
+    assert reader is not None and reader is not db.conn
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute("DELETE FROM notifications")
+
+    db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "committed"))
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 1
+
+    with db.transaction():
+        db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "pending"))
+        assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 2
+        cursor = reader.execute("SELECT COUNT(*) FROM notifications")
+        assert cursor.fetchone()[0] == 1
+        cursor.close()
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 2
+
+    memory = main.DatabaseManager(":memory:")
+    assert memory.readers is None
+    memory.close()
+
+# rows come back as slotted records: fields by name, while still indexing and comparing like tuples
+def test_row_records(db):
+    db.execute("insert_account", ("user", "pw", "First", "Last", "University", "Major", 1))
+    account = db.fetch("account_by_username", ("user",))
+    assert isinstance(account, main.Account)
+    assert (account.first_name, account.plus) == ("First", 1)
+    assert account[3] == "First" and account[:2] == (1, "user")
+    assert not hasattr(account, "__dict__")
+    with pytest.raises(AttributeError):
+        account.plus = 0
+
+    row = db.fetch("SELECT username, COUNT(*) FROM accounts")
+    assert row.username == "user" and row.column_1 == 1
+    assert row == ("user", 1) and tuple(row) == ("user", 1)
+    assert db.fetchall("find_users_by_major", ("Major",)) == [("user", "First", "Last", "University", "Major")]
+
+# data_file picks the storage engine; every connection of an in-memory backend sees the same database
+def test_memory_backend():
+    app = main.InCollegeAppManager("memory:")
+    db = app.db_manager
+    assert isinstance(db.backend, main.MemoryBackend) and db.readers is None
+    assert db.schema_version() == len(main.SCHEMA_MIGRATIONS)
+
+    db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "hello"))
+    counts = []
+    def worker():
+        counts.append(db.fetch("SELECT COUNT(*) FROM notifications")[0])
+        db.pool.release()
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert counts == [1]
+    db.close()
+
+    assert isinstance(main.open_backend("users.db"), main.FileBackend)
+
+# shared-cache connections lock tables instead of the file; concurrent writers wait for each other instead of failing
+def test_memory_backend_concurrent_writers(capsys):
+    db = main.DatabaseManager("memory:")
+    db.migrate()
+    def worker(n):
+        for i in range(300):
+            db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (n, f"n{i}"))
+            db.execute_many("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", [(n, "batch")] * 3)
+        db.pool.release()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 3 * 300 * 4
+    assert "locked" not in capsys.readouterr().out
+    db.close()
+
+# a snapshot backend runs in memory, writes the database to disk on close and loads it again when reopened
+def test_snapshot_backend(tmp_path):
+    path = tmp_path / "snapshot.db"
+    db = main.DatabaseManager(f"snapshot:{path}")
+    db.migrate()
+    db.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, "kept"))
+    assert not path.exists()
+    db.close()
+
+    with sqlite3.connect(path) as disk:
+        assert disk.execute("SELECT notification FROM notifications").fetchall() == [("kept",)]
+
+    reopened = main.DatabaseManager(f"snapshot:{path}")
+    assert reopened.fetchall("SELECT notification FROM notifications") == [("kept",)]
+    assert reopened.migrate() == []
+    reopened.close()
+
+# with shards, user-owned rows live in the owner's shard file while queries keep using the plain table names
+def test_sharded_user_tables(tmp_path):
+    path = str(tmp_path / "sharded.db")
+    app = main.InCollegeAppManager(path, shards=3)
+    db = app.db_manager
+    for name in ("a", "b", "c", "d"):
+        app._create_account(name, "!!!Goodpswd0", name, name, "University", "Major", False)
+    ids = {name: db.fetch("account_by_username", (name,)).user_id for name in ("a", "b", "c", "d")}
+
+    db.notify_other_users(ids["a"], "hello")
+    db.execute("insert_message", (ids["b"], "hi b", ids["a"]))
+    db.execute("update_language", ("Spanish", "d"))
+    assert [row.user_id for row in db.fetchall("SELECT user_id FROM notifications ORDER BY user_id")] == [ids["b"], ids["c"], ids["d"]]
+    assert db.fetchall("messages_for", (ids["b"],)) == [(ids["b"], "hi b", ids["a"])]
+    assert db.fetch("language_by_username", ("d",)).language == "Spanish"
+    assert db.fetch("SELECT COUNT(*) FROM main.notifications")[0] == 0
+
+    # every shard only holds the rows of its own users
+    for shard in range(3):
+        with sqlite3.connect(db.backend.shard_location(shard)) as conn:
+            owners = [row[0] for row in conn.execute(f"SELECT user_id FROM notifications_{shard}")]
+            assert all(owner % 3 == shard for owner in owners)
+            usernames = [row[0] for row in conn.execute(f"SELECT username FROM settings_{shard}")]
+            assert all(ids[name] % 3 == shard for name in usernames)
+
+    assert db.check_query_plans() == {}
+
+    # a write with a known owner locks only the owner's shard file
+    assert db.pragmas["journal_mode"] == "DELETE"
+    with db.transaction():
+        db.execute("insert_message", (ids["a"], "hi a", ids["b"]))
+        db.execute("update_language", ("French", "a"))
+        for shard in range(3):
+            other = sqlite3.connect(db.backend.shard_location(shard), timeout=0)
+            if shard == ids["a"] % 3:
+                with pytest.raises(sqlite3.OperationalError):
+                    other.execute("BEGIN IMMEDIATE;")
+            else:
+                other.execute("BEGIN IMMEDIATE;")
+                other.rollback()
+            other.close()
+    assert db.execute_many("INSERT INTO notifications (user_id, notification) VALUES (?, ?)",
+                           [(user_id, "batch") for user_id in ids.values()]) == 4
+
+    # deleting an account still cascades into the shards
+    db.execute("delete_account", (ids["b"],))
+    assert db.fetchall("messages_for", (ids["b"],)) == []
+    assert db.fetch("settings_by_username", ("b",)) is None
+    db.execute("DELETE FROM notifications WHERE user_id = ?", (ids["c"],))
+    # notifications have no foreign key, so b's stays behind exactly as it would without shards
+    assert sorted(row.user_id for row in db.fetchall("SELECT user_id FROM notifications WHERE notification <> 'batch'")) == [ids["b"], ids["d"]]
+    db.close()
+
+    # reopening finds the same data, and rows written before sharding was turned on are moved into the shards
+    plain = main.DatabaseManager(str(tmp_path / "plain.db"))
+    plain.migrate()
+    plain.execute("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (4, "old"))
+    plain.close()
+    resharded = main.DatabaseManager(str(tmp_path / "plain.db"), shards=2)
+    assert resharded.fetchall("SELECT notification FROM notifications") == [("old",)]
+    assert resharded.fetch("SELECT COUNT(*) FROM main.notifications")[0] == 0
+    resharded.close()
+
+# connections opened before the schema existed get the shard views too, and a file stuck in WAL is refused
+def test_shard_views_on_every_connection(tmp_path):
+    db = main.DatabaseManager(str(tmp_path / "sharded.db"), shards=2)
+    db.conn
+    def early():
+        db.conn
+        db.fetch("SELECT 1")
+        db.pool.release()
+        db.readers.release()
+    thread = threading.Thread(target=early)
+    thread.start()
+    thread.join()
+    db.migrate()
+    for name in ("a", "b"):
+        db.execute("insert_account", (name, "pw", "First", "Last", "University", "Major", 0))
+
+    seen = []
+    def late():
+        db.execute("insert_message", (2, "hi", 1))
+        seen.append((db.fetchall("messages_for", (2,)), db.conn.shards_installed))
+    thread = threading.Thread(target=late)
+    thread.start()
+    thread.join()
+    assert seen == [([(2, "hi", 1)], True)]
+    assert db.fetchall("messages_for", (2,)) == [(2, "hi", 1)]
+    assert db.fetch("SELECT COUNT(*) FROM main.messages")[0] == 0
+    db.close()
+
+    path = str(tmp_path / "wal.db")
+    holder = sqlite3.connect(path)
+    holder.execute("PRAGMA journal_mode=WAL;")
+    holder.execute("CREATE TABLE t (x);")
+    wal = main.DatabaseManager(path, shards=2)
+    with pytest.raises(sqlite3.OperationalError, match="WAL"):
+        wal.migrate()
+    holder.close()
+    assert wal.migrate()
+    assert wal.fetch("PRAGMA journal_mode;")[0] == "delete"
+    wal.close()
+
+# deferred writes are applied in the background, but reads of the same tables and close() wait for them
+def test_write_behind_queue(db):
+    for i in range(50):
+        db.defer("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, f"n{i}"))
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 50
+    assert db.pending_writes == 0
+
+    db.defer("delete_notifications", (1,))
+    db.defer("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (1, None))  # fails on its own
+    db.defer("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", (2, "kept"))
+    db.flush()
+    assert db.fetchall("SELECT notification FROM notifications") == [("kept",)]
+
+    # inside a transaction a deferred write is part of it
+    with pytest.raises(ValueError):
+        with db.transaction():
+            db.defer("delete_notifications", (2,))
+            raise ValueError
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 1
+
+    writer = main.DatabaseManager(DB_FILE)
+    writer.defer("delete_notifications", (2,))
+    writer.close()
+    assert db.fetch("SELECT COUNT(*) FROM notifications")[0] == 0
+
+# a transaction lands the writes deferred before it instead of waiting for them while it holds the write lock
+def test_transaction_after_deferred_write_to_same_table(db):
+    db.execute("insert_account", ("a", "pw", "First", "Last", "University", "Major", 0))
+    db.defer("touch_last_job_application", (1,))
+    start = time.perf_counter()
+    with db.transaction(immediate=True):
+        assert db.fetch("account_by_id", (1,)) is not None
+    assert time.perf_counter() - start < 1
+    assert db.pending_writes == 0
+
+# iterate streams a result batch by batch, and stopping early closes its cursor
+def test_iterate_streams_rows(db, capsys):
+    db.execute_many("INSERT INTO notifications (user_id, notification) VALUES (?, ?)", [(i, f"n{i}") for i in range(250)])
+    rows = db.iterate("SELECT user_id FROM notifications ORDER BY user_id", batch_size=100)
+    assert next(rows).user_id == 0
+    assert sum(1 for _ in rows) == 249
+
+    partial = db.iterate("SELECT user_id FROM notifications", batch_size=10)
+    next(partial)
+    partial.close()
+    db.execute("DELETE FROM notifications")
+    assert list(db.iterate("SELECT * FROM notifications")) == []
+
+    printed = main.InCollegeAppManager._print_table(iter([("a",), ("b",), ("c",)]), ["Num", "Name"], batch_size=2)
+    out = capsys.readouterr().out
+    assert printed == 3 and out.count("Num | Name") == 2 and "|     3 | c" in out
+
+# job search is full-text over every searchable column, with prefix and phrase terms, best matches first
+def test_full_text_job_search(db):
+    db.execute("insert_account", ("poster", "pw", "First", "Last", "University", "Major", 0))
+    db.post_job("Python", "long 1", "Data Engineer", "Build pipelines", "Acme", "Remote", 100.0, 1)
+    db.post_job("SQL", "long 2", "Analyst", "Work with a data engineer team", "Initech", "Austin", 90.0, 1)
+    db.post_job("Go", "long 3", "Backend Developer", "Services", "Acme", "Denver", 120.0, 1)
+
+    # the title match ranks above the description match
+    assert [job.job_title for job in db.find_jobs_by_title("engineer")] == ["Data Engineer", "Analyst"]
+    assert [job.job_title for job in db.find_jobs_by_title("dev")] == ["Backend Developer"]
+    assert [job.job_title for job in db.find_jobs_by_title("acme denver")] == ["Backend Developer"]
+    assert [job.job_title for job in db.find_jobs_by_title('"engineer team"')] == ["Analyst"]
+    assert [job.job_id for job in db.find_jobs_by_title("  ")] == [1, 2, 3]
+    assert db.find_jobs_by_title("%") == []
+
+    # the index follows updates and deletes of the jobs table
+    db.execute("UPDATE jobs SET job_title = 'Platform Engineer' WHERE job_id = 3")
+    db.execute("delete_job", (1,))
+    assert [job.job_title for job in db.find_jobs_by_title("engineer")] == ["Platform Engineer", "Analyst"]
+
+# one search returns every job with the user's applied and saved state, filtered in SQL
+def test_search_jobs_with_applied_state(db):
+    for name in ("poster", "seeker"):
+        db.execute("insert_account", (name, "pw", "First", "Last", "University", "Major", 0))
+    for i in range(3):
+        db.post_job("Skill", f"long {i}", f"Job {i}", "Desc", "Employer", "Location", 100.0, 1)
+    db.user_apply_job(2, 2, "01/01/2000", "01/01/2000", "quals")
+    db.execute("insert_saved_job", (3, 2))
+
+    jobs = db.search_jobs(2, "job")
+    assert [(job.job_id, job.applied, job.saved) for job in jobs] == [(1, 0, 0), (2, 1, 0), (3, 0, 1)]
+    assert [job.job_id for job in db.search_jobs(2, "", applied=True)] == [2]
+    assert [job.job_id for job in db.search_jobs(2, "job", applied=False)] == [1, 3]
+    assert db.search_jobs(1, "job", applied=True) == []
+
+# applied, saved and posted jobs are listed with one statement each, with ordering and limits
+def test_job_listings_by_user(db):
+    for name in ("poster", "seeker"):
+        db.execute("insert_account", (name, "pw", "First", "Last", "University", "Major", 0))
+    for i, salary in enumerate((300.0, 100.0, 200.0)):
+        db.post_job("Skill", f"long {i}", f"Job {i}", "Desc", "Employer", "Location", salary, 1)
+    for job_id in (3, 1, 2):
+        db.user_apply_job(2, job_id, "01/01/2000", "01/01/2000", "quals")
+    db.execute("insert_saved_job", (2, 2))
+
+    assert [job.job_id for job in db.jobs_applied_by(2)] == [1, 2, 3]
+    assert [job.salary for job in db.jobs_applied_by(2, order_by="salary", descending=True, limit=2)] == [300.0, 200.0]
+    assert [job.job_id for job in db.jobs_saved_by(2)] == [2]
+    assert [job.job_id for job in db.jobs_posted_by(1, limit=1)] == [1]
+    assert db.jobs_posted_by(2) == []
+    assert [job.job_id for job in db.jobs_posted_by(1, limit=1, offset=2)] == [3]
+    with pytest.raises(AssertionError):
+        db.jobs_posted_by(1, order_by="salary; DROP TABLE jobs")
+
+# jobs not applied for come from one NOT EXISTS query and can be paged
+def test_jobs_not_applied_by(db):
+    db.execute("insert_account", ("poster", "pw", "First", "Last", "University", "Major", 0))
+    for i in range(5):
+        db.post_job("Skill", f"long {i}", f"Job {i}", "Desc", "Employer", "Location", 100.0, 1)
+    db.user_apply_job(1, 2, "01/01/2000", "01/01/2000", "quals")
+    db.user_apply_job(1, 4, "01/01/2000", "01/01/2000", "quals")
+
+    assert [job.job_id for job in db.jobs_not_applied_by(1)] == [1, 3, 5]
+    assert [job.job_id for job in db.jobs_not_applied_by(1, limit=2)] == [1, 3]
+    assert [job.job_id for job in db.jobs_not_applied_by(1, limit=2, offset=2)] == [5]
+    assert [job.job_id for job in db.jobs_not_applied_by(1, descending=True)] == [5, 3, 1]
+    assert len(db.jobs_not_applied_by(2)) == 5
+
+# job titles are paged by keyset in both directions, and each page says whether there is another one
+def test_job_titles_page(db):
+    db.execute("insert_account", ("poster", "pw", "First", "Last", "University", "Major", 0))
+    for i in range(5):
+        db.post_job("Skill", f"long {i}", f"Job {i}", "Desc", "Employer", "Location", 100.0, 1)
+
+    page, more = db.job_titles_page(limit=2)
+    assert [t.job_id for t in page] == [1, 2] and more
+    page, more = db.job_titles_page(after=page[-1].job_id, limit=2)
+    assert [t.job_id for t in page] == [3, 4] and more
+    page, more = db.job_titles_page(after=page[-1].job_id, limit=2)
+    assert [(t.job_title, t.job_id) for t in page] == [("Job 4", 5)] and not more
+    page, more = db.job_titles_page(before=page[0].job_id, limit=2)
+    assert [t.job_id for t in page] == [3, 4] and more
+    page, more = db.job_titles_page(before=page[0].job_id, limit=2)
+    assert [t.job_id for t in page] == [1, 2] and not more
+    assert db.job_titles_page(limit=5) == (db.fetchall("job_titles_after", (0, 5)), False)
+
+# the all users list pages accounts the same way, so a choice is resolved against the page on screen
+def test_account_directory_page(db):
+    for name in ("a", "b", "c"):
+        db.execute("insert_account", (name, "pw", "First", "Last", "University", "Major", 0))
+    page, more = db.account_directory_page(limit=2)
+    assert [user.username for user in page] == ["a", "b"] and more
+    page, more = db.account_directory_page(after=page[-1].user_id, limit=2)
+    assert [(user.user_id, user.username) for user in page] == [(3, "c")] and not more
+    page, more = db.account_directory_page(before=page[0].user_id, limit=2)
+    assert [user.username for user in page] == ["a", "b"] and not more
+    assert db.check_query_plans() == {}
+
+# searches and the not-applied listing page by keyset too, in their own order
+def test_job_listing_pages(db):
+    db.execute("insert_account", ("poster", "pw", "First", "Last", "University", "Major", 0))
+    for i in range(5):
+        db.post_job("Skill", f"long {i}", "Engineer " + "engineer " * (i % 3), "Desc", "Employer", "Location", 100.0 + i, 1)
+    db.user_apply_job(1, 2, "01/01/2000", "01/01/2000", "quals")
+
+    for text in ("", "engineer"):
+        listed, (page, more) = [], db.search_jobs_page(1, text, limit=2)
+        listed += page
+        while more:
+            page, more = db.search_jobs_page(1, text, after=page[-1].job_id, limit=2)
+            listed += page
+        assert listed == db.search_jobs(1, text)
+        page, more = db.search_jobs_page(1, text, before=listed[2].job_id, limit=2)
+        assert page == listed[:2] and not more
+    assert [job.job_id for job in db.search_jobs_page(1, applied=False, min_salary=101, limit=2)[0]] == [3, 4]
+    assert db.search_jobs_page(1, "!!") == ([], False)
+
+    page, more = db.jobs_not_applied_page(1, limit=2)
+    assert [job.job_id for job in page] == [1, 3] and more
+    page, more = db.jobs_not_applied_page(1, after=3, limit=2)
+    assert [job.job_id for job in page] == [4, 5] and not more
+    page, more = db.jobs_not_applied_page(1, before=4, limit=2)
+    assert [job.job_id for job in page] == [1, 3] and not more
+
+# new jobs are found from each account's watermark, so posting writes nothing per account
+def test_new_jobs_watermark(db):
+    db.execute("insert_account", ("a", "pw", "First", "Last", "University", "Major", 0))
+    db.execute("insert_account", ("b", "pw", "First", "Last", "University", "Major", 0))
+    db.post_job("Skill", "long 1", "Job 1", "Desc", "Employer", "Location", 100.0, 1)
+    db.post_job("Skill", "long 2", "Job 2", "Desc", "Employer", "Location", 100.0, 2)
+    assert db.fetch("SELECT COUNT(*) FROM new_job_notifs")[0] == 0
+
+    assert [job.job_title for job in db.new_jobs_for(2)] == ["Job 1"]
+    assert db.new_jobs_for(2) == []
+    assert [job.job_title for job in db.new_jobs_for(1)] == ["Job 2"]
+    # the watermark moves to the newest job returned, not past b's own posting
+    assert db.fetch("account_by_id", (2,)).last_seen_job_id == 1
+
+    # a check that finds nothing writes nothing, so it doesn't wait for a transaction holding the write lock
+    checked = []
+    with db.transaction(immediate=True):
+        checker = threading.Thread(target=lambda: checked.append(db.new_jobs_for(2)))
+        start = time.perf_counter()
+        checker.start()
+        checker.join()
+        assert time.perf_counter() - start < 1
+    assert checked == [[]]
+
+    # a new account has nothing to catch up on
+    db.execute("insert_account", ("c", "pw", "First", "Last", "University", "Major", 0))
+    assert db.fetch("account_by_id", (3,)).last_seen_job_id == 2
+    assert db.new_jobs_for(3) == []
+    db.post_job("Skill", "long 3", "Job 3", "Desc", "Employer", "Location", 100.0, 1)
+    assert [job.job_title for job in db.new_jobs_for(3)] == ["Job 3"]
+
+# announcements still pending in new_job_notifs survive the upgrade to watermarks
+def test_new_job_notifs_migration(tmp_path):
+    path = str(tmp_path / "old.db")
+    old = main.DatabaseManager(path)
+    old.migrate(main.SCHEMA_MIGRATIONS[:3])
+    for name in ("a", "b", "c"):
+        old.execute("insert_account", (name, "pw", "First", "Last", "University", "Major", 0))
+    # written the way that version did, before later tables such as job_recommendations existed
+    for i in (1, 2, 3):
+        old.execute("insert_job", ("Skill", f"long {i}", f"Job {i}", "Desc", "Employer", "Location", 100.0, 1, "First", "Last"))
+    # b has not seen jobs 2 and 3 yet, c has seen everything
+    old.execute_many("INSERT INTO new_job_notifs (recipientID, message) VALUES (2, ?)",
+                     [('A new job "Job 2" has been posted.',), ('A new job "Job 3" has been posted.',)])
+    old.commit()
+    assert old.migrate()[0] == 4
+
+    assert [job.job_title for job in old.new_jobs_for(2)] == ["Job 2", "Job 3"]
+    assert old.new_jobs_for(3) == []
+    assert old.fetch("SELECT COUNT(*) FROM new_job_notifs")[0] == 0
+    old.close()
+
+# a transaction lands the writes deferred before it instead of waiting for them while it holds the write lock
+def test_transaction_after_deferred_write(db):
+    db.execute("insert_account", ("a", "pw", "First", "Last", "University", "Major", 0))
+    db.post_job("Skill", "long 1", "Job 1", "Desc", "Employer", "Location", 100.0, 1)
+    db.defer("touch_last_job_application", (1,))
+    start = time.perf_counter()
+    assert db.new_jobs_for(1) == []
+    assert time.perf_counter() - start < 1
+    assert db.pending_writes == 0
+
+# a transaction holding the write lock doesn't wait for another thread's deferred write, which needs that lock
+def test_transaction_ignores_other_threads_deferred_writes(db):
+    db.execute("insert_account", ("a", "pw", "First", "Last", "University", "Major", 0))
+    db.flush()
+    with db.transaction(immediate=True):
+        other = threading.Thread(target=db.defer, args=("touch_last_job_application", (1,)))
+        other.start()
+        other.join()
+        start = time.perf_counter()
+        assert db.fetch("account_by_id", (1,)).username == "a"
+        assert time.perf_counter() - start < 1
+    db.flush()
+    assert db.pending_writes == 0
+
+# deleting jobs, one or many at once, notifies their applicants in the same statement
+def test_deleted_job_notifications(db):
+    for name in ("poster", "x", "y"):
+        db.execute("insert_account", (name, "pw", "First", "Last", "University", "Major", 0))
+    for i in range(4):
+        db.post_job("Skill", f"long {i}", f"Job {i}", "Desc", "Employer", "Location", 100.0, 1)
+    for applicant, job_id in ((2, 1), (3, 1), (2, 2), (3, 3)):
+        db.user_apply_job(applicant, job_id, "01/01/2000", "01/01/2000", "quals")
+
+    db.execute("delete_job", (1,))
+    assert db.fetchall("SELECT * FROM deleted_job_notifs ORDER BY applicantID") == [(2, 1, "Job 0"), (3, 1, "Job 0")]
+    assert db.delete_jobs([2, 3, 4, 99]) == 3
+    assert [(n.jobID, n.jobTitle) for n in db.fetchall("deleted_job_notifs_for", (3,))] == [(1, "Job 0"), (3, "Job 2")]
+    assert db.fetch("job_count")[0] == 0 and db.fetch("SELECT COUNT(*) FROM job_applications")[0] == 0
+
+# with shards the trigger reads every shard's applications
+def test_deleted_job_notifications_sharded(tmp_path):
+    db = main.DatabaseManager(str(tmp_path / "sharded.db"), shards=2)
+    db.migrate()
+    for name in ("poster", "x", "y"):
+        db.execute("insert_account", (name, "pw", "First", "Last", "University", "Major", 0))
+    db.post_job("Skill", "long", "Job", "Desc", "Employer", "Location", 100.0, 1)
+    for applicant in (2, 3):
+        db.user_apply_job(applicant, 1, "01/01/2000", "01/01/2000", "quals")
+
+    assert db.delete_jobs([1]) == 1
+    assert sorted(n.applicantID for n in db.fetchall("SELECT * FROM deleted_job_notifs")) == [2, 3]
+    assert db.fetchall("SELECT * FROM job_applications") == []
+    db.close()
+
+# scoring keeps each user's best jobs by shared words and friends' applications, without excluded pairs
+def test_score_jobs(monkeypatch):
+    users = [(1, {"python", "software"}), (2, set())]
+    jobs = [(10, {"python", "developer"}), (11, {"software", "python"}), (12, {"nursing"})]
+    top = main.score_jobs(users, jobs, friends={(2, 12): 1}, excluded={(1, 11)}, top_k=2)
+    assert [job_id for _, job_id in top[1]] == [10]
+    assert top[2] == [(0.25, 12)]
+    assert [job_id for _, job_id in main.score_jobs(users, jobs, top_k=1)[1]] == [11]
+    # users are scored a chunk at a time, one user per chunk here
+    monkeypatch.setattr(main, "SCORE_CHUNK_CELLS", len(jobs))
+    assert main.score_jobs(users, jobs, friends={(2, 12): 1}, excluded={(1, 11)}, top_k=2) == top
+    assert main.text_terms("The Software-Engineer, and QA") == {"software", "engineer"}
+
+# recommendations are read from the precomputed table and follow posted, deleted and applied for jobs
+def test_job_recommendations(db):
+    for name, major in (("poster", "Business"), ("ann", "Computer Science"), ("bob", "Nursing"), ("cat", "Art")):
+        db.execute("insert_account", (name, "pw", "First", "Last", "University", major, 0))
+    db.post_job("Python programming", "long 1", "Software Engineer", "Build computer systems", "Acme", "Tampa", 100.0, 1)
+    db.post_job("Patient care", "long 2", "Registered Nurse", "Hospital nursing", "General", "Tampa", 100.0, 1)
+    db.post_job("Illustration", "long 3", "Graphic Designer", "Art and design", "Studio", "Tampa", 100.0, 1)
+    db.execute("insert_friendship", ("cat", "ann"))
+    db.user_apply_job(2, 2, "01/01/2000", "01/01/2000", "quals")
+    # friendships are picked up by the next batch refresh
+    db.flush()
+    db.recommender.refresh()
+
+    assert [job.job_id for job in db.recommend_jobs(2)] == [1]
+    assert [job.job_id for job in db.recommend_jobs(3)] == [2]
+    # cat's major matches the designer job, and a friend applied for the nursing one
+    assert [job.job_id for job in db.recommend_jobs(4)] == [3, 2]
+    assert isinstance(db.recommend_jobs(4)[0], main.RecommendedJob)
+    assert db.recommend_jobs(1) == []
+
+    # showing recommendations never scores anything
+    computed = db.recommender.refresh
+    db.recommender.refresh = None
+    assert db.recommend_jobs(1) == []
+    db.recommender.refresh = computed
+
+    # a new account, a changed profile and a saved job each refresh the account's list in the background
+    db.execute("insert_account", ("dan", "pw", "First", "Last", "University", "Music", 0))
+    db.execute("insert_profile", ("dan", "First", "Last", "n/a", "Music", "University", "n/a", "n/a", "n/a", "n/a", "n/a", "no"))
+    db.flush()
+    assert db.recommend_jobs(5) == []
+    db.execute("update_profile_title", ("Software Engineer", "dan"))
+    db.flush()
+    assert [job.job_id for job in db.recommend_jobs(5)] == [1]
+    db.execute("insert_saved_job", (3, 3))
+    db.flush()
+    assert [job.job_id for job in db.recommend_jobs(3)] == [3, 2]
+
+    # a posted job is added to the lists it ranks in without recomputing them, with the scores a batch refresh gives
+    db.post_job("Teaching", "long 4", "Computer Science Tutor", "Tutor students", "School", "Tampa", 50.0, 1)
+    assert [row.job_id for row in db.fetchall("SELECT job_id FROM job_recommendations WHERE user_id=2 ORDER BY score DESC")] == [4, 1]
+    incremental = db.fetchall("SELECT * FROM job_recommendations WHERE job_id=4 ORDER BY user_id")
+    db.recommender.refresh()
+    assert db.fetchall("SELECT * FROM job_recommendations WHERE job_id=4 ORDER BY user_id") == incremental
+
+    # a job is only posted together with its recommendations
+    def fail(job_id):
+        raise sqlite3.OperationalError("recommender failed")
+    db.recommender.job_posted = fail
+    assert not db.post_job("Teaching", "long 5", "Tutor", "Tutor students", "School", "Tampa", 50.0, 1)
+    assert db.fetch("job_count")[0] == 4
+    del db.recommender.job_posted
+
+    # a deleted job is replaced in the lists that had it
+    assert db.delete_jobs([4]) == 1
+    assert [job.job_id for job in db.recommend_jobs(2)] == [1]
+    assert db.recommender.affected_by([4]) == []
+    assert db.check_query_plans() == {}
+
+# salary, location and employer filters narrow any search, and each is answered from an index
+def test_job_search_filters(db):
+    db.execute("insert_account", ("poster", "pw", "First", "Last", "University", "Major", 0))
+    for i, (employer, location, salary) in enumerate((("Acme", "Tampa", 50000.0), ("Acme", "Denver", 90000.0),
+                                                      ("Globex", "Tampa", 70000.0), ("Globex", "Tampa", 120000.0))):
+        db.post_job("Skill", f"long {i}", f"Engineer {i}", "Desc", employer, location, salary, 1)
+
+    assert [job.job_id for job in db.search_jobs(1, location="Tampa")] == [1, 3, 4]
+    assert [job.job_id for job in db.search_jobs(1, min_salary=60000, max_salary=100000)] == [2, 3]
+    assert [job.job_id for job in db.search_jobs(1, "engineer", employer="Globex", location="Tampa", max_salary=100000)] == [3]
+    assert db.search_jobs(1, location="Nowhere") == []
+
+    for filters, index in (({"location": "Tampa", "min_salary": 1}, "idx_jobs_location_salary"),
+                           ({"employer": "Acme", "max_salary": 1}, "idx_jobs_employer_salary"),
+                           ({"min_salary": 1, "max_salary": 2}, "idx_jobs_salary")):
+        sql = db.job_listing_query("job_listings", filters)
+        params = dict(dict.fromkeys(main.JOB_FILTERS), user_id=1, applied=None, **filters)
+        plan = " ".join(row.detail for row in db.fetchall(f"EXPLAIN QUERY PLAN {sql}", params))
+        assert index in plan
+
+# facet counts follow every posted, changed and deleted job
+def test_job_facets(db):
+    db.execute("insert_account", ("poster", "pw", "First", "Last", "University", "Major", 0))
+    db.post_job("Skill", "long 1", "Job 1", "Desc", "Acme", "Tampa", 55000.0, 1)
+    db.post_job("Skill", "long 2", "Job 2", "Desc", "Acme", "Denver", 59000.0, 1)
+    db.post_job("Skill", "long 3", "Job 3", "Desc", "Globex", "Tampa", 72000.0, 1)
+    assert db.job_facets() == {"location": {"Tampa": 2, "Denver": 1}, "employer": {"Acme": 2, "Globex": 1}, "salary": {50000: 2, 70000: 1}}
+
+    db.execute("UPDATE jobs SET location = 'Denver', salary = 71000 WHERE job_id = 1")
+    db.delete_jobs([3])
+    assert db.job_facets() == {"location": {"Denver": 2}, "employer": {"Acme": 2}, "salary": {50000: 1, 70000: 1}}
+
+# the result cache is an LRU bounded by size and age, and drops entries by the tables they were read from
+def test_result_cache_bounds():
+    cache = main.ResultCache(size=2, ttl=0.05)
+    cache.put("a", 1, {"jobs"})
+    cache.put("b", 2, {"job_save"})
+    assert cache.get("a") == (True, 1)
+    cache.put("c", 3, {"jobs"})
+    assert cache.get("b") == (False, None)
+    cache.invalidate({"jobs"})
+    assert cache.get("a") == (False, None) and cache.get("c") == (False, None)
+    cache.put("d", 4, {"jobs"})
+    time.sleep(0.06)
+    assert cache.get("d") == (False, None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["invalidations"]) == (1, 4, 1, 2)
+
+    # a result read while its table was invalidated is not stored
+    version = cache.version({"jobs"})
+    cache.invalidate({"job_save"})
+    cache.put("e", 5, {"jobs"}, version)
+    assert cache.get("e") == (True, 5)
+    cache.invalidate({"jobs"})
+    cache.put("e", 5, {"jobs"}, version)
+    assert cache.get("e") == (False, None)
+
+# job reads are answered from memory until a write, here or in another connection, changes what they read
+def test_job_result_cache(db):
+    db.execute("insert_account", ("poster", "pw", "First", "Last", "University", "Major", 0))
+    db.execute("insert_account", ("seeker", "pw", "First", "Last", "University", "Major", 0))
+    db.post_job("Skill", "long 1", "Job 1", "Desc", "Employer", "Location", 100.0, 1)
+
+    def cached(read):
+        before = db.cache_stats()["hits"]
+        result = read()
+        return db.cache_stats()["hits"] > before, result
+    assert cached(lambda: db.fetch("job_count")[0]) == (False, 1)
+    assert cached(lambda: db.fetch("job_count")[0]) == (True, 1)
+    assert cached(lambda: len(db.search_jobs(2, location="Location"))) == (False, 1)
+    assert cached(lambda: len(db.search_jobs(2, location="Location"))) == (True, 1)
+
+    # a deferred write to another table, committed by the worker's connection, leaves the job results alone
+    db.notify_other_users(1, "hello")
+    db.flush()
+    assert cached(lambda: len(db.search_jobs(2, location="Location"))) == (True, 1)
+
+    # applying changes the listings but not the job count
+    db.user_apply_job(2, 1, "01/01/2000", "01/01/2000", "quals")
+    assert cached(lambda: db.fetch("job_count")[0]) == (True, 1)
+    assert cached(lambda: db.search_jobs(2, location="Location")[0].applied) == (False, 1)
+
+    db.post_job("Skill", "long 2", "Job 2", "Desc", "Employer", "Location", 100.0, 1)
+    assert cached(lambda: db.fetch("job_count")[0]) == (False, 2)
+    assert db.delete_jobs([2]) == 1
+    assert cached(lambda: db.fetch("job_count")[0]) == (False, 1)
+
+    # a thread that only reads cached jobs never checks out a writer connection
+    held = []
+    def read_jobs():
+        held.append((db.fetch("job_count")[0], db.fetch("job_count")[0], db.pool.current()))
+        db.readers.release()
+    reader = threading.Thread(target=read_jobs)
+    reader.start()
+    reader.join()
+    assert held == [(1, 1, None)]
+
+    # a commit by another connection is noticed through PRAGMA data_version (the worker's commits are this manager's own)
+    db.flush()
+    with sqlite3.connect(DB_FILE) as other:
+        other.execute("DELETE FROM jobs")
+    assert db.fetch("job_count")[0] == 0
+
+    # a transaction reads its own writes, never the cache
+    with db.transaction():
+        db.execute("insert_job", ("Skill", "long 3", "Job 3", "Desc", "Employer", "Location", 1.0, 1, "First", "Last"))
+        assert db.fetch("job_count")[0] == 1
+    assert db.fetch("job_count")[0] == 1
+
+    # another thread may cache the old count while a transaction's write is uncommitted; the commit drops it again
+    with db.transaction():
+        db.execute("insert_job", ("Skill", "long 4", "Job 4", "Desc", "Employer", "Location", 1.0, 1, "First", "Last"))
+        reader = threading.Thread(target=lambda: db.fetch("job_count"))
+        reader.start()
+        reader.join()
+    assert db.fetch("job_count")[0] == 2
+    assert db.diagnostics()["result_cache"]["hit_rate"] == db.cache_stats()["hit_rate"] > 0